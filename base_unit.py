@@ -1,15 +1,44 @@
+import utils
+
 class BaseUnit:
-    """ 
+    """
     Base unit of all hardware components
 
-    latency_count: how many times the time of one operation/access
-                    of the unit is metatime
+    latency_count: how many ticks one operation/access of the unit lasts
     latency_counter: when latency_counter count to latency_count, a new operation can start
+    time_quantum: how many times the time of a tick is metatime
     """
 
-    def __init__(self, latency_count):
-        self.latency_count = latency_count
+    __slots__ = ("latency_count", "latency_counter", "time_quantum")
+
+    def __init__(self, latency_count, time_quantum=1):
+        self.latency_count = latency_count // time_quantum
         self.latency_counter = 0
+        self.time_quantum = time_quantum
+
+    def latency_ns(self):
+        """ Time of one operation/access of the unit, in nanoseconds """
+        return utils.metatime_to_ns(self.latency_count * self.time_quantum)
+
+    def count_latency(self, events, counter, latency_count):
+        """
+        Count one tick of the operation/transfer recorded by counter
+
+        counter: name of the latency counter attribute, eg. "latency_counter", "array_latency_counter"
+        latency_count: number of ticks the operation/transfer lasts
+
+        Return True when the operation/transfer completes, the counter is reset then
+        Otherwise the completion event is scheduled in the event queue, at the tick the operation/transfer completes
+        """
+
+        value = getattr(self, counter) + 1
+        if value == latency_count:
+            setattr(self, counter, 0)
+            events.complete(self, counter)
+            return True
+        setattr(self, counter, value)
+        events.schedule(latency_count - value, self, counter)
+        return False
 
     def reset(self):
-        self.latency_counter = 0
\ No newline at end of file
+        self.latency_counter = 0
@@ -1,8 +1,7 @@
 from base_unit import BaseUnit
+from state_matrix import new_state_matrix
 import utils
 
-import numpy as np
-
 class CalculatorAndArray(BaseUnit):
     """ 
     The calculating and accumulating component of a core
@@ -27,16 +26,22 @@ class CalculatorAndArray(BaseUnit):
 
     sram_latency_counter: when array needs to transfer data into next core's SRAM, we use this variable for counting latency
                           when transferring data to LN, we use this counter as well
+    packed_state: whether the states are packed into STATE_BITS bits
     """
 
-    def __init__(self, mac_lane, mac_num, block_cnt, latency_count=1):
-        super(CalculatorAndArray, self).__init__(latency_count)
+    __slots__ = ("mac_lane", "mac_num", "complete", "packed_state", "array_state_matrix", "array_idx_cal", "array_idx_rm",
+                 "subsum_counter", "block_cnt", "block_counter_cal", "block_counter_rm", "array_sram_busy",
+                 "array_layernorm_busy", "sram_latency_counter", "subsum_cnt")
+
+    def __init__(self, mac_lane, mac_num, block_cnt, latency_count=1, time_quantum=1, packed_state=False):
+        super(CalculatorAndArray, self).__init__(latency_count, time_quantum)
 
         self.mac_lane = mac_lane
         self.mac_num = mac_num
 
         self.complete = False
-        self.array_state_matrix = np.zeros(mac_lane, dtype=int)
+        self.packed_state = packed_state
+        self.array_state_matrix = new_state_matrix(mac_lane, utils.NULL, packed_state)
 
         self.array_idx_cal = 0
         self.array_idx_rm = 0
@@ -55,12 +60,15 @@ class CalculatorAndArray(BaseUnit):
         print("| + MAC number in a MAC lane: " + str(self.mac_num))
         print("| + Array size: " + str(self.mac_lane) + "*" + str(self.mac_lane))
         print("| + Block number: " + str(self.block_cnt))
-        print("| + operating latency: " + str(self.latency_count * utils.METATIME) + "ns")
+        print("| + operating latency: " + str(self.latency_ns()) + "ns")
 
     def dump_cal_status(self):
         print("array: [" + str(self.array_idx_cal)  + "(id), " + str(self.subsum_counter) + "(subsum_cnt/" + str(self.subsum_cnt - 1) + ")], block number: " + str(self.block_counter_cal))
         print("block_rm number: " + str(self.block_counter_rm))
 
+    def state_bytes(self):
+        return self.array_state_matrix.nbytes
+
     def dump_state_matrix(self):
         print(self.array_state_matrix)
 
@@ -177,7 +185,7 @@ class CalculatorAndArray(BaseUnit):
         self.block_counter_cal = 0
         self.block_counter_rm = 0
 
-        self.array_state_matrix = np.zeros(self.mac_lane, dtype=int)
+        self.array_state_matrix = new_state_matrix(self.mac_lane, utils.NULL, self.packed_state)
 
         self.array_sram_busy = False
         self.array_layernorm_busy = False
@@ -1,10 +1,20 @@
 from calculator_and_array import CalculatorAndArray
-from sram import SRAM1, SRAM2
+from sram import SRAM1, RingSRAM1, CheckedSRAM1, PingPongSRAM1, SRAM2
 from statistics import Statistics
 import utils
 
 import numpy as np
 
+""" 
+Backends of SRAM1
+
+matrix: states of all data recorded in a state matrix
+ring: ring pointers, only for SRAM1 fed by GB(Q/K/V)
+checked: ring pointers cross-checked against a state matrix
+pingpong: state matrix split into 2 banks, GB fills one while the core calculates with the other, only for SRAM1 fed by GB(Q/K/V)
+"""
+SRAM1_BACKENDS = {"matrix": SRAM1, "ring": RingSRAM1, "checked": CheckedSRAM1, "pingpong": PingPongSRAM1}
+
 class Core:
     """ 
     Core of the cluster
@@ -13,17 +23,24 @@ class Core:
     block_cal: 2 elements, in the shape of result matrix, record which block is now under calculation
                [row, col]
     block_rownum_softxmax: when the core is calculating Q*K, this variable indicates which row is going to execute softmax next
+    sram1_backend: key of SRAM1_BACKENDS
+    sram1_split: split ratio of the ping-pong SRAM1, see PingPongSRAM1
     """
 
+    __slots__ = ("sram1", "sram2", "calculator_and_array", "blocknum_cal", "statistics")
+
     def __init__(self, sram1_num, sram1_height, sram1_width,
                 sram2_height, sram2_width,
                 mac_lane, mac_num, block_cnt, 
-                sram_latency_count, array_and_calculator_latency_count, sram2_num=1):
+                sram_latency_count, array_and_calculator_latency_count, sram2_num=1, time_quantum=1, packed_state=False, sram1_backend="matrix", sram1_split=0.5):
 
-        self.sram1 = SRAM1(sram_latency_count, sram1_num, sram1_height, sram1_width)
-        self.sram2 = SRAM2(sram_latency_count, sram2_num, sram2_height, sram2_width)
+        if sram1_backend == "pingpong":
+            self.sram1 = PingPongSRAM1(sram_latency_count, sram1_num, sram1_height, sram1_width, time_quantum, packed_state, sram1_split)
+        else:
+            self.sram1 = SRAM1_BACKENDS[sram1_backend](sram_latency_count, sram1_num, sram1_height, sram1_width, time_quantum, packed_state)
+        self.sram2 = SRAM2(sram_latency_count, sram2_num, sram2_height, sram2_width, time_quantum, packed_state)
 
-        self.calculator_and_array = CalculatorAndArray(mac_lane, mac_num, block_cnt, array_and_calculator_latency_count)
+        self.calculator_and_array = CalculatorAndArray(mac_lane, mac_num, block_cnt, array_and_calculator_latency_count, time_quantum, packed_state)
 
         self.blocknum_cal = [0, 0]
 
@@ -73,6 +90,10 @@ class Core:
         self.sram2.dump_state_matrix("SRAM2", id)
         self.calculator_and_array.dump_state_matrix()
 
+    def state_bytes(self):
+        """ Bytes of all state matrices in the core """
+        return self.sram1.state_bytes() + self.sram2.state_bytes() + self.calculator_and_array.state_bytes()
+
     def sram_ready(self):
         """ Check whether SRAMs are ready to calculate """
         return (self.sram1.ready() & self.sram2.ready(self.blocknum_cal[1]))
@@ -0,0 +1,83 @@
+from plan import Plan
+from simulator import SimulationConfig
+import mapper
+
+import dataclasses
+import json
+import os
+
+"""
+Hardware topology and workload description files
+
+A description is a JSON(or YAML, needs PyYAML) object with any of the sections
+    hardware: core number, latencies, bandwidths and capacities of the units, same names as SimulationConfig
+    feeds: {"gbI": "coreJ"} which GB provides the data for the SRAMs of which core
+    workload: sequence length, embedding dimension, heads, blocks and images, same names as SimulationConfig
+
+e.g.
+{
+    "hardware": {"core_num": 8, "SRAM_capacity": 65536, "MAC_lane": 16, "GB_access_latency": 50},
+    "feeds": {"gb0": "core0", "gb1": "core1", "gb2": "core2", "gb3": "core3", "gb4": "core4", "gb5": "core5", "gb6": "core6", "gb7": "core7"},
+    "workload": {"seq_length": 384, "embedding_dim": 1024, "head_num": 16}
+}
+
+The configs not in the description keep their defaults. The core-to-core dataflow of the simulator is fixed, so the
+feeds only document and check the topology of the template, see plan.Plan.feeds().
+"""
+
+HARDWARE_FIELDS = ["core_num", "SRAM_capacity", "MAC_lane", "MAC_num", "SRAM_access_latency", "GB_access_latency",
+                   "GB_SRAM_bandwidth", "array_access_and_calculation_latency", "softmax_cal_latency", "softmax_throughput",
+                   "layernorm_cal_latency", "GB_LN_bandwidth", "LN_SRAM_bandwidth", "sram1_backend",
+                   "sram1_split", "gb_bus_width", "gb_bus_arbitration", "DRAM_channels", "DRAM_bandwidth", "DRAM_burst_size",
+                   "DRAM_row_size", "DRAM_hit_latency", "DRAM_miss_latency", "GB_weight_buffer",
+                   "GB_capacity", "GB_spill_policy", "GB_outstanding", "GB_issue_interval", "energy_table"]
+WORKLOAD_FIELDS = ["seq_length", "embedding_dim", "head_num", "head_id", "multi_head", "block_num", "image_num", "image_interval"]
+
+
+def read_file(path):
+    """ Object of a .json, .yaml or .yml file """
+
+    with open(path) as f:
+        if os.path.splitext(path)[1] in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML is needed to read " + path + ", or write the description in JSON") from None
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def load_description(path):
+    """
+    Configs of a description file, {SimulationConfig field: value}
+
+    Raise ValueError if the description is malformed, NotImplementedError if its feeds aren't the template's
+    """
+
+    description = read_file(path)
+    if not isinstance(description, dict):
+        raise ValueError(path + ": a description must be an object of sections")
+    unknown = set(description) - {"hardware", "feeds", "workload"}
+    if unknown:
+        raise ValueError(path + ": unknown sections " + str(sorted(unknown)))
+
+    types = {field.name: type(field.default) for field in dataclasses.fields(SimulationConfig)}
+    configs = {}
+    for (section, fields) in [("hardware", HARDWARE_FIELDS), ("workload", WORKLOAD_FIELDS)]:
+        for (name, value) in description.get(section, {}).items():
+            if name not in fields:
+                raise ValueError(path + ": unknown " + section + " config " + name + ", must be one of " + str(fields))
+            # bool is an int in Python, but not a valid count or latency
+            if (type(value) != types[name]):
+                raise ValueError(path + ": " + section + " config " + name + " must be " + types[name].__name__ + ", got " + repr(value))
+            configs[name] = value
+
+    if "feeds" in description:
+        config = SimulationConfig(**configs)
+        mapping = mapper.map_cores(config.core_num, config.head_num, config.multi_head, config.head_id)
+        feeds = Plan(config, mapping.template_core_num).feeds()
+        if description["feeds"] != feeds:
+            raise NotImplementedError(path + ": feeds of the " + str(mapping.template_core_num) + "-core template are " + json.dumps(feeds)
+                                      + ", other topologies aren't supported yet!")
+
+    return configs
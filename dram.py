@@ -0,0 +1,185 @@
+from base_unit import BaseUnit
+import utils
+
+import math
+
+"""
+Off-chip DRAM tier behind the global buffers
+
+The weight matrices live in DRAM, every GB providing a weight matrix(SRAM2 operand) fetches it burst by burst in
+order into a prefetch buffer of weight_buffer BYTE, a transfer into core SRAM2 only starts when all its data is in the
+buffer, and the data is evicted when the transfer completes. A matrix transferred tile by tile(see gb_weight_refetch) is
+fetched again for every pass over the rows of the result matrix. The data of the started transfers is always fetched, the
+stream prefetches ahead of them until the expected total is fetched or the last transfer of the matrix starts.
+
+Every weight stream is bound to a DRAM channel, the matrices are stored one after another and a channel keeps the
+row of its last access open, so a burst of the open row takes hit_latency and any other burst takes miss_latency,
+plus the time to transfer the burst at bandwidth. The streams of a channel take turns, but the stream served last keeps
+the channel while its next burst hits the open row(row hit first), so a stream holds the channel for at most a row.
+"""
+
+
+def transfer_ticks(burst_size, bandwidth):
+    """ Metatime to transfer a burst of burst_size BYTE at bandwidth BYTE/ns """
+
+    # round off the float error before the ceiling, eg. 115 / 2.3 / 0.1 = 500.00000000000006
+    return math.ceil(round(burst_size / bandwidth / utils.METATIME, 6))
+
+
+class WeightStream:
+    """
+    Weight matrix of a GB fetched from DRAM
+
+    base: DRAM address of the matrix
+    size: BYTE of the matrix
+    total: expected BYTE of all transfers of the matrix into core SRAM2
+    data_size: BYTE of a data of core SRAM2(MAC_num)
+    fetched: BYTE fetched from DRAM, the address of the next burst is base + fetched % size
+    requested: BYTE of the transfers into core SRAM2 that have started
+    released: BYTE of the transfers into core SRAM2 that have completed, evicted from the prefetch buffer
+    stall_counter: time the transfers into core SRAM2 wait for DRAM
+    """
+
+    __slots__ = ("global_buffer", "base", "size", "total", "data_size", "fetched", "requested", "released", "stall_counter")
+
+    def __init__(self, global_buffer, base, size, total, data_size):
+        self.global_buffer = global_buffer
+        self.base = base
+        self.size = size
+        self.total = total
+        self.data_size = data_size
+        self.fetched = 0
+        self.requested = 0
+        self.released = 0
+        self.stall_counter = 0
+
+    def wants(self, burst_size, weight_buffer):
+        """ Whether the next burst can be fetched """
+
+        if self.fetched < self.requested:
+            return True
+        if self.global_buffer.sram2_complete1 or (self.fetched >= self.total):
+            return False
+        return (self.fetched - self.released + burst_size) <= weight_buffer
+
+    def ready(self, mark=None):
+        """ Whether all data of the started transfers(or the first mark BYTE of them) is in the prefetch buffer """
+        return self.fetched >= (self.requested if mark is None else mark)
+
+
+class DRAMChannel(BaseUnit):
+    """
+    streams: weight streams bound to the channel
+    open_row: row of the last access, None before any access
+    stream: stream the burst being fetched belongs to, None if the channel is idle
+    turn: index of the stream served last
+    hit_cnt/miss_cnt: number of bursts hitting/missing the open row
+    """
+
+    __slots__ = ("streams", "open_row", "stream", "turn", "hit_cnt", "miss_cnt")
+
+    def __init__(self, time_quantum=1):
+        super(DRAMChannel, self).__init__(0, time_quantum)
+
+        self.streams = []
+        self.open_row = None
+        self.stream = None
+        self.turn = -1
+        self.hit_cnt = 0
+        self.miss_cnt = 0
+
+
+class DRAM:
+    """
+    channels: number of independent channels
+    bandwidth: BYTE a channel transfers per nanosecond
+    burst_size: BYTE of an access
+    row_size: BYTE of a DRAM row(page)
+    hit_latency/miss_latency: latency of an access hitting/missing the open row, in metatime
+    weight_buffer: BYTE of the prefetch buffer of each weight stream in GB
+    """
+
+    __slots__ = ("channels", "bandwidth", "burst_size", "row_size", "hit_latency", "miss_latency", "weight_buffer",
+                 "time_quantum", "transfer_ticks", "streams", "end")
+
+    def __init__(self, channels, bandwidth, burst_size, row_size, hit_latency, miss_latency, weight_buffer, time_quantum=1):
+        if min(channels, bandwidth, burst_size, row_size) <= 0:
+            raise ValueError("DRAM channels, bandwidth, burst size and row size must be positive!")
+        if weight_buffer < burst_size:
+            raise ValueError("GB weight buffer of " + str(weight_buffer) + " BYTE can't hold a DRAM burst of " + str(burst_size) + " BYTE!")
+
+        self.bandwidth = bandwidth
+        self.burst_size = burst_size
+        self.row_size = row_size
+        self.hit_latency = hit_latency
+        self.miss_latency = miss_latency
+        self.weight_buffer = weight_buffer
+        self.time_quantum = time_quantum
+        self.transfer_ticks = transfer_ticks(burst_size, bandwidth)
+
+        self.channels = [DRAMChannel(time_quantum) for _ in range(channels)]
+        self.streams = []
+        # address after the last matrix
+        self.end = 0
+
+    def dump_configs(self):
+        print("----------------------------------------------")
+        print("| DRAM Configuration")
+        print("|")
+        print("| + channels: " + str(len(self.channels)))
+        print("| + bandwidth: " + str(self.bandwidth) + " BYTE/ns per channel")
+        print("| + burst size: " + str(self.burst_size) + " BYTE")
+        print("| + row size: " + str(self.row_size) + " BYTE")
+        print("| + row hit/miss latency: " + str(self.hit_latency) + "/" + str(self.miss_latency))
+        print("| + GB weight buffer: " + str(self.weight_buffer) + " BYTE")
+        print("| + weight streams: " + str(len(self.streams)))
+        print("----------------------------------------------")
+
+    def attach(self, global_buffer, size, total, data_size):
+        """ Store the weight matrix of size BYTE provided by global_buffer in DRAM, total: see WeightStream """
+
+        global_buffer.dram_stream = WeightStream(global_buffer, self.end, size, total, data_size)
+        self.channels[len(self.streams) % len(self.channels)].streams.append(global_buffer.dram_stream)
+        self.streams.append(global_buffer.dram_stream)
+        # matrices start at a new row
+        self.end += math.ceil(size / self.row_size) * self.row_size
+
+    def row(self, stream):
+        """ DRAM row of the next burst of stream """
+        return (stream.base + stream.fetched % stream.size) // self.row_size
+
+    def step(self, events):
+        """ Advance every channel by a tick """
+
+        for channel in self.channels:
+            # more channels than weight streams
+            if not channel.streams:
+                continue
+            if channel.stream is None:
+                # row hit first, then the streams after the last served one
+                order = [(channel.turn + i) % len(channel.streams) for i in range(len(channel.streams) + 1)]
+                if (channel.turn < 0) or (self.row(channel.streams[channel.turn]) != channel.open_row):
+                    order = order[1:]
+                for turn in order:
+                    stream = channel.streams[turn]
+                    if stream.wants(self.burst_size, self.weight_buffer):
+                        channel.turn = turn
+                        channel.stream = stream
+                        row = self.row(stream)
+                        if row == channel.open_row:
+                            channel.hit_cnt += 1
+                            latency = self.hit_latency
+                        else:
+                            channel.miss_cnt += 1
+                            latency = self.miss_latency
+                        channel.open_row = row
+                        channel.latency_count = max((latency + self.transfer_ticks) // self.time_quantum, 1)
+                        events.activate()
+                        break
+            elif channel.count_latency(events, "latency_counter", channel.latency_count):
+                channel.stream.fetched += self.burst_size
+                channel.stream = None
+
+    def traffic(self):
+        """ BYTE fetched from DRAM """
+        return sum(stream.fetched for stream in self.streams)
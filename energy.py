@@ -0,0 +1,65 @@
+import numbers
+
+"""
+Energy and power model
+
+Every unit counts its energy events while it's simulated(see Statistics.energy_cnt and transfer_data), the energy of the
+events is taken from the energy table after the simulation, in pJ:
+    mac: a MAC operation
+    sram1_read/sram1_write/sram2_read/sram2_write: an access of a MAC_num BYTE word of core SRAM1/SRAM2
+    gb: a BYTE transferred from or into a GB
+    softmax/layernorm: an element of a row of A/the LP result
+    core_leakage/gb_leakage/softmax_leakage/layernorm_leakage: leakage of a unit during a metatime
+
+A calculation step of a core reads a word of SRAM1 and a word of SRAM2 for every MAC lane and does MAC_lane * MAC_num
+MACs. Every core and GB leaks until the end of the simulation, including the idle cores. pJ/ns is mW.
+"""
+
+ENERGY_TABLE = {"mac": 0.2, "sram1_read": 5.0, "sram1_write": 6.0, "sram2_read": 5.0, "sram2_write": 6.0, "gb": 1.5,
+                "softmax": 1.0, "layernorm": 1.0, "core_leakage": 0.5, "gb_leakage": 1.0, "softmax_leakage": 0.1,
+                "layernorm_leakage": 0.1}
+
+
+def load_table(path):
+    """ Energy table of the .json/.yaml file at path, the energies not in the file keep their defaults, "" for the defaults """
+
+    table = dict(ENERGY_TABLE)
+    if path:
+        # description imports the simulator, which imports this module
+        import description
+        energies = description.read_file(path)
+        if not isinstance(energies, dict):
+            raise ValueError(path + ": an energy table must be an object of {event: pJ}")
+        for (event, energy) in energies.items():
+            if event not in ENERGY_TABLE:
+                raise ValueError(path + ": unknown energy event " + str(event) + ", must be one of " + str(list(ENERGY_TABLE)))
+            # bool is an int in Python, but not an energy
+            if isinstance(energy, bool) or (not isinstance(energy, numbers.Real)) or (energy < 0):
+                raise ValueError(path + ": energy of " + event + " must be a non-negative number, got " + repr(energy))
+            table[event] = energy
+    return table
+
+
+def core_energy(table, statistics, mac_num):
+    """ Dynamic energy of a core of statistics(Statistics), in pJ """
+
+    energy = statistics.energy_cnt.get("mac", 0) * table["mac"]
+    for event in ["sram1_read", "sram1_write", "sram2_read", "sram2_write"]:
+        # the SRAM events are counted in BYTE
+        energy += statistics.energy_cnt.get(event, 0) / mac_num * table[event]
+    return energy
+
+
+def gb_energy(table, statistics, mac_lane, mac_num):
+    """ Dynamic energy of a GB of statistics(Statistics), in pJ """
+
+    data_bytes = {"sram1": mac_lane * mac_num, "sram2": mac_num, "array": mac_lane, "softmax": mac_lane * mac_lane,
+                  "layernorm": mac_lane * mac_lane}
+    return sum(data * data_bytes[channel] for (channel, data) in statistics.transfer_data.items()) * table["gb"]
+
+
+def unit_energy(table, statistics, event, mac_lane):
+    """ Dynamic energy of the softmax/layernorm unit of statistics(Statistics), in pJ, event: "softmax"/"layernorm" """
+
+    # the rows are counted in mac_lane*mac_lane blocks
+    return statistics.energy_cnt.get(event, 0) * mac_lane * mac_lane * table[event]
@@ -0,0 +1,119 @@
+import heapq
+
+class EventQueue:
+    """
+    Event queue of the simulator
+
+    Every unit that is counting towards the end of an operation/transfer schedules its completion event here, keyed by
+    the absolute tick it completes at. The schedule is kept across ticks: an operation is only put into it when it starts
+    counting(or resumes after a pause), and the entries of completed or rescheduled operations are dropped lazily when
+    they reach the front. If nothing but latency counting happens during a tick, all the following ticks are the same
+    until the earliest completion event, so the clock jumps straight to that event instead of polling the idle ticks one by one.
+
+    events: heap of (completion tick, sequence number, unit, counter name), unit is None for a wake-up
+    due: (unit, counter name) -> completion tick of the operation being counted, an entry of events with another tick is stale
+    wakeups: ticks of the wake-ups in events
+    counting: (unit, counter name) of the operations counted during this tick, they're advanced when ticks are skipped
+    followers: (unit, counter name) of the counters that count along with the scheduled operations, eg. utilization statistics
+    sequence: keep the heap order stable when two events have the same completion tick
+    active: True if any state transition(transfer start, operation completes, calculation) happens during this tick
+    tick: current tick, kept by the simulation loop
+    trace: EventTraceWriter that the events are recorded into, None if event tracing is off
+    """
+
+    __slots__ = ("events", "due", "wakeups", "counting", "followers", "sequence", "active", "tick", "trace")
+
+    def __init__(self, trace=None):
+        self.events = []
+        self.due = {}
+        self.wakeups = set()
+        self.counting = []
+        self.followers = []
+        self.sequence = 0
+        self.active = False
+        self.tick = 0
+        self.trace = trace
+
+    def push(self, tick, unit, counter):
+        heapq.heappush(self.events, (tick, self.sequence, unit, counter))
+        self.sequence += 1
+
+    def schedule(self, remaining, unit, counter):
+        """
+        Schedule the completion event of the operation recorded by unit.counter, it's counted during this tick
+
+        remaining: number of ticks until the operation completes
+        """
+        tick = self.tick + remaining
+        self.counting.append((unit, counter))
+        if self.due.get((unit, counter)) != tick:
+            self.due[(unit, counter)] = tick
+            self.push(tick, unit, counter)
+
+    def complete(self, unit, counter):
+        """ The operation recorded by unit.counter completes during this tick """
+        self.due.pop((unit, counter), None)
+        self.active = True
+
+    def wake(self, remaining):
+        """ Nothing is counted, but a unit can make progress again in remaining ticks, eg. a GB channel can issue again """
+        tick = self.tick + remaining
+        if tick not in self.wakeups:
+            self.wakeups.add(tick)
+            self.push(tick, None, None)
+
+    def follow(self, unit, counter):
+        """ unit.counter increases by one every tick while an operation is counting, it's advanced together when ticks are skipped """
+        self.followers.append((unit, counter))
+
+    def activate(self):
+        """ Mark that state transition happens during this tick, so the next tick can't be skipped """
+        self.active = True
+
+    def record(self, unit, kind, phase, peer=None):
+        """ Record an event(see event_trace) of unit at the current tick """
+        if self.trace is not None:
+            self.trace.write(self.tick, unit, kind, phase, peer)
+
+    def is_deadlock(self):
+        """ Nothing happens or counts during this tick and nothing is waiting for a wake-up, the simulation can never progress """
+        return (self.active == False) and (len(self.counting) == 0) and (len(self.wakeups) == 0)
+
+    def next_tick(self):
+        """ Earliest tick after this one that an operation completes or a wake-up happens at, None if there's none """
+
+        while self.events:
+            (tick, _, unit, counter) = self.events[0]
+            if unit is None:
+                if tick > self.tick:
+                    return tick
+                self.wakeups.discard(tick)
+            elif (tick > self.tick) and (self.due.get((unit, counter)) == tick):
+                return tick
+            heapq.heappop(self.events)
+        return None
+
+    def fast_forward(self, limit):
+        """
+        Called at the end of every tick, skip the idle ticks before the next completion event
+
+        limit: maximum number of ticks that can be skipped, eg. because a debug dump is expected
+        Return the number of skipped ticks, the skipped latency counting is applied to all units counted during this tick
+        """
+
+        skip = 0
+        tick = self.next_tick()
+        if (self.active == False) and (tick is not None):
+            # the completion itself happens in a normal tick
+            skip = min(tick - self.tick - 1, limit)
+            if skip > 0:
+                for (unit, counter) in self.counting:
+                    setattr(unit, counter, getattr(unit, counter) + skip)
+                for (unit, counter) in self.followers:
+                    setattr(unit, counter, getattr(unit, counter) + skip)
+
+        self.counting.clear()
+        self.followers.clear()
+        self.active = False
+
+        return skip
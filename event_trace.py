@@ -0,0 +1,149 @@
+import json
+import struct
+import sys
+
+import utils
+
+"""
+Binary event trace of the simulator
+
+The trace file is a header followed by fixed-size records:
+    MAGIC, u32 length of the metadata, metadata(json: unit names, kind names, time quantum)
+    record: u64 tick, u16 unit, u16 peer unit, u8 kind, u8 phase
+Records are packed into a bounded buffer and written in batches, so tracing a full run costs a few
+bytes per event and memory doesn't grow with the length of the simulation.
+Use to_chrome() or "python event_trace.py trace.bin trace.json" to view the trace in Chrome trace viewer/Perfetto.
+"""
+MAGIC = b"ATTNTRC1"
+RECORD = struct.Struct("<QHHBB")
+NO_PEER = 0xFFFF
+
+""" Phases of an event """
+BEGIN = 0
+END = 1
+INSTANT = 2
+
+"""
+Kinds of events
+
+Transfers have a BEGIN and an END on the unit that performs the transfer, the peer is the unit on the other side.
+The others are INSTANT events.
+"""
+GB_SRAM1 = 0
+GB_SRAM2 = 1
+ARRAY_GB = 2
+ARRAY_SRAM = 3
+GB_SOFTMAX = 4
+SOFTMAX_GB = 5
+SOFTMAX_SRAM1 = 6
+GB_LAYERNORM = 7
+LAYERNORM_SRAM1 = 8
+DOT_BLOCK = 9
+SOFTMAX_ROW = 10
+LAYERNORM_ROW = 11
+CORE_COMPLETE = 12
+
+KINDS = ["GB->SRAM1", "GB->SRAM2", "array->GB", "array->SRAM", "GB->softmax", "softmax->GB", "softmax->SRAM1",
+         "GB->layernorm", "layernorm->SRAM1", "block complete", "softmax row done", "layernorm row done", "core complete"]
+
+
+class EventTraceWriter:
+    """
+    Streaming writer of the binary event trace
+
+    units: (unit, name) of all units that events are recorded for, a unit is identified by the object itself
+    buffer_records: number of records buffered before a batch is written
+    """
+
+    __slots__ = ("file", "unit_ids", "buffer", "buffer_records", "record_cnt", "total_cnt")
+
+    def __init__(self, path, units, time_quantum=1, buffer_records=65536):
+        self.file = open(path, "wb")
+        self.unit_ids = {}
+        for (unit, name) in units:
+            self.unit_ids[unit] = len(self.unit_ids)
+        self.buffer = bytearray(RECORD.size * buffer_records)
+        self.buffer_records = buffer_records
+        self.record_cnt = 0
+        self.total_cnt = 0
+
+        metadata = json.dumps({"units": [name for (_, name) in units], "kinds": KINDS, "time_quantum": time_quantum,
+                               "metatime": utils.METATIME}).encode()
+        self.file.write(MAGIC)
+        self.file.write(struct.pack("<I", len(metadata)))
+        self.file.write(metadata)
+
+    def write(self, tick, unit, kind, phase, peer=None):
+        RECORD.pack_into(self.buffer, self.record_cnt * RECORD.size, tick, self.unit_ids[unit],
+                         NO_PEER if peer is None else self.unit_ids[peer], kind, phase)
+        self.record_cnt += 1
+        if self.record_cnt == self.buffer_records:
+            self.flush()
+
+    def flush(self):
+        self.file.write(memoryview(self.buffer)[:self.record_cnt * RECORD.size])
+        self.total_cnt += self.record_cnt
+        self.record_cnt = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read(path):
+    """ Return (metadata, records), records are (tick, unit, peer, kind, phase) """
+
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(path + " is not an event trace")
+        (length, ) = struct.unpack("<I", f.read(4))
+        metadata = json.loads(f.read(length))
+        data = f.read()
+    if len(data) % RECORD.size != 0:
+        raise ValueError(path + " is truncated")
+
+    return (metadata, list(RECORD.iter_unpack(data)))
+
+
+def to_chrome(path, out_path):
+    """
+    Convert a binary event trace into Chrome trace/Perfetto json
+
+    Every unit is a process and every kind of event is a thread of it, so the transfers on different channels of a
+    global buffer which overlap in time are shown in different tracks.
+    """
+
+    (metadata, records) = read(path)
+    units = metadata["units"]
+    kinds = metadata["kinds"]
+    # chrome trace timestamps are in microseconds
+    us_per_tick = metadata["time_quantum"] * metadata["metatime"] / 1000
+
+    trace_events = []
+    tracks = set()
+    for (tick, unit, peer, kind, phase) in records:
+        event = {"name": kinds[kind], "ph": "BEI"[phase], "ts": tick * us_per_tick, "pid": unit, "tid": kind}
+        if phase == INSTANT:
+            event["s"] = "t"
+        if peer != NO_PEER:
+            event["args"] = {"peer": units[peer]}
+        trace_events.append(event)
+        tracks.add((unit, kind))
+
+    for (unit, name) in enumerate(units):
+        trace_events.append({"name": "process_name", "ph": "M", "pid": unit, "args": {"name": name}})
+        trace_events.append({"name": "process_sort_index", "ph": "M", "pid": unit, "args": {"sort_index": unit}})
+    for (unit, kind) in sorted(tracks):
+        trace_events.append({"name": "thread_name", "ph": "M", "pid": unit, "tid": kind, "args": {"name": kinds[kind]}})
+
+    with open(out_path, "w") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ns"}, f)
+
+    return len(records)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python event_trace.py trace.bin trace.json")
+        sys.exit(1)
+    print("Converted " + str(to_chrome(sys.argv[1], sys.argv[2])) + " events")
@@ -0,0 +1,109 @@
+"""
+Shared global buffer bus
+
+Without the bus every channel of every GB transfers on its own, so the weight streams of Q/K/V, LP, FC1 and FC2 never
+compete. Physically the GBs are one on-chip buffer behind one interconnect, the bus models it: a transfer reserved by a
+channel only starts counting its latency after the bus grants it one of its width slots, and holds the slot until the
+transfer completes. At the end of every tick the free slots are granted to the waiting channels by the arbitration policy:
+    round-robin: the channels after the last granted one first
+    fixed: fixed priority, the channels of the GBs of lower index first(the copies of a GB of the heads/blocks after it)
+    oldest: the channel waiting for the longest time first
+"""
+
+ARBITRATIONS = ["round-robin", "fixed", "oldest"]
+CHANNELS = ["sram1", "sram2", "array", "softmax", "layernorm"]
+
+
+class BusChannel:
+    """
+    A channel of a GB on the shared bus
+
+    index: priority of the channel, the order it's attached to the bus
+    request_tick: tick when the waiting transfer is reserved, None if the channel isn't waiting
+    granted: whether the channel holds a slot of the bus
+    wait_counter: time the transfers of the channel wait for the bus
+    """
+
+    __slots__ = ("bus", "index", "request_tick", "granted", "wait_counter")
+
+    def __init__(self, bus, index):
+        self.bus = bus
+        self.index = index
+        self.request_tick = None
+        self.granted = False
+        self.wait_counter = 0
+
+    def request(self, tick):
+        self.request_tick = tick
+        self.bus.waiting.append(self)
+
+    def release(self):
+        self.granted = False
+        self.bus.free += 1
+
+
+class GBBus:
+    """
+    width: number of transfers the bus carries at the same time, the aggregate bandwidth is width * GB-SRAM-bandwidth
+           per GB access
+    free: number of slots not held by any channel
+    waiting: channels with a reserved transfer which don't hold a slot yet
+    last: index of the last granted channel, for the round-robin arbitration
+    """
+
+    __slots__ = ("width", "arbitration", "free", "channels", "waiting", "last")
+
+    def __init__(self, width, arbitration="round-robin"):
+        if width <= 0:
+            raise ValueError("Width of the GB bus must be positive, got " + str(width))
+        if arbitration not in ARBITRATIONS:
+            raise ValueError("GB bus arbitration must be one of " + str(ARBITRATIONS) + ", got " + arbitration)
+        self.width = width
+        self.arbitration = arbitration
+        self.free = width
+        self.channels = []
+        self.waiting = []
+        self.last = -1
+
+    def dump_configs(self):
+        print("----------------------------------------------")
+        print("| GB bus Configuration")
+        print("|")
+        print("| + width: " + str(self.width) + " transfers")
+        print("| + arbitration: " + self.arbitration)
+        print("| + channels: " + str(len(self.channels)))
+        print("----------------------------------------------")
+
+    def attach(self, global_buffer):
+        """ Put all channels of global_buffer on the bus """
+
+        global_buffer.bus_channels = {}
+        for channel in CHANNELS:
+            global_buffer.bus_channels[channel] = BusChannel(self, len(self.channels))
+            self.channels.append(global_buffer.bus_channels[channel])
+
+    def priority(self, channel):
+        """ Sort key of a waiting channel, the smallest is granted first """
+
+        if self.arbitration == "round-robin":
+            return (channel.index - self.last - 1) % len(self.channels)
+        elif self.arbitration == "fixed":
+            return channel.index
+        else:
+            return (channel.request_tick, channel.index)
+
+    def arbitrate(self, events):
+        """ Called at the end of every tick, grant the free slots to the waiting channels """
+
+        if (self.free == 0) or (len(self.waiting) == 0):
+            return
+        self.waiting.sort(key=self.priority)
+        granted = self.waiting[:self.free]
+        del self.waiting[:self.free]
+        for channel in granted:
+            channel.granted = True
+            channel.request_tick = None
+            self.last = channel.index
+        self.free -= len(granted)
+        # the granted transfers start counting in the next tick
+        events.activate()
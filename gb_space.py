@@ -0,0 +1,84 @@
+from collections import deque
+
+"""
+Finite global buffer capacity
+
+Every GB of the 8-core template(except GB8, whose FC2 result is the output of the block) has capacity BYTE, shared by
+its copies of all heads and blocks since they are the same hardware. The weight matrices of the running blocks(or their
+DRAM prefetch buffers, see dram) are reserved when a block starts and released when it completes, a block only starts
+when its weights fit besides what the GB already holds. The results written
+into GB(A, A', X, LP and FC1 results) are allocated when the transfer into GB starts and freed when they're transferred
+out, in the order they're written. When the results don't fit, the spill policy decides:
+    stall: the transfer into GB waits until enough data is transferred out, the simulation deadlocks if the space left by
+           the weights can't hold the data a reader(eg. a row of layernorm bandwidth blocks) waits for
+    spill: the data that doesn't fit is written off chip, and read back from off chip when it's transferred out
+"""
+
+SPILL_POLICIES = ["stall", "spill"]
+
+
+class GBSpace:
+    """
+    Occupancy of a GB
+
+    units: BYTE of a data of every kind of transfer, "array": a row of an array block, "block": a mac_lane * mac_lane
+           block(softmax/layernorm), "sram1": a data of core SRAM1
+    reserved: BYTE of the weight matrices of the running blocks
+    segments: deque of [BYTE, on chip] of the results in the order they're written
+    onchip: BYTE of the results on chip
+    peak: maximum of reserved + onchip
+    spill_bytes: BYTE of the results written off chip
+    stall_counter: time the transfers into GB wait for space, stall policy only
+    """
+
+    __slots__ = ("capacity", "policy", "units", "reserved", "segments", "onchip", "peak", "spill_bytes", "stall_counter")
+
+    def __init__(self, capacity, policy, mac_lane, mac_num):
+        if policy not in SPILL_POLICIES:
+            raise ValueError("GB spill policy must be one of " + str(SPILL_POLICIES) + ", got " + policy)
+        self.capacity = capacity
+        self.policy = policy
+        self.units = {"array": mac_lane, "block": mac_lane * mac_lane, "sram1": mac_lane * mac_num}
+        self.reserved = 0
+        self.segments = deque()
+        self.onchip = 0
+        self.peak = 0
+        self.spill_bytes = 0
+        self.stall_counter = 0
+
+    def reserve(self, size):
+        self.reserved += size
+        self.peak = max(self.peak, self.reserved + self.onchip)
+
+    def release(self, size):
+        self.reserved -= size
+
+    def fits(self, size):
+        return self.reserved + self.onchip + size <= self.capacity
+
+    def write(self, size):
+        """ Allocate size BYTE of results, the part that doesn't fit is spilled with the spill policy """
+
+        fit = size
+        if self.policy == "spill":
+            fit = min(max(self.capacity - self.reserved - self.onchip, 0), size)
+        if fit > 0:
+            self.segments.append([fit, True])
+            self.onchip += fit
+        if size > fit:
+            self.segments.append([size - fit, False])
+            self.spill_bytes += size - fit
+        self.peak = max(self.peak, self.reserved + self.onchip)
+
+    def read(self, size):
+        """ Free size BYTE of the earliest results """
+
+        while (size > 0) and self.segments:
+            segment = self.segments[0]
+            cnt = min(size, segment[0])
+            segment[0] -= cnt
+            size -= cnt
+            if segment[1]:
+                self.onchip -= cnt
+            if segment[0] == 0:
+                self.segments.popleft()
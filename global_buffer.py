@@ -1,7 +1,11 @@
 from base_unit import BaseUnit
+from state_matrix import new_state_matrix
+from statistics import Statistics
+import tracing
 import utils
 
-import numpy as np
+from collections import deque
+import math
 
 """ 
 TODO
@@ -9,14 +13,31 @@ TODO
 2. combine the 2 SRAM2 case: whether weight matrix can be hold in SRAM2 at once
 """
 
+class GBRequest(BaseUnit):
+    """
+    A transfer in flight on a pipelined GB channel, see GlobalBuffer.issue()
+
+    target: indices of the data transferred, as returned by the find function of the channel
+    dram_mark: BYTE the weight stream must have fetched from DRAM when the transfer can count, see dram_ready()
+    """
+
+    __slots__ = ("target", "dram_mark")
+
+    def __init__(self, target, time_quantum=1, dram_mark=None):
+        super(GBRequest, self).__init__(0, time_quantum)
+
+        self.target = target
+        self.dram_mark = dram_mark
+
+
 class GlobalBuffer(BaseUnit):
     """ 
     Global buffer of a cluster
 
     Suppose it can support the data transfer of all sub-SRAMs in one access
 
-    sram1_busy: if the GB is transferring data from core sram1 now
-    sram2_busy: if the GB is transferring data from core sram2 now
+    sram1_busy: if the GB is transferring data from core sram1 now(any request of the channel is in flight)
+    sram2_busy: if the GB is transferring data from core sram2 now(any request of the channel is in flight)
     array_busy: if the GB is transferring data from core array now
     softmax_busy: if the GB is transferring data to softmax unit now
     layernorm_busy: if the GB is transferring data to layernorm unit now
@@ -38,6 +59,7 @@ class GlobalBuffer(BaseUnit):
     blocknum_row_cnt: number of mac_lane rows need to be replaced
     array_data_cnt: number of mac_lane data need to be replaced
     blocknum_counter_from_last_core: record how many blocks from last core has been written into GB
+    head_counters: blocknum_counter_from_last_core of every head when all heads write into this GB(multi-head LP), None for one head
 
     sram1_complete1: indicates whether data update of SRAM1 is complete(True when the last data starts transferring)
     sram1_complete2: indicates whether data update of SRAM1 is complete(True when the last data finishes transferring)
@@ -46,7 +68,6 @@ class GlobalBuffer(BaseUnit):
     array_complete1: indicates whether the calculated data is all transferred into gb(True when the last data starts transferring)
     array_complete2: indicates whether the calculated data is all transferred into gb(True when the last data finishes transferring)
 
-    sram2_latency_counter: latency counter for sram2, width equal to chosen bandwidth
     array_latency_counter: latency counter for the data transfer of array
     softmax_latency_counter: latency counter for the data transfer between GB and Softmax
     layernorm_latency_counter: latency counter for the data transfer between GB and Layernorm
@@ -56,10 +77,41 @@ class GlobalBuffer(BaseUnit):
     gb_sram_bandwidth: number of mac_lane*mac_num BYTE of data that can be transferred from GB to core SRAM during one access time               
     softmax_bandwidth: number of mac_lane*mac_lane blocks can be transferred from GB to Softmax Unit at a time
     layermorm_bandwidth: number of mac_lane*mac_lane blocks can be transferred from GB to Layernorm Unit at a time
+
+    a_state_matrix: state of A/X in GB, only created when the mapping asks for it
+    packed_state: whether the states are packed into STATE_BITS bits
+    bus_channels: channel name -> gb_bus.BusChannel when the GBs share a bus, None for a private channel per transfer
+    dram_stream: dram.WeightStream of the weight matrix the GB fetches from DRAM, None if the weight matrix is resident
+    space: gb_space.GBSpace shared by the copies of the GB when GB capacity is finite, None for unlimited GB space
+    space_pending: channels whose reserved transfer into GB has its space allocated
+
+    outstanding: number of transfers the "sram1"/"sram2" channel keeps in flight, each lasts latency_count, 1 for a
+                 channel that is blocked until its transfer completes
+    issue_interval: minimum number of ticks between two transfers issued by a channel
+    requests: channel name -> deque of GBRequest in flight, in the order they're issued
+    issue_ticks: channel name -> tick the last transfer is issued, None before any
+    sram2_wait: (state matrix, index, cursor, result, resume) of the last failed search for SRAM2 data, which stops at the same
+                entry until the core releases it and then resumes there, see find_sram_target
     """
 
-    def __init__(self, latency_count, gb_sram_bandwidth, softmax_bandwidth=0, layernorm_bandwidth=0):
-        super(GlobalBuffer, self).__init__(latency_count)
+    __slots__ = ("sram1_busy", "sram2_busy", "array_busy", "softmax_busy", "layernorm_busy", "row", "col", "colnum2",
+                 "colnum2_sram", "rownum2", "rownum1", "array_idx_rm", "a_row", "layernorm_row", "softmax_start", "softmax_end",
+                 "layernorm_start", "layernorm_end", "blocknum_row_cnt", "array_data_cnt", "blocknum_counter_from_last_core", "head_counters",
+                 "sram1_complete1", "sram1_complete2", "sram2_complete1", "sram2_complete2", "array_complete1",
+                 "array_complete2", "array_latency_counter", "softmax_latency_counter",
+                 "layernorm_latency_counter", "array_data_counter", "gb_sram_bandwidth", "softmax_bandwidth",
+                 "layernorm_bandwidth", "a_state_matrix", "packed_state", "sram_subsum_cnt", "sram1_rownum_cnt",
+                 "sram2_colnum_cnt", "sram2_sram_colnum_cnt", "statistics", "bus_channels", "dram_stream",
+                 "space", "space_pending", "outstanding", "issue_interval", "requests", "issue_ticks", "sram2_wait")
+
+    def __init__(self, latency_count, gb_sram_bandwidth, softmax_bandwidth=0, layernorm_bandwidth=0, time_quantum=1, packed_state=False,
+                 outstanding=1, issue_interval=0):
+        super(GlobalBuffer, self).__init__(latency_count, time_quantum)
+
+        if outstanding < 1:
+            raise ValueError("GB outstanding transfers must be at least 1, got " + str(outstanding))
+        if issue_interval < 0:
+            raise ValueError("GB issue interval can't be negative, got " + str(issue_interval))
 
         self.sram1_busy = False
         self.sram2_busy = False
@@ -84,6 +136,7 @@ class GlobalBuffer(BaseUnit):
         self.blocknum_row_cnt = 0
         self.array_data_cnt = 0
         self.blocknum_counter_from_last_core = 0
+        self.head_counters = None
         
         self.sram1_complete1 = False
         self.sram1_complete2 = False
@@ -92,7 +145,6 @@ class GlobalBuffer(BaseUnit):
         self.array_complete1 = False
         self.array_complete2 = False
 
-        self.sram2_latency_counter = 0
         self.array_latency_counter = 0
         self.softmax_latency_counter = 0
         self.layernorm_latency_counter = 0
@@ -103,15 +155,35 @@ class GlobalBuffer(BaseUnit):
         self.softmax_bandwidth = softmax_bandwidth
         self.layernorm_bandwidth = layernorm_bandwidth
 
+        self.a_state_matrix = None
+        self.packed_state = packed_state
+
+        self.statistics = Statistics()
+        self.bus_channels = None
+        self.dram_stream = None
+        self.space = None
+        self.space_pending = set()
+
+        self.outstanding = outstanding
+        self.issue_interval = math.ceil(issue_interval / time_quantum)
+        self.requests = {"sram1": deque(), "sram2": deque()}
+        self.issue_ticks = {"sram1": None, "sram2": None}
+        self.sram2_wait = None
+
         
     def dump_configs(self):
         print("----------------------------------------------")
         print("| Global Buffer Configuration")
-        print("| + access latency: " + str(self.latency_count * utils.METATIME) + "ns")
+        print("| + access latency: " + str(self.latency_ns()) + "ns")
         print("| + softmax bandwidth: " + str(self.softmax_bandwidth))
         print("| + SRAM bandwidth: " + str(self.gb_sram_bandwidth))
+        if self.outstanding > 1:
+            print("| + outstanding transfers: " + str(self.outstanding) + ", issued every " + str(utils.metatime_to_ns(max(self.issue_interval, 1) * self.time_quantum)) + "ns at most")
         print("----------------------------------------------")
     
+    def state_bytes(self):
+        return 0 if self.a_state_matrix is None else self.a_state_matrix.nbytes
+
     def dump_mappings(self, id):
         print("----------------------------------------------")
         print("| " + id + " Global buffer Mappings")
@@ -160,11 +232,105 @@ class GlobalBuffer(BaseUnit):
         self.sram1_rownum_cnt = sram1_rownum_cnt
         self.sram2_colnum_cnt = sram2_colnum_cnt
         self.sram2_sram_colnum_cnt = sram2_sram_colnum_cnt
-        
+        self.sram2_wait = None
+
 
         if flag:
-            self.a_state_matrix = np.zeros((self.blocknum_row_cnt, int(self.array_data_cnt // self.blocknum_row_cnt)), dtype=int)
-            print("A state matrix size: [" + str(self.a_state_matrix.shape[0]) + ", " + str(self.a_state_matrix.shape[1]) + "]")
+            self.a_state_matrix = new_state_matrix((self.blocknum_row_cnt, int(self.array_data_cnt // self.blocknum_row_cnt)), utils.NULL, self.packed_state)
+            tracing.log(tracing.INFO, "A state matrix size: [%d, %d]", self.a_state_matrix.shape[0], self.a_state_matrix.shape[1])
+
+    def bus_request(self, events, channel):
+        """ A transfer of channel is reserved, it waits for a slot of the shared bus, see gb_bus """
+        if self.bus_channels is not None:
+            self.bus_channels[channel].request(events.tick)
+
+    def bus_granted(self, events, channel):
+        """ Whether the reserved transfer of channel can count its latency, always True without the shared bus """
+        if self.bus_channels is None:
+            return True
+        if self.bus_channels[channel].granted:
+            return True
+        if self.bus_channels[channel].request_tick is None:
+            # the transfer waits for something else when it's reserved, see dram_ready()
+            self.bus_channels[channel].request(events.tick)
+        self.bus_channels[channel].wait_counter += 1
+        events.follow(self.bus_channels[channel], "wait_counter")
+        return False
+
+    def bus_release(self, channel):
+        """ The transfer of channel completes """
+        if self.bus_channels is not None:
+            self.bus_channels[channel].release()
+
+    def dram_request(self, data):
+        """ A transfer of data into core SRAM2 is reserved, see dram """
+        if self.dram_stream is not None:
+            self.dram_stream.requested += data * self.dram_stream.data_size
+
+    def dram_ready(self, events=None, request=None):
+        """
+        Whether the reserved transfer into core SRAM2(request of a pipelined channel) has all its data fetched from DRAM,
+        the stall is counted with events
+        """
+        if (self.dram_stream is None) or self.dram_stream.ready(None if request is None else request.dram_mark):
+            return True
+        if events is not None:
+            self.dram_stream.stall_counter += 1
+            events.follow(self.dram_stream, "stall_counter")
+        return False
+
+    def dram_release(self, data):
+        """ The transfer of data into core SRAM2 completes, its data is evicted """
+        if self.dram_stream is not None:
+            self.dram_stream.released += data * self.dram_stream.data_size
+
+    def can_issue(self, events, channel):
+        """ Whether channel can issue a new transfer during this tick, see outstanding """
+
+        if len(self.requests[channel]) >= self.outstanding:
+            return False
+        if (self.issue_ticks[channel] is not None) and ((events.tick - self.issue_ticks[channel]) < self.issue_interval):
+            # the ticks before the channel can issue again may be skipped, but not that tick
+            events.wake(self.issue_ticks[channel] + self.issue_interval - events.tick)
+            return False
+        return True
+
+    def issue(self, events, channel, target):
+        """ Put a transfer of target into the queue of channel, it starts counting in the next tick """
+
+        # a transfer into core SRAM2 waits for the weight data requested up to it
+        dram_mark = self.dram_stream.requested if (self.dram_stream is not None) and (channel == "sram2") else None
+        request = GBRequest(target, self.time_quantum, dram_mark)
+        self.requests[channel].append(request)
+        self.issue_ticks[channel] = events.tick
+        return request
+
+    def space_write(self, events, channel, cnt, unit):
+        """
+        Whether the reserved transfer of channel writing cnt data of unit into GB has its space, see gb_space, it's only
+        allocated once, the stall is counted with events
+        """
+        if (self.space is None) or (channel in self.space_pending):
+            return True
+        size = cnt * self.space.units[unit]
+        if (self.space.policy == "spill") or self.space.fits(size):
+            self.space.write(size)
+            self.space_pending.add(channel)
+            return True
+        if events is not None:
+            self.space.stall_counter += 1
+            events.follow(self.space, "stall_counter")
+        return False
+
+    def space_written(self, channel):
+        """ The transfer of channel into GB completes """
+        if self.space is not None:
+            self.space_pending.discard(channel)
+
+    def space_read(self, cnt, unit):
+        """ A transfer of cnt data of unit out of GB completes, its space is freed """
+        if self.space is not None:
+            self.space.read(cnt * self.space.units[unit])
 
     def update_to_a2(self, row, col):
         self.a_state_matrix[row][col] = utils.A
@@ -172,15 +338,13 @@ class GlobalBuffer(BaseUnit):
     def update_to_cal(self, start, end, mode):
         row_idx = self.layernorm_row if mode == "ln" else self.a_row
 
-        for i in range(start, end + 1):
-            self.a_state_matrix[row_idx][i] = utils.A_CAL
+        self.a_state_matrix[row_idx, start:end + 1] = utils.A_CAL
 
         if (mode == "ln") and (end == (self.a_state_matrix.shape[1] - 1)):
             self.layernorm_row += 1
 
     def update_to_asoftmax(self, start, end):
-        for i in range(start, end + 1):
-            self.a_state_matrix[self.a_row][i] = utils.A_SOFTMAX
+        self.a_state_matrix[self.a_row, start:end + 1] = utils.A_SOFTMAX
         if end == (self.a_state_matrix.shape[1] - 1):
             self.a_row += 1
     
@@ -192,10 +356,24 @@ class GlobalBuffer(BaseUnit):
 
         if (block_counter_rm % blocknum_col_std) == 0:
             # a whole row finishes calculation
-            self.blocknum_counter_from_last_core = (block_counter_rm // blocknum_col_std) * self.sram_subsum_cnt * 2
+            counter = (block_counter_rm // blocknum_col_std) * self.sram_subsum_cnt * 2
         else:
-            self.blocknum_counter_from_last_core = (block_counter_rm // blocknum_col_std) * self.sram_subsum_cnt * 2 + block_counter_rm - \
-                                                        (block_counter_rm // blocknum_col_std) * blocknum_col_std
+            counter = (block_counter_rm // blocknum_col_std) * self.sram_subsum_cnt * 2 + block_counter_rm - \
+                        (block_counter_rm // blocknum_col_std) * blocknum_col_std
+
+        if self.head_counters is None:
+            self.blocknum_counter_from_last_core = counter
+        else:
+            self.update_head_counter(0, counter)
+
+    def update_head_counter(self, head, counter):
+        """ 
+        Multi-head LP: a block of LP's input is ready only when every head has written its part,
+        so the blocks received is the minimum among the heads
+        """
+
+        self.head_counters[head] = counter
+        self.blocknum_counter_from_last_core = min(self.head_counters)
 
     def rowcol_advance1(self):
         """ For SRAM1 """
@@ -269,7 +447,12 @@ class GlobalBuffer(BaseUnit):
                 self.array_complete1 = True
 
     def find_sram_target(self, sram_state_matrix, mac_lane, sram):
-        """ Find the target data in sram1 that will be transferred """
+        """ 
+        Find the target data in sram1 that will be transferred 
+
+        sram_state_matrix: the SRAM1 unit itself for sram = 1, whose removable_cnt() checks the band in one go
+                           state matrix of SRAM2 for sram = 2
+        """
 
         # the returning flattened idx
         idx_start = 0
@@ -304,9 +487,12 @@ class GlobalBuffer(BaseUnit):
             rownum1_raw = self.rownum1
             sram1_complete1_raw = self.sram1_complete1
 
+            # the band never wraps around the end of SRAM1, so the data checked are consecutive from the current one
+            removable_cnt = sram_state_matrix.removable_cnt(self.row[0] * self.sram_subsum_cnt + self.col[0], self.gb_sram_bandwidth)
+
             # find the band of data
             for i in range(self.gb_sram_bandwidth):
-                if sram_state_matrix[self.row[0] * self.sram_subsum_cnt + self.col[0]] == utils.REMOVE:
+                if i < removable_cnt:
                     # hit = True
                     if i == (self.gb_sram_bandwidth - 1):
                         # last data still satisfies, which means we successfully find a removable band of data
@@ -359,6 +545,16 @@ class GlobalBuffer(BaseUnit):
             rownum2_raw = self.rownum2
             sram2_complete1_raw = self.sram2_complete1
 
+            # only the core releases the data of SRAM2(REMOVE) and only this search takes it, so searching again from the
+            # same place fails at the same entry until it's released, and then goes on from that entry
+            start = 0
+            cursor = (row_raw, col_raw, colnum2_sram_raw, colnum2_raw, rownum2_raw, sram2_complete1_raw)
+            if (self.sram2_wait is not None) and (self.sram2_wait[0] is sram_state_matrix) and (self.sram2_wait[2] == cursor):
+                if sram_state_matrix[self.sram2_wait[1]] != utils.REMOVE:
+                    return self.sram2_wait[3]
+                (start, self.row[1], self.col[1], self.colnum2_sram, self.colnum2, self.rownum2, self.sram2_complete1) = self.sram2_wait[4]
+            self.sram2_wait = None
+
             if self.sram2_colnum_cnt <= self.sram2_sram_colnum_cnt:
                 sram2_colnum_cnt_tmp = self.sram2_colnum_cnt
                 flag = True
@@ -366,8 +562,9 @@ class GlobalBuffer(BaseUnit):
                 sram2_colnum_cnt_tmp = self.sram2_sram_colnum_cnt
 
             # find the band of data
-            for i in range(self.gb_sram_bandwidth * mac_lane):
-                if sram_state_matrix[self.row[1] * sram2_colnum_cnt_tmp + self.col[1]] == utils.REMOVE:
+            for i in range(start, self.gb_sram_bandwidth * mac_lane):
+                idx = self.row[1] * sram2_colnum_cnt_tmp + self.col[1]
+                if sram_state_matrix[idx] == utils.REMOVE:
                     # hit = True
                     if i == (self.gb_sram_bandwidth * mac_lane - 1):
                         # last data still satisfies, which means we successfully find a removable band of data
@@ -397,7 +594,9 @@ class GlobalBuffer(BaseUnit):
                 else:
                     break
 
+            result = (row_raw, row_end, colnum2_raw if flag else colnum2_sram_raw, colnum2_sram_end)
             if self.sram2_busy == False:
+                resume = (i, self.row[1], self.col[1], self.colnum2_sram, self.colnum2, self.rownum2, self.sram2_complete1)
                 # if we cannot successfully found a removable band of data, we should restore the state
                 self.row[1] = row_raw
                 self.col[1] = col_raw
@@ -405,10 +604,9 @@ class GlobalBuffer(BaseUnit):
                 self.colnum2 = colnum2_raw
                 self.rownum2 = rownum2_raw
                 self.sram2_complete1 = sram2_complete1_raw
-            else:
-               pass
+                self.sram2_wait = (sram_state_matrix, idx, cursor, result, resume)
 
-            return (row_raw, row_end, colnum2_raw if flag else colnum2_sram_raw, colnum2_sram_end)
+            return result
         else:
             assert(0)
 
@@ -607,8 +805,7 @@ class GlobalBuffer(BaseUnit):
         if self.a_row < self.blocknum_row_cnt:
             if self.softmax_end < (self.a_state_matrix.shape[1] - 1):
                 if (self.a_state_matrix[self.a_row][self.softmax_end] == utils.A):
-                    for i in range(self.softmax_start, self.softmax_end + 1):
-                        self.a_state_matrix[self.a_row][i] = utils.REMOVING
+                    self.a_state_matrix[self.a_row, self.softmax_start:self.softmax_end + 1] = utils.REMOVING
                     start = self.softmax_start
                     end = self.softmax_end
                     self.softmax_start = self.softmax_end + 1
@@ -616,8 +813,7 @@ class GlobalBuffer(BaseUnit):
                     self.softmax_busy = True
             else:
                 if (self.a_state_matrix[self.a_row][-1] == utils.A):
-                    for i in range(self.softmax_start, self.a_state_matrix.shape[1]):
-                        self.a_state_matrix[self.a_row][i] = utils.REMOVING
+                    self.a_state_matrix[self.a_row, self.softmax_start:] = utils.REMOVING
                     start = self.softmax_start
                     end = self.a_state_matrix.shape[1] - 1
                     self.softmax_start = 0
@@ -634,8 +830,7 @@ class GlobalBuffer(BaseUnit):
         if self.layernorm_row < self.blocknum_row_cnt:
             if self.layernorm_end < (self.a_state_matrix.shape[1] - 1):
                 if (self.a_state_matrix[self.layernorm_row][self.layernorm_end] == utils.A):
-                    for i in range(self.layernorm_start, self.layernorm_end + 1):
-                        self.a_state_matrix[self.layernorm_row][i] = utils.REMOVING
+                    self.a_state_matrix[self.layernorm_row, self.layernorm_start:self.layernorm_end + 1] = utils.REMOVING
                     start = self.layernorm_start
                     end = self.layernorm_end
                     self.layernorm_start = self.layernorm_end + 1
@@ -643,8 +838,7 @@ class GlobalBuffer(BaseUnit):
                     self.layernorm_busy = True
             else:
                 if (self.a_state_matrix[self.layernorm_row][-1] == utils.A):
-                    for i in range(self.layernorm_start, self.a_state_matrix.shape[1]):
-                        self.a_state_matrix[self.layernorm_row][i] = utils.REMOVING
+                    self.a_state_matrix[self.layernorm_row, self.layernorm_start:] = utils.REMOVING
                     start = self.layernorm_start
                     end = self.a_state_matrix.shape[1] - 1
                     self.layernorm_start = 0
@@ -658,15 +852,13 @@ class GlobalBuffer(BaseUnit):
         start = 0
         end = 0
         if self.softmax_end < (self.a_state_matrix.shape[1] - 1):
-            for i in range(self.softmax_start, self.softmax_end + 1):
-                self.a_state_matrix[self.a_row][i] = utils.REMOVING
+            self.a_state_matrix[self.a_row, self.softmax_start:self.softmax_end + 1] = utils.REMOVING
             start = self.softmax_start
             end = self.softmax_end
             self.softmax_start = self.softmax_end + 1
             self.softmax_end = self.softmax_start + self.softmax_bandwidth - 1
         else:
-            for i in range(self.softmax_start, self.a_state_matrix.shape[1]):
-                self.a_state_matrix[self.a_row][i] = utils.REMOVING
+            self.a_state_matrix[self.a_row, self.softmax_start:] = utils.REMOVING
             start = self.softmax_start
             end = self.a_state_matrix.shape[1] - 1
             self.softmax_start = 0
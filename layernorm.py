@@ -1,8 +1,8 @@
 from base_unit import BaseUnit
+from state_matrix import new_state_matrix, count_states, set_states
+from statistics import Statistics
 import utils
 
-import numpy as np
-
 class LayerNorm(BaseUnit):
     """ 
     Layer Normalization Unit
@@ -16,12 +16,18 @@ class LayerNorm(BaseUnit):
     removing_to_core_busy: True if a row of data not complete transferring to next core's SRAM
     row_idx: record which row of X is now processing, only when all data transferred into next core SRAM will this variable increment
     sram_latency_counter: counter to count the latency of transferring data from LN to next core's SRAM
+    state_cnt: number of data in every state of state_matrix, indexed by state
+    packed_state: whether the states are packed into STATE_BITS bits
     """
 
-    def __init__(self, latency_count, blocknum_col, to_sram_bandwidth):
-        super(LayerNorm, self).__init__(latency_count)
+    __slots__ = ("state_matrix", "state_cnt", "blocknum_col", "to_sram_bandwidth", "remove_start", "remove_end", "busy",
+                 "partial_removing_to_core_busy", "removing_to_core_busy", "row_idx", "sram_latency_counter", "statistics")
+
+    def __init__(self, latency_count, blocknum_col, to_sram_bandwidth, time_quantum=1, packed_state=False):
+        super(LayerNorm, self).__init__(latency_count, time_quantum)
 
-        self.state_matrix = np.zeros(blocknum_col, dtype=int)
+        self.state_matrix = new_state_matrix(blocknum_col, utils.NULL, packed_state)
+        self.state_cnt = count_states(self.state_matrix)
 
         self.blocknum_col = blocknum_col
         self.to_sram_bandwidth = to_sram_bandwidth
@@ -36,13 +42,18 @@ class LayerNorm(BaseUnit):
 
         self.sram_latency_counter = 0
 
+        self.statistics = Statistics()
+
     def dump_configs(self):
         print("----------------------------------------------")
         print("| Layer Norm Configuration")
-        print("| + access latency: " + str(self.latency_count * utils.METATIME) + "ns")
+        print("| + access latency: " + str(self.latency_ns()) + "ns")
         print("| + buffer size: " + str(self.blocknum_col))
         print("----------------------------------------------")
 
+    def state_bytes(self):
+        return self.state_matrix.nbytes
+
     def dump_cal_status(self):
         print("---------------------------")
         print(" Layer Norm calculation status: ")
@@ -53,16 +64,13 @@ class LayerNorm(BaseUnit):
         print("---------------------------")
 
     def update_to_ready(self, start, end):
-        for i in range(start, end + 1):
-            self.state_matrix[i] = utils.A
+        set_states(self.state_matrix, self.state_cnt, start, end + 1, utils.A)
 
     def update_to_xlayernorm(self):
-        for i in range(self.state_matrix.shape[0]):
-            self.state_matrix[i] = utils.A_SOFTMAX
+        set_states(self.state_matrix, self.state_cnt, 0, None, utils.A_SOFTMAX)
 
     def update_to_null(self, start, end):
-        for i in range(start, end + 1):
-            self.state_matrix[i] = utils.NULL
+        set_states(self.state_matrix, self.state_cnt, start, end + 1, utils.NULL)
 
         if (end + 1) == self.state_matrix.shape[0]:
             # if this is the last portion of data of a row
@@ -75,22 +83,12 @@ class LayerNorm(BaseUnit):
     def calculation(self):
         """ Return whether the whole row of data is ready for calculation """
 
-        res = True
-        for i in range(self.blocknum_col):
-            if (self.state_matrix[i] != utils.A):
-                res = False
-                break
-        return res
+        return (self.state_cnt[utils.A] == self.blocknum_col)
 
     def ln_complete(self):
         """ Return whether LN operation is complete and could be transferred to next core's SRAM """
 
-        res = True
-        for i in range(self.blocknum_col):
-            if (self.state_matrix[i] != utils.A_SOFTMAX):
-                res = False
-                break
-        return res
+        return (self.state_cnt[utils.A_SOFTMAX] == self.blocknum_col)
 
     def find_removing_target(self):
         """ Find layernorm result target and transfer it to next core's SRAM """
@@ -98,15 +96,13 @@ class LayerNorm(BaseUnit):
         start = 0
         end = 0
         if self.remove_end < (self.blocknum_col - 1):
-            for i in range(self.remove_start, self.remove_end + 1): 
-                self.state_matrix[i] = utils.REMOVING
+            set_states(self.state_matrix, self.state_cnt, self.remove_start, self.remove_end + 1, utils.REMOVING)
             start = self.remove_start
             end = self.remove_end
             self.remove_start = self.remove_end + 1
             self.remove_end = self.remove_start + self.to_sram_bandwidth - 1
         else:
-            for i in range(self.remove_start, self.state_matrix.shape[0]):
-                self.state_matrix[i] = utils.REMOVING
+            set_states(self.state_matrix, self.state_cnt, self.remove_start, None, utils.REMOVING)
             start = self.remove_start
             end = self.state_matrix.shape[0] - 1
             self.remove_start = 0
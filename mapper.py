@@ -0,0 +1,166 @@
+"""
+Mapping of the matrix operations of an encoder block onto the cores
+
+The simulator has two templates:
+    1 core: Q, K, V, Q*K and A'*V of a head run on core 0 one after another, the core is reconfigured between them,
+            its stages don't complete yet, so it isn't mapped
+    8 cores: an attention pipeline(Q, K, V, Q*K, A'*V of a head on cores 0-4) followed by LP, FC1 and FC2 on cores 5-7
+With 5-7 cores, LP, FC1 and FC2 are folded onto the cores of the attention pipeline(see FOLDS), an operation only
+starts on its core when the operations folded before it complete. 2-4 cores can't hold the attention pipeline.
+With more than 8 cores, every 5 extra cores hold another attention pipeline in the multi-head mode, the heads are
+distributed over the pipelines and the heads of a pipeline run one after another. The rest of the extra cores are
+paired to split the feed-forward layer: every pair computes FC1 with a slice of the columns of W_FC1 and FC2 with the
+matching rows of W_FC2, the partial FC2 results of the slices are summed in GB8. So the latency of different core
+numbers can be compared, the cores which can't hold a pipeline or a slice are idle.
+"""
+
+ATTENTION_OPERATIONS = ["Q", "K", "V", "Q*K", "A'*V"]
+BLOCK_OPERATIONS = ["LP", "FC1", "FC2"]
+# operations of the cores of the 8-core template
+OPERATIONS = ATTENTION_OPERATIONS + BLOCK_OPERATIONS
+FFN_OPERATIONS = ["FC1", "FC2"]
+
+# cores of an attention pipeline and of a feed-forward slice
+PIPELINE_CORE_NUM = len(ATTENTION_OPERATIONS)
+SLICE_CORE_NUM = len(FFN_OPERATIONS)
+
+""" 
+Operations of each core when the 8-core template is folded onto 5-7 cores, in the order they run on the core
+
+Q, K and V run in lockstep and their results stream into Q*K and A'*V, so these 5 operations need a core each from the
+start. LP, FC1 and FC2 are folded after them, they wait for the result of A'*V anyway. FC2 can't be folded after FC1,
+its operand couldn't leave the array of FC1 while FC2 waits for the core.
+"""
+FOLDS = {5: [["Q", "LP"], ["K", "FC1"], ["V", "FC2"], ["Q*K"], ["A'*V"]],
+         6: [["Q", "LP"], ["K", "FC1"], ["V"], ["Q*K"], ["A'*V"], ["FC2"]],
+         7: [["Q", "LP"], ["K"], ["V"], ["Q*K"], ["A'*V"], ["FC1"], ["FC2"]]}
+
+
+def operation_macs(seq_length, embedding_dim, head_num):
+    """ Number of MACs of every operation, the attention operations are of a single head """
+
+    head_embedding_dim = embedding_dim // head_num
+    return {"Q": seq_length * embedding_dim * head_embedding_dim,
+            "K": seq_length * embedding_dim * head_embedding_dim,
+            "V": seq_length * embedding_dim * head_embedding_dim,
+            "Q*K": seq_length * head_embedding_dim * seq_length,
+            "A'*V": seq_length * seq_length * head_embedding_dim,
+            "LP": seq_length * embedding_dim * embedding_dim,
+            "FC1": seq_length * embedding_dim * 4 * embedding_dim,
+            "FC2": seq_length * 4 * embedding_dim * embedding_dim}
+
+
+class CoreMapping:
+    """
+    Assignment of the operations to the cores
+
+    template_core_num: 1 or 8, the template of the simulator the mapping is built on
+    pipeline_num: number of attention pipelines
+    heads: heads of each pipeline, in the order they run
+    ffn_split: number of feed-forward slices, FC1/FC2 of the template is slice 0
+    template_cores: core of each core of the template, the template cores folded onto a core share it
+    operations: (operation, head) of each core in the order they run, head is None for LP/FC1/FC2
+    """
+
+    __slots__ = ("core_num", "template_core_num", "pipeline_num", "heads", "ffn_split", "template_cores", "operations")
+
+    def __init__(self, core_num, template_core_num, pipeline_num, heads, ffn_split, template_cores, operations):
+        self.core_num = core_num
+        self.template_core_num = template_core_num
+        self.pipeline_num = pipeline_num
+        self.heads = heads
+        self.ffn_split = ffn_split
+        self.template_cores = template_cores
+        self.operations = operations
+
+    def pipeline_cores(self, pipeline):
+        """ Cores of Q, K, V, Q*K, A'*V of the pipeline, pipeline 0 is on cores 0-4 of the template """
+
+        if pipeline == 0:
+            return self.template_cores[0:PIPELINE_CORE_NUM]
+        start = self.template_core_num + (pipeline - 1) * PIPELINE_CORE_NUM
+        return list(range(start, start + PIPELINE_CORE_NUM))
+
+    def slice_cores(self, ffn):
+        """ Cores of FC1, FC2 of the feed-forward slice, slice 0 is on cores 6-7 of the template """
+
+        if ffn == 0:
+            return self.template_cores[PIPELINE_CORE_NUM + 1:]
+        start = self.template_core_num + (self.pipeline_num - 1) * PIPELINE_CORE_NUM + (ffn - 1) * SLICE_CORE_NUM
+        return list(range(start, start + SLICE_CORE_NUM))
+
+    def folds(self):
+        """ Template cores on the same core as each template core in the order they run, None if no core is folded """
+
+        if len(set(self.template_cores)) == len(self.template_cores):
+            return None
+        return [[j for (j, other) in enumerate(self.template_cores) if other == core] for core in self.template_cores]
+
+    def idle_cores(self):
+        return [core for core in range(self.core_num) if len(self.operations[core]) == 0]
+
+    def dump_mapping(self, macs):
+        """ macs: see operation_macs() """
+
+        print("----------------------------------------------")
+        print("| Core Mapping")
+        print("|")
+        print("| + attention pipelines: " + str(self.pipeline_num))
+        print("| + feed-forward slices: " + str(self.ffn_split))
+        for (core, operations) in enumerate(self.operations):
+            if operations:
+                names = []
+                load = 0
+                for (operation, head) in operations:
+                    if operation in FFN_OPERATIONS:
+                        names.append(operation + ("" if self.ffn_split == 1 else ("(1/" + str(self.ffn_split) + ")")))
+                        load += macs[operation] // self.ffn_split
+                    else:
+                        names.append(operation if head is None else (operation + "(head" + str(head) + ")"))
+                        load += macs[operation]
+                print("| + core" + str(core) + ": " + ", ".join(names) + ", " + str(load) + " MACs")
+            else:
+                print("| + core" + str(core) + ": idle")
+        print("----------------------------------------------")
+
+
+def map_cores(core_num, head_num, multi_head=0, head_id=0, ffn_blocks=1):
+    """
+    Map the operations onto core_num cores
+
+    multi_head: 0 to simulate the head head_id only, otherwise all heads
+    ffn_blocks: number of parts the hidden dimension of the feed-forward layer can be split into, the number of
+    feed-forward slices divides it
+    Raise NotImplementedError if the operations can't be mapped onto core_num cores
+    """
+
+    heads = list(range(head_num)) if multi_head else [head_id]
+
+    if core_num == 1:
+        raise NotImplementedError("The 1-core template is not supported yet, its stages deadlock, the attention pipeline needs at least 5 cores!")
+    elif core_num in FOLDS:
+        if multi_head:
+            raise NotImplementedError("Multi-head mode needs the attention pipeline on its own cores besides LP, FC1 and FC2(at least 8 cores)!")
+        template_cores = [None] * len(OPERATIONS)
+        operations = []
+        for (core, folded) in enumerate(FOLDS[core_num]):
+            operations.append([(operation, heads[0] if operation in ATTENTION_OPERATIONS else None) for operation in folded])
+            for operation in folded:
+                template_cores[OPERATIONS.index(operation)] = core
+        return CoreMapping(core_num, 8, 1, [heads], 1, template_cores, operations)
+    elif core_num >= 8:
+        pipeline_num = min(len(heads), (core_num - 8) // PIPELINE_CORE_NUM + 1)
+        spare = core_num - 8 - (pipeline_num - 1) * PIPELINE_CORE_NUM
+        ffn_split = max(split for split in range(1, spare // SLICE_CORE_NUM + 2) if (ffn_blocks % split) == 0)
+        mapping = CoreMapping(core_num, 8, pipeline_num, [heads[p::pipeline_num] for p in range(pipeline_num)], ffn_split,
+                              list(range(len(OPERATIONS))), [[] for _ in range(core_num)])
+        for pipeline in range(pipeline_num):
+            for (core, operation) in zip(mapping.pipeline_cores(pipeline), ATTENTION_OPERATIONS):
+                mapping.operations[core] = [(operation, head) for head in mapping.heads[pipeline]]
+        mapping.operations[PIPELINE_CORE_NUM] = [("LP", None)]
+        for ffn in range(ffn_split):
+            for (core, operation) in zip(mapping.slice_cores(ffn), FFN_OPERATIONS):
+                mapping.operations[core] = [(operation, None)]
+        return mapping
+    else:
+        raise NotImplementedError("Core number of " + str(core_num) + " is not supported yet, the attention pipeline needs a core for each of Q, K, V, Q*K and A'*V(at least 5 cores)!")
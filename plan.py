@@ -0,0 +1,171 @@
+import math
+
+"""
+Precomputed plan of a simulation
+
+Every value derived from the configuration(block numbers, subsum counts, SRAM heights) and the parameters and mappings
+of every unit of the 1-core or 8-core template are computed once here, simulator.simulating() only builds the units
+from the plan. A plan only depends on the HW/SW configs, so it can be reused by all runs of the same configuration.
+"""
+
+""" Operations of the cores of the templates, see mapper """
+TEMPLATE_OPERATIONS = {1: ["Q/K/V"],
+                       8: ["Q", "K", "V", "Q*K", "A'*V", "LP", "FC1", "FC2"]}
+
+
+class CorePlan:
+    """
+    Parameters and mapping of a core
+
+    operation: see TEMPLATE_OPERATIONS
+    blocknum_col: number of mac_lane * mac_lane blocks in the column of the result matrix
+    subsum_cnt: number of subsums accumulated to complete a block
+    blocknum_row_sram1: number of mac_lane rows in a sub-SRAM of SRAM1
+    blocknum_col_sram2: number of mac_lane columns in SRAM2
+    sram1_backend: see core.SRAM1_BACKENDS
+    """
+
+    __slots__ = ("operation", "blocknum_col", "subsum_cnt", "blocknum_row_sram1", "blocknum_col_sram2", "sram1_backend")
+
+    def __init__(self, operation, blocknum_col, subsum_cnt, blocknum_row_sram1, blocknum_col_sram2, sram1_backend="matrix"):
+        self.operation = operation
+        self.blocknum_col = blocknum_col
+        self.subsum_cnt = subsum_cnt
+        self.blocknum_row_sram1 = blocknum_row_sram1
+        self.blocknum_col_sram2 = blocknum_col_sram2
+        self.sram1_backend = sram1_backend
+
+
+class GlobalBufferPlan:
+    """
+    Parameters and mapping of a global buffer
+
+    feeds: core whose SRAMs the GB provides data for, None if the GB only takes a result
+    softmax_bandwidth/layernorm_bandwidth: 0 if the GB isn't connected to the unit
+    mapping: arguments of GlobalBuffer.add_mapping(), None if the GB has no mapping
+    rownum1: see GlobalBuffer
+    weight: whether the GB provides the weight matrix of its core(SRAM2 operand), which is stored in DRAM
+    """
+
+    __slots__ = ("feeds", "softmax_bandwidth", "layernorm_bandwidth", "mapping", "rownum1", "weight")
+
+    def __init__(self, feeds, softmax_bandwidth=0, layernorm_bandwidth=0, mapping=None, rownum1=1, weight=False):
+        self.feeds = feeds
+        self.softmax_bandwidth = softmax_bandwidth
+        self.layernorm_bandwidth = layernorm_bandwidth
+        self.mapping = mapping
+        self.rownum1 = rownum1
+        self.weight = weight
+
+
+class Plan:
+    """
+    Derived values and units of the template with core_num cores
+
+    args: SimulationConfig or argparse namespace of main.argparser()
+    """
+
+    __slots__ = ("core_num", "head_embedding_dim", "sram1_height", "sram2_height", "blocknum_row",
+                 "blocknum_col_qkv", "blocknum_col_a", "blocknum_col_subx", "blocknum_col_lp", "blocknum_col_fc1", "blocknum_col_fc2",
+                 "subsum_cnt_qkv", "subsum_cnt_a", "subsum_cnt_subx", "subsum_cnt_lp", "subsum_cnt_fc1", "subsum_cnt_fc2",
+                 "blocknum_row_sram1_qkv", "blocknum_row_sram1_a", "blocknum_row_sram1_subx", "blocknum_row_sram1_lp",
+                 "blocknum_row_sram1_fc1", "blocknum_row_sram1_fc2",
+                 "blocknum_col_sram2_qkv", "blocknum_col_sram2_a", "blocknum_col_sram2_subx", "blocknum_col_sram2_lp",
+                 "blocknum_col_sram2_fc1", "blocknum_col_sram2_fc2",
+                 "ffn_split", "use_sram", "cores", "global_buffers")
+
+    def __init__(self, args, core_num, sram1_backends=None, ffn_split=1):
+        """
+        sram1_backends: SRAM1 backend of Q, K and V cores of the 8-core template
+        ffn_split: number of feed-forward slices(see mapper), FC1/FC2 of every slice take its share of the hidden dimension
+        """
+
+        if core_num not in TEMPLATE_OPERATIONS:
+            raise NotImplementedError("Core number of " + str(core_num) + " is not supported yet!")
+        self.core_num = core_num
+        self.ffn_split = ffn_split
+
+        self.head_embedding_dim = int(args.embedding_dim // args.head_num)
+        self.sram1_height = int(args.SRAM_capacity // args.MAC_lane // args.MAC_num)
+        self.sram2_height = int(args.SRAM_capacity // args.MAC_num)
+        self.blocknum_row = int(args.seq_length // args.MAC_lane)
+        self.blocknum_col_qkv = int(self.head_embedding_dim // args.MAC_lane)
+        self.blocknum_col_a = self.blocknum_row
+        self.blocknum_col_subx = int(self.head_embedding_dim // args.MAC_lane)
+        self.blocknum_col_lp = int(args.embedding_dim // args.MAC_lane)
+        self.blocknum_col_fc1 = 4 * int(args.embedding_dim // args.MAC_lane) // ffn_split
+        self.blocknum_col_fc2 = int(args.embedding_dim // args.MAC_lane)
+        self.subsum_cnt_qkv = int(args.embedding_dim // args.MAC_num)
+        self.subsum_cnt_a = int(self.head_embedding_dim // args.MAC_num)
+        self.subsum_cnt_subx = int(args.seq_length // args.MAC_num)
+        self.subsum_cnt_lp = self.subsum_cnt_qkv
+        self.subsum_cnt_fc1 = self.subsum_cnt_qkv
+        self.subsum_cnt_fc2 = self.subsum_cnt_fc1 * 4 // ffn_split
+        self.blocknum_row_sram1_qkv = int(self.sram1_height // self.subsum_cnt_qkv)
+        self.blocknum_row_sram1_a = int(self.sram1_height // self.subsum_cnt_a)
+        self.blocknum_row_sram1_subx = int(self.sram1_height // self.subsum_cnt_subx)
+        self.blocknum_row_sram1_lp = int(self.sram1_height // self.subsum_cnt_lp)
+        self.blocknum_row_sram1_fc1 = self.blocknum_row_sram1_qkv
+        self.blocknum_row_sram1_fc2 = int(self.sram1_height // self.subsum_cnt_fc2)
+        self.blocknum_col_sram2_qkv = int(self.sram2_height // self.subsum_cnt_qkv // args.MAC_lane)
+        self.blocknum_col_sram2_a = int(self.sram2_height // self.subsum_cnt_a // args.MAC_lane)
+        self.blocknum_col_sram2_subx = int(self.sram2_height // self.subsum_cnt_subx // args.MAC_lane)
+        self.blocknum_col_sram2_lp = int(self.sram2_height // self.subsum_cnt_lp // args.MAC_lane)
+        self.blocknum_col_sram2_fc1 = int(self.sram2_height // self.subsum_cnt_fc1 // args.MAC_lane)
+        self.blocknum_col_sram2_fc2 = int(self.sram2_height // self.subsum_cnt_fc2 // args.MAC_lane)
+
+        # whether A is stored in core SRAM instead of GB, only in the 8-core template
+        self.use_sram = (core_num == 8) and (args.seq_length <= int(math.sqrt(args.SRAM_capacity)))
+
+        qkv = (self.blocknum_col_qkv, self.subsum_cnt_qkv, self.blocknum_row_sram1_qkv, self.blocknum_col_sram2_qkv)
+        if core_num == 1:
+            self.cores = [CorePlan("Q/K/V", *qkv)]
+        else:
+            if sram1_backends is None:
+                sram1_backends = ["matrix"] * 3
+            self.cores = [CorePlan(operation, *qkv, sram1_backend=backend) for (operation, backend) in zip(["Q", "K", "V"], sram1_backends)]
+            self.cores.append(CorePlan("Q*K", self.blocknum_col_a, self.subsum_cnt_a, self.blocknum_row_sram1_a, self.blocknum_col_sram2_a))
+            self.cores.append(CorePlan("A'*V", self.blocknum_col_subx, self.subsum_cnt_subx, self.blocknum_row_sram1_subx, self.blocknum_col_sram2_subx))
+            self.cores.append(CorePlan("LP", self.blocknum_col_lp, self.subsum_cnt_lp, self.blocknum_row_sram1_lp, self.blocknum_col_sram2_lp))
+            self.cores.append(CorePlan("FC1", self.blocknum_col_fc1, self.subsum_cnt_fc1, self.blocknum_row_sram1_fc1, self.blocknum_col_sram2_fc1))
+            self.cores.append(CorePlan("FC2", self.blocknum_col_fc2, self.subsum_cnt_fc2, self.blocknum_row_sram1_fc2, self.blocknum_col_sram2_fc2))
+
+        """ GB0-2 for Q/K/V, GB3 for Q*K and softmax, GB4 for A'*V, GB5-8 for LP, FC1 and layernorm, FC2 and the output """
+        qkv_mapping = dict(blocknum_row_cnt=self.blocknum_row, array_data_cnt=self.blocknum_row * self.blocknum_col_qkv,
+                           sram_subsum_cnt=self.subsum_cnt_qkv, sram1_rownum_cnt=self.blocknum_row_sram1_qkv,
+                           sram2_colnum_cnt=self.head_embedding_dim, sram2_sram_colnum_cnt=self.blocknum_col_sram2_qkv * args.MAC_lane)
+        # in the 1-core template all GBs provide data for core 0
+        self.global_buffers = [GlobalBufferPlan(i if core_num == 8 else 0, mapping=qkv_mapping, weight=(core_num == 8)) for i in range(3)]
+        self.global_buffers.append(GlobalBufferPlan(3 if core_num == 8 else 0, softmax_bandwidth=args.softmax_throughput,
+                                   mapping=dict(blocknum_row_cnt=self.blocknum_row, array_data_cnt=self.blocknum_row * self.blocknum_col_a,
+                                                sram_subsum_cnt=self.subsum_cnt_a, sram1_rownum_cnt=self.blocknum_row_sram1_a,
+                                                sram2_colnum_cnt=args.seq_length, sram2_sram_colnum_cnt=self.blocknum_col_sram2_a * args.MAC_lane, flag=True)))
+        self.global_buffers.append(GlobalBufferPlan(4 if core_num == 8 else 0,
+                                   mapping=dict(blocknum_row_cnt=self.blocknum_row, array_data_cnt=0,
+                                                sram_subsum_cnt=self.subsum_cnt_subx, sram1_rownum_cnt=self.blocknum_row_sram1_subx,
+                                                sram2_colnum_cnt=self.head_embedding_dim, sram2_sram_colnum_cnt=self.blocknum_col_sram2_subx * args.MAC_lane),
+                                   rownum1=(2 if core_num == 8 else 1)))
+        if core_num == 8:
+            # since LP/FC2's SRAM1 is already hold a sub-SRAM of data from A'*V/FC1's core directly, the gb-sram transfer is the second time
+            self.global_buffers.append(GlobalBufferPlan(5,
+                                       mapping=dict(blocknum_row_cnt=self.blocknum_row, array_data_cnt=self.blocknum_row * self.blocknum_col_subx,
+                                                    sram_subsum_cnt=self.subsum_cnt_lp, sram1_rownum_cnt=self.blocknum_row_sram1_lp,
+                                                    sram2_colnum_cnt=args.embedding_dim, sram2_sram_colnum_cnt=self.blocknum_col_sram2_lp * args.MAC_lane),
+                                       rownum1=2, weight=True))
+            self.global_buffers.append(GlobalBufferPlan(6, layernorm_bandwidth=args.GB_LN_bandwidth,
+                                       mapping=dict(blocknum_row_cnt=self.blocknum_row, array_data_cnt=self.blocknum_row * self.blocknum_col_lp,
+                                                    sram_subsum_cnt=self.subsum_cnt_fc1, sram1_rownum_cnt=self.blocknum_row_sram1_fc1,
+                                                    sram2_colnum_cnt=4 * args.embedding_dim // ffn_split, sram2_sram_colnum_cnt=self.blocknum_col_sram2_fc1 * args.MAC_lane, flag=True),
+                                       weight=True))
+            self.global_buffers.append(GlobalBufferPlan(7,
+                                       mapping=dict(blocknum_row_cnt=self.blocknum_row, array_data_cnt=self.blocknum_row * self.blocknum_col_fc1,
+                                                    sram_subsum_cnt=self.subsum_cnt_fc2, sram1_rownum_cnt=self.blocknum_row_sram1_fc2,
+                                                    sram2_colnum_cnt=args.embedding_dim, sram2_sram_colnum_cnt=self.blocknum_col_sram2_fc2 * args.MAC_lane),
+                                       rownum1=2, weight=True))
+            self.global_buffers.append(GlobalBufferPlan(None,
+                                       mapping=dict(blocknum_row_cnt=0, array_data_cnt=self.blocknum_row * self.blocknum_col_fc2,
+                                                    sram_subsum_cnt=0, sram1_rownum_cnt=0, sram2_colnum_cnt=0, sram2_sram_colnum_cnt=0)))
+
+    def feeds(self):
+        """ {"gbI": "coreJ"} of every GB providing data for a core """
+        return {"gb" + str(i): "core" + str(gb.feeds) for (i, gb) in enumerate(self.global_buffers) if gb.feeds is not None}
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+
+"""
+On-disk cache of simulation results
+
+A result is stored in <cache dir>/<key>.json, the key is the hash of the configuration and of the source of the
+simulator, so changing the simulator never returns a stale result.
+The files are touched when read, and the least recently used ones are removed when the cache exceeds its size.
+"""
+
+# args that only change what is printed or written besides the result
+OUTPUT_ARGS = ["trace_level", "trace_units", "debug_flag", "event_trace", "memory_report",
+               "no_cache", "cache_dir", "cache_size"]
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "attention_simulator")
+
+# fingerprint of the source of the simulator, computed once per process
+_fingerprint = None
+
+
+def source_fingerprint():
+    """ Hash of all .py files of the simulator """
+
+    global _fingerprint
+
+    if _fingerprint is None:
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.sha256()
+        for name in sorted(os.listdir(src_dir)):
+            if name.endswith(".py"):
+                h.update(name.encode())
+                with open(os.path.join(src_dir, name), "rb") as f:
+                    h.update(f.read())
+        _fingerprint = h.hexdigest()
+
+    return _fingerprint
+
+
+def config_key(args):
+    """ Key of the result of args(argparse namespace or dict) """
+
+    config = dict(vars(args)) if not isinstance(args, dict) else dict(args)
+    for arg in OUTPUT_ARGS:
+        config.pop(arg, None)
+    canonical = json.dumps({"config": config, "source": source_fingerprint()}, sort_keys=True)
+
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    cache_dir: directory of the result files, created when the first result is stored
+    max_bytes: total size of the result files kept, 0 for no limit
+    """
+
+    __slots__ = ("cache_dir", "max_bytes")
+
+    def __init__(self, cache_dir=DEFAULT_DIR, max_bytes=0):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def get(self, key):
+        """ Stored result of key, None on a miss """
+
+        path = self.path(key)
+        try:
+            with open(path) as f:
+                result = json.load(f)
+            # mark as recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        return result
+
+    def put(self, key, result):
+        """ Store a json serializable result """
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(key)
+        # write and rename, so concurrent runs(e.g. a sweep) never read a partial file
+        tmp_path = path + "." + str(os.getpid()) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp_path, path)
+
+        if self.max_bytes > 0:
+            self.evict()
+
+    def evict(self):
+        """ Remove the least recently used results until the cache fits in max_bytes """
+
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+                total += stat.st_size
+
+        entries.sort()
+        for (_, size, name) in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,2097 @@
+from core import Core, SRAM1_BACKENDS
+from global_buffer import GlobalBuffer
+from softmax import Softmax
+from layernorm import LayerNorm
+from plan import Plan
+from event_queue import EventQueue
+from gb_bus import GBBus
+from dram import DRAM, transfer_ticks
+from gb_space import GBSpace
+import energy
+import event_trace
+import mapper
+import result_cache
+import tracing
+import utils
+
+from typing import Dict, List, Optional
+import copy
+import dataclasses
+import sys
+import math
+
+"""
+Tick-based simulation engine of the encoder block, simulate() runs a SimulationConfig and returns its SimulationResult
+"""
+
+@dataclasses.dataclass
+class SimulationConfig:
+    """ HW/SW configuration of a simulation, see main.argparser() for the meaning of every field """
+
+    """ HW configs """
+    core_num: int = 8
+    SRAM_capacity: int = 65536
+    MAC_lane: int = 16
+    MAC_num: int = 32
+    SRAM_access_latency: int = 1
+    GB_access_latency: int = 50
+    GB_SRAM_bandwidth: int = 32
+    array_access_and_calculation_latency: int = 1
+    softmax_cal_latency: int = 60
+    softmax_throughput: int = 6
+    layernorm_cal_latency: int = 10
+    GB_LN_bandwidth: int = 4
+    LN_SRAM_bandwidth: int = 4
+    head_id: int = 0
+    multi_head: int = 0
+    time_quantum: int = 1
+    fast_forward: int = 1
+    packed_state: int = 0
+    memory_report: int = 0
+    trace_level: str = "silent"
+    trace_units: str = ""
+    sram1_backend: str = "matrix"
+    sram1_split: float = 0.5
+    gb_bus_width: int = 0
+    gb_bus_arbitration: str = "round-robin"
+    DRAM_channels: int = 0
+    DRAM_bandwidth: int = 32
+    DRAM_burst_size: int = 64
+    DRAM_row_size: int = 2048
+    DRAM_hit_latency: int = 20
+    DRAM_miss_latency: int = 300
+    GB_weight_buffer: int = 65536
+    GB_capacity: int = 0
+    GB_spill_policy: str = "spill"
+    GB_outstanding: int = 1
+    GB_issue_interval: int = 0
+    energy_table: str = ""
+    event_trace: str = ""
+    no_cache: bool = False
+    cache_dir: str = result_cache.DEFAULT_DIR
+    cache_size: int = 64
+
+    """ SW configs """
+    seq_length: int = 384
+    embedding_dim: int = 1024
+    head_num: int = 16
+    block_num: int = 1
+    image_num: int = 1
+    image_interval: int = 0
+
+    @classmethod
+    def from_args(cls, args):
+        """ Config of the argparse namespace of main.argparser() """
+        return cls(**{field.name: getattr(args, field.name) for field in dataclasses.fields(cls)})
+
+
+@dataclasses.dataclass
+class SimulationResult:
+    """
+    Result of a simulation, times are in metatime(cycles) or nanoseconds
+
+    core_busy_cycles: time each core reads its SRAM and calculates, see Statistics
+    core_sram_wait_cycles: time each core waits for the refill of its SRAMs, see Statistics
+    gb_bus_wait_cycles: time the transfers of every channel of each global buffer wait for the shared GB bus, empty without the bus
+    dram_traffic_bytes/dram_stall_cycles: BYTE each global buffer fetches from DRAM and time its transfers into core SRAM2
+                                          wait for DRAM, empty without DRAM
+    dram_row_hits/dram_row_misses: number of DRAM bursts hitting/missing the open row
+    gb_peak_bytes/gb_spill_bytes: peak occupancy of each global buffer and BYTE of the results it spills off chip, see gb_space,
+                                  empty with unlimited GB capacity
+    gb_capacity_stall_cycles: time the transfers into each global buffer wait for space, empty with unlimited GB capacity
+    core_energy_pj/gb_energy_pj: energy of each core(its MACs, SRAM accesses and leakage) and each global buffer(its
+                                 transfers and leakage), see energy
+    softmax_energy_pj/layernorm_energy_pj: energy of the unit
+    core_complete_ns: latency when each core completes its computation, None if it never completes
+    gb_transfer_cnt: number of completed transfers of every channel("sram1", "sram2", "array", "softmax", "layernorm") of each global buffer
+    softmax_busy_cycles/layernorm_busy_cycles: time the unit is calculating
+    gb_weight_refetch: times each global buffer transfers the SRAM2 operand(weight matrix) of its core, more than 1 when the
+                       operand is larger than SRAM2 and transferred tile by tile, 0 if the GB provides no SRAM2 operand
+    """
+
+    cycles: int
+    latency_ns: float
+    core_busy_cycles: List[int]
+    core_complete_ns: List[Optional[float]]
+    gb_transfer_cnt: List[Dict[str, int]]
+    softmax_busy_cycles: int
+    layernorm_busy_cycles: int
+    # latency when the A'*V core of each head completes, multi-head mode only
+    head_complete_ns: List[Optional[float]] = dataclasses.field(default_factory=list)
+    # latency when each encoder block starts/completes, block chaining mode only, see EncoderBlock
+    block_start_ns: List[float] = dataclasses.field(default_factory=list)
+    block_complete_ns: List[float] = dataclasses.field(default_factory=list)
+    # latency when each image starts(it arrives and the Q/K/V cores are free)/completes, throughput mode only
+    image_start_ns: List[float] = dataclasses.field(default_factory=list)
+    image_complete_ns: List[float] = dataclasses.field(default_factory=list)
+    # time from the first image completing to the end and the busy time of each core during it, throughput mode only
+    steady_cycles: int = 0
+    steady_core_busy_cycles: List[int] = dataclasses.field(default_factory=list)
+    gb_weight_refetch: List[int] = dataclasses.field(default_factory=list)
+    core_sram_wait_cycles: List[int] = dataclasses.field(default_factory=list)
+    gb_bus_wait_cycles: List[Dict[str, int]] = dataclasses.field(default_factory=list)
+    dram_traffic_bytes: List[int] = dataclasses.field(default_factory=list)
+    dram_stall_cycles: List[int] = dataclasses.field(default_factory=list)
+    dram_row_hits: int = 0
+    dram_row_misses: int = 0
+    gb_peak_bytes: List[int] = dataclasses.field(default_factory=list)
+    gb_spill_bytes: List[int] = dataclasses.field(default_factory=list)
+    gb_capacity_stall_cycles: List[int] = dataclasses.field(default_factory=list)
+    core_energy_pj: List[float] = dataclasses.field(default_factory=list)
+    gb_energy_pj: List[float] = dataclasses.field(default_factory=list)
+    softmax_energy_pj: float = 0.0
+    layernorm_energy_pj: float = 0.0
+
+    @property
+    def core_idle_cycles(self):
+        return [self.cycles - busy for busy in self.core_busy_cycles]
+
+    @property
+    def utilization(self):
+        return [busy / self.cycles for busy in self.core_busy_cycles]
+
+    @property
+    def block_latency_ns(self):
+        return [complete - start for (start, complete) in zip(self.block_start_ns, self.block_complete_ns)]
+
+    @property
+    def block_interval_ns(self):
+        """ Steady-state time between two blocks completing, None if less than 2 blocks """
+        if len(self.block_complete_ns) < 2:
+            return None
+        return (self.block_complete_ns[-1] - self.block_complete_ns[0]) / (len(self.block_complete_ns) - 1)
+
+    @property
+    def image_latency_ns(self):
+        return [complete - start for (start, complete) in zip(self.image_start_ns, self.image_complete_ns)]
+
+    @property
+    def image_interval_ns(self):
+        """ Steady-state time between two images completing, None if less than 2 images """
+        if len(self.image_complete_ns) < 2:
+            return None
+        return (self.image_complete_ns[-1] - self.image_complete_ns[0]) / (len(self.image_complete_ns) - 1)
+
+    @property
+    def steady_utilization(self):
+        if self.steady_cycles == 0:
+            return []
+        return [busy / self.steady_cycles for busy in self.steady_core_busy_cycles]
+
+    @property
+    def energy_pj(self):
+        return sum(self.core_energy_pj) + sum(self.gb_energy_pj) + self.softmax_energy_pj + self.layernorm_energy_pj
+
+    @property
+    def power_mw(self):
+        """ Average power over the simulation """
+        return self.energy_pj / self.latency_ns
+
+    @property
+    def edp(self):
+        """ Energy-delay product, in pJ*ns """
+        return self.energy_pj * self.latency_ns
+
+
+class AttentionHead:
+    """
+    Q/K/V, Q*K and A'*V cores of a head replicated in the multi-head mode of the 8-core case
+
+    The units are copies of cores[0:5] and global_buffers[0:6], so every transfer function can be called with the
+    same core/GB indexes as head 0. global_buffers[5] only collects the A'*V result of this head for LP,
+    the transfer into it takes the array channel of the shared GB5.
+    prev: cores of the head running on the same attention pipeline(see mapper) before this head, None if it's the first one
+    The rest is the per-head state of the simulation loop, see simulating()
+    """
+
+    __slots__ = ("cores", "global_buffers", "prev", "qkv_stage", "a_stage", "x_stage", "count", "a_row_idx", "a_col_idx",
+                 "sram1_idx_gb_start", "sram1_idx_gb_end", "rownum_sram2_idx_gb_start", "rownum_sram2_idx_gb_end",
+                 "colnum_sram2_idx_gb_start", "colnum_sram2_idx_gb_end", "array_idx_gb", "core_complete_latency")
+
+    def __init__(self, cores, global_buffers, prev=None):
+        self.cores = cores
+        self.global_buffers = global_buffers
+        self.prev = prev
+
+        self.qkv_stage = 0
+        self.a_stage = 0
+        self.x_stage = 0
+        self.count = [0]
+        self.a_row_idx = [0] * 2
+        self.a_col_idx = [0] * 2
+
+        self.sram1_idx_gb_start = [0] * 8
+        self.sram1_idx_gb_end = [0] * 8
+        self.rownum_sram2_idx_gb_start = [0] * 8
+        self.rownum_sram2_idx_gb_end = [0] * 8
+        self.colnum_sram2_idx_gb_start = [0] * 8
+        self.colnum_sram2_idx_gb_end = [0] * 8
+        self.array_idx_gb = [0] * 9
+
+        self.core_complete_latency = [None] * len(cores)
+
+
+class FFNSlice:
+    """
+    FC1 and FC2 cores of a feed-forward slice(see mapper) besides slice 0 on cores 6-7
+
+    The units are copies of cores[6:8] and global_buffers[6:9] at the same indexes as the template(the rest are None),
+    so every transfer function can be called with the same core/GB indexes as slice 0. global_buffers[6] only provides
+    the weight of FC1, the layernorm result of the shared GB6 is broadcast to the SRAM1 of FC1 of all slices.
+    The rest is the per-slice state of the simulation loop, see encoder_block()
+    """
+
+    __slots__ = ("cores", "global_buffers", "fc1_stage", "fc2_stage", "count", "sram1_idx_gb_start", "sram1_idx_gb_end",
+                 "rownum_sram2_idx_gb_start", "rownum_sram2_idx_gb_end", "colnum_sram2_idx_gb_start", "colnum_sram2_idx_gb_end",
+                 "array_idx_gb", "array_idx_gb_copy", "core_complete_latency")
+
+    def __init__(self, cores, global_buffers):
+        self.cores = [None] * 6 + cores
+        self.global_buffers = [None] * 6 + global_buffers
+
+        self.fc1_stage = 0
+        self.fc2_stage = 0
+        self.count = [0]
+
+        self.sram1_idx_gb_start = [0] * 8
+        self.sram1_idx_gb_end = [0] * 8
+        self.rownum_sram2_idx_gb_start = [0] * 8
+        self.rownum_sram2_idx_gb_end = [0] * 8
+        self.colnum_sram2_idx_gb_start = [0] * 8
+        self.colnum_sram2_idx_gb_end = [0] * 8
+        self.array_idx_gb = [0] * 9
+        self.array_idx_gb_copy = [0] * 7
+
+        self.core_complete_latency = [None] * len(self.cores)
+
+
+class EncoderBlock:
+    """
+    Units of an encoder block in the 8-core case
+
+    When encoder blocks are chained, every block has its own copies of all units, the copies of a unit are the same
+    hardware working on different blocks, see encoder_block().
+    ffns: feed-forward slices 1..ffn_split-1(FFNSlice)
+    steps: generator of the simulation of the block
+    The rest are the results of the block, latencies of the block starting(its Q/K/V cores are free), completing(its FC2
+    result is written) and each core completing
+    """
+
+    __slots__ = ("cores", "global_buffers", "softmax", "layernorm", "heads", "ffns", "steps", "start_latency", "complete_latency",
+                 "core_complete_latency")
+
+    def __init__(self, cores, global_buffers, softmax, layernorm, heads, ffns):
+        self.cores = cores
+        self.global_buffers = global_buffers
+        self.softmax = softmax
+        self.layernorm = layernorm
+        self.heads = heads
+        self.ffns = ffns
+
+        self.steps = None
+        self.start_latency = None
+        self.complete_latency = None
+        self.core_complete_latency = [None] * len(cores)
+
+
+def dump_memory(cores, global_buffers, softmax, layernorm):
+    """ Report bytes of the state matrices of every unit """
+
+    total = 0
+    print("----------------------------------------------")
+    print("| State matrix memory")
+    for i in range(len(cores)):
+        print("| + core" + str(i) + ": " + str(cores[i].state_bytes()) + " BYTE")
+        total += cores[i].state_bytes()
+    for i in range(len(global_buffers)):
+        print("| + GB" + str(i) + ": " + str(global_buffers[i].state_bytes()) + " BYTE")
+        total += global_buffers[i].state_bytes()
+    print("| + Softmax: " + str(softmax[0].state_bytes()) + " BYTE")
+    print("| + Layernorm: " + str(layernorm[0].state_bytes()) + " BYTE")
+    total += softmax[0].state_bytes() + layernorm[0].state_bytes()
+    print("| + total: " + str(total) + " BYTE")
+    print("----------------------------------------------")
+
+def get_sram1_backends(args):
+    """ SRAM1 backend of Q, K and V cores """
+
+    backends = args.sram1_backend.split(",")
+    if len(backends) == 1:
+        backends = backends * 3
+    if (len(backends) != 3) or any((backend not in SRAM1_BACKENDS) for backend in backends):
+        raise ValueError("SRAM1 backend must be one of " + str(list(SRAM1_BACKENDS)) + " or 3 of them separated by comma!")
+
+    return backends
+
+def get_time_quantum(args):
+    """ 
+    Number of metatime the simulator advances in one tick
+
+    Every latency count must be a multiple of the time quantum, time_quantum = 0 means the GCD of all latency counts is used
+    NOTE: a transfer start or a stage switch still takes one tick, so a coarser time quantum makes these handovers longer,
+          the result is exact only for time_quantum = 1
+    """
+
+    latency_counts = [args.SRAM_access_latency, args.GB_access_latency, args.array_access_and_calculation_latency,
+                        args.softmax_cal_latency, args.layernorm_cal_latency]
+    # a bad DRAM bandwidth is reported by DRAM
+    if (args.DRAM_channels > 0) and (args.DRAM_bandwidth > 0):
+        # a DRAM burst lasts its row hit/miss latency plus its transfer time
+        burst_ticks = transfer_ticks(args.DRAM_burst_size, args.DRAM_bandwidth)
+        latency_counts += [args.DRAM_hit_latency + burst_ticks, args.DRAM_miss_latency + burst_ticks]
+
+    if args.time_quantum == 0:
+        return math.gcd(*latency_counts)
+
+    for latency_count in latency_counts:
+        if (args.time_quantum < 0) or ((latency_count % args.time_quantum) != 0):
+            raise ValueError("Every latency must be a multiple of the time quantum " + str(args.time_quantum) + "!")
+
+    return args.time_quantum
+
+def read_from_core_sram(events, cores, stage, idx, flag=False):
+    stage = stage
+    if cores[idx].sram2.cal_complete == False:
+        # if we can read SRAM and accumulating buffer is ready for result data
+        if cores[idx].sram_ready() & cores[idx].calculator_and_array.ready():
+            cores[idx].statistics.util_counter += 1
+            events.follow(cores[idx].statistics, "util_counter")
+            # if data is ready for calculation
+            if cores[idx].sram2.count_latency(events, "latency_counter", cores[idx].sram2.latency_count):
+                # a word of SRAM1 and a word of SRAM2 for every MAC lane, see energy
+                cores[idx].statistics.count_energy("sram1_read", cores[idx].calculator_and_array.mac_num)
+                cores[idx].statistics.count_energy("sram2_read", cores[idx].calculator_and_array.mac_lane * cores[idx].calculator_and_array.mac_num)
+                if flag:
+                    cores[idx].sram_cal_advance_qk()
+                else:
+                    cores[idx].sram_cal_advance()
+                stage = stage + 1
+        elif cores[idx].calculator_and_array.ready():
+            # the calculator is free, but the SRAMs are still being refilled
+            cores[idx].statistics.sram_wait_counter += 1
+            events.follow(cores[idx].statistics, "sram_wait_counter")
+
+    return stage
+
+def dot_production(events, cores, stage, count, idx, core_num=1, a_row_idx=[0], a_col_idx=[0], a_idx_idx=0):
+    stage = stage
+    if cores[idx].calculator_and_array.complete == False:
+        cores[idx].statistics.util_counter += 1
+        events.follow(cores[idx].statistics, "util_counter")
+        if cores[idx].calculator_and_array.count_latency(events, "latency_counter", cores[idx].calculator_and_array.latency_count):
+            cores[idx].calculator_and_array.update_array()
+            cores[idx].statistics.count_energy("mac", cores[idx].calculator_and_array.mac_lane * cores[idx].calculator_and_array.mac_num)
+            events.record(cores[idx], event_trace.DOT_BLOCK, event_trace.INSTANT)
+            if cores[idx].calculator_and_array.array_state_matrix[0] == utils.COMPLETESUM:
+                a_row_idx[a_idx_idx] = cores[idx].blocknum_cal[0]
+                a_col_idx[a_idx_idx] = cores[idx].blocknum_cal[1]
+            if cores[idx].sram2.cal_complete == False:
+                stage = stage - 1 
+    if cores[idx].calculator_and_array.complete:
+    # if the calculation of all data in Q completes, switch to K calculation
+        # print("count: " + str(count))
+        events.activate()
+        if (count[0] == 1):
+            # print("################### calculation stage switch #################")
+            if core_num == 1:
+                cores[0].reset()
+            stage = stage + 1
+            count[0] = 0
+        else: 
+            count[0] += 1
+    return stage
+
+def coresram1_gb_data_transfer(events, cores, global_buffers, core_idx, gb_idx, sram1_idx_gb_start, sram1_idx_gb_end, mac_lane=0, core_num=0, issue=True):
+    """ issue: whether a new transfer can be issued, eg. False when the data isn't in GB yet, see x_ready() """
+
+    # the transfer issued during this tick starts counting in the next tick
+    issued = None
+    # if global buffer can update SRAM data now
+    if issue and global_buffers[gb_idx].can_issue(events, "sram1"):
+        # sram1_busy tells whether the find function below finds a band of data
+        global_buffers[gb_idx].sram1_busy = False
+        if (core_num == 8) and ((gb_idx == 5) or (gb_idx == 7)):
+            # if this is the data transfer from global_buffer6 into FC2's core SRAM1
+            # besides checking whether FC2's core SRAM1 has a vacancy for holding data, we also need to check whether GB6 already has FC1's result matrix data
+            # NOTE: [sram1_idx_gb_start, sram1_idx_gb_end]
+            mode = "lp" if gb_idx == 5 else "fc2"
+            (sram1_idx_gb_start[gb_idx], sram1_idx_gb_end[gb_idx]) = global_buffers[gb_idx].find_sram1_target_with_gb_check(cores[core_idx].sram1.sram_state_matrix, cores[core_idx].calculator_and_array.mac_lane, mode)
+        else:
+            (sram1_idx_gb_start[gb_idx], sram1_idx_gb_end[gb_idx]) = global_buffers[gb_idx].find_sram_target(cores[core_idx].sram1, cores[core_idx].calculator_and_array.mac_lane, 1)
+            
+        # if global buffer actually removes a data
+        if global_buffers[gb_idx].sram1_busy:
+            events.activate()
+            events.record(global_buffers[gb_idx], event_trace.GB_SRAM1, event_trace.BEGIN, cores[core_idx])
+            global_buffers[gb_idx].bus_request(events, "sram1")
+            cores[core_idx].sram1.update_to_removing(sram1_idx_gb_start[gb_idx], sram1_idx_gb_end[gb_idx])
+            issued = global_buffers[gb_idx].issue(events, "sram1", (sram1_idx_gb_start[gb_idx], sram1_idx_gb_end[gb_idx]))
+    # if global buffer is transferring data
+    for request in list(global_buffers[gb_idx].requests["sram1"]):
+        if request is issued:
+            continue
+        # if global buffer finishes 
+        if global_buffers[gb_idx].bus_granted(events, "sram1") and request.count_latency(events, "latency_counter", global_buffers[gb_idx].latency_count):
+            global_buffers[gb_idx].bus_release("sram1")
+            global_buffers[gb_idx].requests["sram1"].remove(request)
+            (sram1_idx_gb_start[gb_idx], sram1_idx_gb_end[gb_idx]) = request.target
+            global_buffers[gb_idx].sram1_complete2 = global_buffers[gb_idx].sram1_complete1 and (len(global_buffers[gb_idx].requests["sram1"]) == 0)
+            events.record(global_buffers[gb_idx], event_trace.GB_SRAM1, event_trace.END, cores[core_idx])
+            global_buffers[gb_idx].statistics.count_transfer("sram1", sram1_idx_gb_end[gb_idx] - sram1_idx_gb_start[gb_idx] + 1)
+            cores[core_idx].statistics.count_energy("sram1_write", (sram1_idx_gb_end[gb_idx] - sram1_idx_gb_start[gb_idx] + 1) *
+                                                    cores[core_idx].calculator_and_array.mac_lane * cores[core_idx].calculator_and_array.mac_num)
+            cores[core_idx].sram1.update_to_ready(sram1_idx_gb_start[gb_idx], sram1_idx_gb_end[gb_idx])
+            if (gb_idx == 5) or (gb_idx == 7):
+                global_buffers[gb_idx].space_read(sram1_idx_gb_end[gb_idx] - sram1_idx_gb_start[gb_idx] + 1, "sram1")
+                mode = "lp" if gb_idx == 5 else "fc2"
+                if global_buffers[6].prev_core_result_matrix_write_complete(sram1_idx_gb_end[gb_idx], mac_lane, mode):   # TODO check this 
+                    cores[core_idx].sram1.write_complete = True
+    global_buffers[gb_idx].sram1_busy = len(global_buffers[gb_idx].requests["sram1"]) > 0
+
+def coresram1_gb_data_transfer_a(events, cores, global_buffers, core_idx, gb_idx, sram1_idx_gb_start, sram1_idx_gb_end):
+    """ A' matrix data transfer from GB3 to core SRAM1 """
+    # if global buffer can update SRAM data now
+    if global_buffers[gb_idx].sram1_busy == False:
+        (sram1_idx_gb_start[gb_idx], sram1_idx_gb_end[gb_idx]) = global_buffers[gb_idx].find_sram_target_a(cores[core_idx].sram1.sram_state_matrix, global_buffers[gb_idx-1].a_state_matrix,
+                                                                    global_buffers[4].sram1_rownum_cnt)
+        if global_buffers[gb_idx].sram1_busy:
+            # if global buffer actually has the corresponding data, we can transfer this data to core sram1
+            events.activate()
+            events.record(global_buffers[gb_idx], event_trace.GB_SRAM1, event_trace.BEGIN, cores[core_idx])
+            global_buffers[gb_idx].bus_request(events, "sram1")
+            cores[core_idx].sram1.update_to_removing(sram1_idx_gb_start[gb_idx], sram1_idx_gb_end[gb_idx])
+    # if global buffer is transferring data
+    else: 
+        # if global buffer finishes 
+        if global_buffers[gb_idx].bus_granted(events, "sram1") and global_buffers[gb_idx].count_latency(events, "latency_counter", global_buffers[gb_idx].latency_count):
+            global_buffers[gb_idx].bus_release("sram1")
+            global_buffers[gb_idx].sram1_busy = False
+            global_buffers[gb_idx].sram1_complete2 = global_buffers[gb_idx].sram1_complete1
+            events.record(global_buffers[gb_idx], event_trace.GB_SRAM1, event_trace.END, cores[core_idx])
+            global_buffers[gb_idx].statistics.count_transfer("sram1", sram1_idx_gb_end[gb_idx] - sram1_idx_gb_start[gb_idx] + 1)
+            cores[core_idx].statistics.count_energy("sram1_write", (sram1_idx_gb_end[gb_idx] - sram1_idx_gb_start[gb_idx] + 1) *
+                                                    cores[core_idx].calculator_and_array.mac_lane * cores[core_idx].calculator_and_array.mac_num)
+            cores[core_idx].sram1.update_to_ready(sram1_idx_gb_start[gb_idx], sram1_idx_gb_end[gb_idx])
+            global_buffers[gb_idx-1].space_read(sram1_idx_gb_end[gb_idx] - sram1_idx_gb_start[gb_idx] + 1, "sram1")
+
+def coresram2_gb_data_transfer(events, cores, global_buffers, core_idx, gb_idx, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end):
+    issued = None
+    if global_buffers[gb_idx].can_issue(events, "sram2"):
+        global_buffers[gb_idx].sram2_busy = False
+        (rownum_sram2_idx_gb_start[gb_idx], rownum_sram2_idx_gb_end[gb_idx], colnum_sram2_idx_gb_start[gb_idx], colnum_sram2_idx_gb_end[gb_idx]) = \
+            global_buffers[gb_idx].find_sram_target(cores[core_idx].sram2.sram_state_matrix, cores[core_idx].calculator_and_array.mac_lane, 2)
+        if global_buffers[gb_idx].sram2_busy:
+            events.activate()
+            events.record(global_buffers[gb_idx], event_trace.GB_SRAM2, event_trace.BEGIN, cores[core_idx])
+            global_buffers[gb_idx].dram_request(cores[core_idx].sram2.update_to_removing(rownum_sram2_idx_gb_start[gb_idx], rownum_sram2_idx_gb_end[gb_idx], colnum_sram2_idx_gb_start[gb_idx], colnum_sram2_idx_gb_end[gb_idx]))
+            if global_buffers[gb_idx].dram_ready():
+                global_buffers[gb_idx].bus_request(events, "sram2")
+            issued = global_buffers[gb_idx].issue(events, "sram2", (rownum_sram2_idx_gb_start[gb_idx], rownum_sram2_idx_gb_end[gb_idx], colnum_sram2_idx_gb_start[gb_idx], colnum_sram2_idx_gb_end[gb_idx]))
+    for request in list(global_buffers[gb_idx].requests["sram2"]):
+        if request is issued:
+            continue
+        # the weight data is fetched from DRAM into GB before it takes the bus
+        if global_buffers[gb_idx].dram_ready(events, request) and global_buffers[gb_idx].bus_granted(events, "sram2") and \
+                request.count_latency(events, "latency_counter", global_buffers[gb_idx].latency_count):
+            global_buffers[gb_idx].bus_release("sram2")
+            global_buffers[gb_idx].requests["sram2"].remove(request)
+            (rownum_sram2_idx_gb_start[gb_idx], rownum_sram2_idx_gb_end[gb_idx], colnum_sram2_idx_gb_start[gb_idx], colnum_sram2_idx_gb_end[gb_idx]) = request.target
+            global_buffers[gb_idx].sram2_complete2 = global_buffers[gb_idx].sram2_complete1 and (len(global_buffers[gb_idx].requests["sram2"]) == 0)
+            events.record(global_buffers[gb_idx], event_trace.GB_SRAM2, event_trace.END, cores[core_idx])
+            data = cores[core_idx].sram2.update_to_ready(rownum_sram2_idx_gb_start[gb_idx], rownum_sram2_idx_gb_end[gb_idx], colnum_sram2_idx_gb_start[gb_idx], colnum_sram2_idx_gb_end[gb_idx])
+            global_buffers[gb_idx].statistics.count_transfer("sram2", data)
+            cores[core_idx].statistics.count_energy("sram2_write", data * cores[core_idx].calculator_and_array.mac_num)
+            global_buffers[gb_idx].dram_release(data)
+    global_buffers[gb_idx].sram2_busy = len(global_buffers[gb_idx].requests["sram2"]) > 0
+
+def corearray_gb_data_transfer(events, cores, global_buffers, core_idx, gb_idx, array_idx_gb, stage, mac_lane, core_num=1, a_row_idx=[0], a_col_idx=[0], a_idx_idx=0):
+    if global_buffers[gb_idx].array_busy == False:
+        # choose the data in array that is ready to remove
+        array_idx_gb[gb_idx] = global_buffers[gb_idx].find_array_target(cores[core_idx].calculator_and_array.array_state_matrix)
+        # if there is data in array satisfies the condition to remove
+        if global_buffers[gb_idx].array_busy:
+            events.activate()
+            events.record(global_buffers[gb_idx], event_trace.ARRAY_GB, event_trace.BEGIN, cores[core_idx])
+            if global_buffers[gb_idx].space_write(None, "array", 1, "array"):
+                global_buffers[gb_idx].bus_request(events, "array")
+            cores[core_idx].calculator_and_array.update_to_removing(array_idx_gb[gb_idx])
+            if (gb_idx == 5) or (gb_idx == 7):
+                # if this is the case that transferring remaining X/FC1 results into LP/FC2's core SRAM1, we need to keep up X/FC1 core's block_counter_rm
+                cores[core_idx].calculator_and_array.array_idx_rm_advance_keep(array_idx_gb[gb_idx])
+    else: 
+        # the result takes the bus only when it has space in GB
+        if global_buffers[gb_idx].space_write(events, "array", 1, "array") and global_buffers[gb_idx].bus_granted(events, "array") and \
+                global_buffers[gb_idx].count_latency(events, "array_latency_counter", global_buffers[gb_idx].latency_count):
+            global_buffers[gb_idx].bus_release("array")
+            global_buffers[gb_idx].space_written("array")
+            global_buffers[gb_idx].array_busy = False
+            global_buffers[gb_idx].array_complete2 = global_buffers[gb_idx].array_complete1
+            events.record(global_buffers[gb_idx], event_trace.ARRAY_GB, event_trace.END, cores[core_idx])
+            global_buffers[gb_idx].statistics.count_transfer("array", 1)
+            # all data finish transferring
+            cores[core_idx].calculator_and_array.update_to_null(array_idx_gb[gb_idx])
+            if core_num == 1:
+                if (stage > 6) and (array_idx_gb[gb_idx] == mac_lane - 1) and (gb_idx == 3):
+                    # part of a block completes, we may need to update state matrix of A
+                    # written when the second last data of array(out of mac_lane data) finishes transferring into GB
+                    global_buffers[gb_idx].update_to_a1(cores[core_idx].calculator_and_array.block_counter_cal)
+            elif core_num == 8:
+                if (gb_idx == 3) or (gb_idx == 6):
+                    if array_idx_gb[gb_idx] == (mac_lane - 1):
+                        global_buffers[gb_idx].update_to_a2(a_row_idx[a_idx_idx], a_col_idx[a_idx_idx])
+                if gb_idx == 5:
+                    # case that X core is transferring remaining X result matrix to LP's GB
+                    global_buffers[gb_idx].update_blocknum_counter_from_last_core(cores[core_idx].calculator_and_array.block_counter_rm, cores[core_idx].sram1.blocknum_col_std)
+                if gb_idx == 7:
+                    # case that FC1 core is transferring remaining FC1 result matrix to FC2's GB
+                    if array_idx_gb[gb_idx] == (mac_lane - 1):
+                        # result block written into GB5/GB7 increments
+                        global_buffers[gb_idx].blocknum_counter_from_last_core = cores[core_idx].calculator_and_array.block_counter_rm
+
+def gb_layernorm_data_transfer(events, global_buffers, layernorm, gb_idx, gb_idx_layernorm_start, gb_idx_layernorm_end):
+    if layernorm[0].busy == False:
+        if (global_buffers[gb_idx].layernorm_busy == False):
+            (gb_idx_layernorm_start[0], gb_idx_layernorm_end[0]) = global_buffers[gb_idx].find_layernorm_null_target()
+            if global_buffers[gb_idx].layernorm_busy:
+                events.activate()
+                events.record(global_buffers[gb_idx], event_trace.GB_LAYERNORM, event_trace.BEGIN, layernorm[0])
+                global_buffers[gb_idx].bus_request(events, "layernorm")
+        elif (global_buffers[gb_idx].layernorm_busy == True):
+            if global_buffers[gb_idx].bus_granted(events, "layernorm") and global_buffers[gb_idx].count_latency(events, "layernorm_latency_counter", global_buffers[gb_idx].latency_count):
+                global_buffers[gb_idx].bus_release("layernorm")
+                global_buffers[gb_idx].layernorm_busy = False
+                events.record(global_buffers[gb_idx], event_trace.GB_LAYERNORM, event_trace.END, layernorm[0])
+                global_buffers[gb_idx].statistics.count_transfer("layernorm", gb_idx_layernorm_end[0] - gb_idx_layernorm_start[0] + 1)
+                layernorm[0].update_to_ready(gb_idx_layernorm_start[0], gb_idx_layernorm_end[0])
+                global_buffers[gb_idx].space_read(gb_idx_layernorm_end[0] - gb_idx_layernorm_start[0] + 1, "block")
+                global_buffers[gb_idx].update_to_cal(gb_idx_layernorm_start[0], gb_idx_layernorm_end[0], "ln")
+
+def layernorm_coresram1_data_transfer(events, cores, layernorm, core_idx, prev_core_idx, gb_idx_layernorm_start, gb_idx_layernorm_end, ffns=()):
+    """ ffns: cores of the other feed-forward slices, the data is broadcast to their SRAM1 too, see FFNSlice """
+
+    if (layernorm[0].ln_complete() or layernorm[0].removing_to_core_busy) and (layernorm[0].partial_removing_to_core_busy == False):
+        # only if LN calculation of a row is complete and next core's SRAM has vacancy can we transfer LN's data into next core's SRAM
+        
+        start = layernorm[0].remove_start
+        end = layernorm[0].remove_end if layernorm[0].remove_end < layernorm[0].state_matrix.shape[0] else layernorm[0].state_matrix.shape[0] - 1
+        if all(targets[core_idx].sram1.check_remove_state(layernorm[0].row_idx, start, end) for targets in [cores, *ffns]):
+            events.activate()
+            events.record(layernorm[0], event_trace.LAYERNORM_SRAM1, event_trace.BEGIN, cores[core_idx])
+            (gb_idx_layernorm_start[0], gb_idx_layernorm_end[0]) = layernorm[0].find_removing_target()
+    elif layernorm[0].partial_removing_to_core_busy:
+        if layernorm[0].count_latency(events, "sram_latency_counter", cores[core_idx].sram1.latency_count):
+            layernorm[0].partial_removing_to_core_busy = False
+            events.record(layernorm[0], event_trace.LAYERNORM_SRAM1, event_trace.END, cores[core_idx])
+            for targets in [cores, *ffns]:
+                targets[core_idx].statistics.count_energy("sram1_write", (gb_idx_layernorm_end[0] - gb_idx_layernorm_start[0] + 1) * cores[core_idx].calculator_and_array.mac_lane ** 2)
+                targets[core_idx].sram1.update_to_ready_from_ln(layernorm[0].row_idx, cores[prev_core_idx].sram1.blocknum_row_std, gb_idx_layernorm_start[0], gb_idx_layernorm_end[0])
+            layernorm[0].update_to_null(gb_idx_layernorm_start[0], gb_idx_layernorm_end[0])   # row_idx increment
+
+def corearray_coresram_data_transfer(events, cores, prev_core_idx, nxt_core_idx, array_idx_gb, mac_lane, sram, matrix):
+    """ 
+    Data transfer from previous core array to next core SRAM
+    NOTE: here we assume Q/K/V won't exceed SRAM1/2's capacity 
+    """
+    assert((sram == 1) or (sram == 2))
+    if cores[prev_core_idx].calculator_and_array.array_sram_busy == False:   
+        array_idx_gb[prev_core_idx] = cores[prev_core_idx].calculator_and_array.find_array_target("sram")
+        if cores[prev_core_idx].calculator_and_array.array_sram_busy:
+            events.activate()
+            events.record(cores[prev_core_idx], event_trace.ARRAY_SRAM, event_trace.BEGIN, cores[nxt_core_idx])
+            cores[prev_core_idx].calculator_and_array.update_to_removing(array_idx_gb[prev_core_idx])
+    else:
+        if cores[prev_core_idx].calculator_and_array.count_latency(events, "sram_latency_counter", cores[nxt_core_idx].sram1.latency_count):
+            cores[prev_core_idx].calculator_and_array.array_sram_busy = False
+            events.record(cores[prev_core_idx], event_trace.ARRAY_SRAM, event_trace.END, cores[nxt_core_idx])
+            cores[nxt_core_idx].statistics.count_energy("sram" + str(sram) + "_write", mac_lane)
+            cores[prev_core_idx].calculator_and_array.update_to_null(array_idx_gb[prev_core_idx])
+            if array_idx_gb[prev_core_idx] == (mac_lane - 1):
+                if sram == 1:
+                    cores[nxt_core_idx].sram1.array_block_counter += 1
+                    
+                    if matrix == "A'*V":
+                        if (cores[nxt_core_idx].sram1.array_block_counter % 2) == 0:
+                            cores[nxt_core_idx].sram1.update_to_ready_from_array_av(cores[prev_core_idx].sram1.blocknum_col_std)
+                        if (cores[prev_core_idx].calculator_and_array.block_counter_rm % cores[prev_core_idx].sram1.blocknum_col_std) == 0:
+                            # if a mac_lane row of data finishes calcualtion, we need to update all row in next core's sram
+                            cores[nxt_core_idx].sram1.update_to_ready_from_array_abrupt(cores[prev_core_idx].sram1.blocknum_col_std)
+                    else:
+                        if (cores[nxt_core_idx].sram1.array_block_counter % 2) == 0:
+                            cores[nxt_core_idx].sram1.update_to_ready_from_array((int(cores[nxt_core_idx].sram1.array_block_counter // 2) - 1))
+                    
+                    if cores[nxt_core_idx].sram1.array_block_counter == cores[prev_core_idx].calculator_and_array.block_cnt:
+                        cores[nxt_core_idx].sram1.write_complete = True
+
+                else:
+                    # print("in corearray_coresram_data_transfer sram2.array_block_counter: " + str(cores[nxt_core_idx].sram2.array_block_counter))
+                    cores[nxt_core_idx].sram2.array_block_counter += 1
+                    if matrix == "K":
+                        if (cores[nxt_core_idx].sram2.array_block_counter % 2) == 0:
+                            cores[nxt_core_idx].sram2.update_to_ready_from_array(cores[prev_core_idx].sram2.blocknum_col_std, cores[prev_core_idx].calculator_and_array.block_cnt, matrix)
+                    elif matrix == "V":
+                        if (((cores[nxt_core_idx].sram2.array_block_counter - 1) // int(cores[nxt_core_idx].sram2.logic_sram_col_cnt_std // cores[nxt_core_idx].calculator_and_array.mac_lane)) % 2 == 1):
+                            cores[nxt_core_idx].sram2.update_to_ready_from_array(cores[prev_core_idx].sram2.blocknum_col_std, cores[prev_core_idx].calculator_and_array.block_cnt, matrix)
+                    else:
+                        assert(0)
+
+def gb_softmax_data_transfer(events, global_buffers, softmax, idx, gb_idx_softmax_start, gb_idx_softmax_end):
+    if (global_buffers[idx].softmax_busy == False) and (softmax[0].busy == False):
+        (gb_idx_softmax_start[0], gb_idx_softmax_end[0]) = global_buffers[idx].find_softmax_null_target()
+        if global_buffers[idx].softmax_busy:
+            events.activate()
+            events.record(global_buffers[idx], event_trace.GB_SOFTMAX, event_trace.BEGIN, softmax[0])
+            global_buffers[idx].bus_request(events, "softmax")
+    elif (global_buffers[idx].softmax_busy == True) and (softmax[0].busy == False):
+        if global_buffers[idx].bus_granted(events, "softmax") and global_buffers[idx].count_latency(events, "softmax_latency_counter", global_buffers[idx].latency_count):
+            global_buffers[idx].bus_release("softmax")
+            global_buffers[idx].softmax_busy = False
+            events.record(global_buffers[idx], event_trace.GB_SOFTMAX, event_trace.END, softmax[0])
+            global_buffers[idx].statistics.count_transfer("softmax", gb_idx_softmax_end[0] - gb_idx_softmax_start[0] + 1)
+            # softmax[0].busy = True
+            softmax[0].update_to_a(gb_idx_softmax_start[0], gb_idx_softmax_end[0])
+            global_buffers[idx].space_read(gb_idx_softmax_end[0] - gb_idx_softmax_start[0] + 1, "block")
+            global_buffers[idx].update_to_cal(gb_idx_softmax_start[0], gb_idx_softmax_end[0], "softmax")
+
+def softmax_gb_data_transfer(events, global_buffers, softmax, idx, gb_idx_softmax_start, gb_idx_softmax_end):
+    if (global_buffers[idx].softmax_busy == False) and softmax[0].busy and softmax[0].done:
+        events.activate()
+        events.record(global_buffers[idx], event_trace.SOFTMAX_GB, event_trace.BEGIN, softmax[0])
+        (gb_idx_softmax_start[0], gb_idx_softmax_end[0]) = global_buffers[idx].find_softmax_res_target()
+        if global_buffers[idx].space_write(None, "softmax", gb_idx_softmax_end[0] - gb_idx_softmax_start[0] + 1, "block"):
+            global_buffers[idx].bus_request(events, "softmax")
+    elif (global_buffers[idx].softmax_busy == True) and softmax[0].busy and softmax[0].done:
+        if global_buffers[idx].space_write(events, "softmax", gb_idx_softmax_end[0] - gb_idx_softmax_start[0] + 1, "block") and \
+                global_buffers[idx].bus_granted(events, "softmax") and \
+                global_buffers[idx].count_latency(events, "softmax_latency_counter", global_buffers[idx].latency_count):
+            global_buffers[idx].bus_release("softmax")
+            global_buffers[idx].space_written("softmax")
+            global_buffers[idx].softmax_busy = False
+            events.record(global_buffers[idx], event_trace.SOFTMAX_GB, event_trace.END, softmax[0])
+            global_buffers[idx].statistics.count_transfer("softmax", gb_idx_softmax_end[0] - gb_idx_softmax_start[0] + 1)
+            # softmax[0].busy possibly updates to True
+            softmax[0].update_to_null(gb_idx_softmax_start[0], gb_idx_softmax_end[0])
+            global_buffers[idx].update_to_asoftmax(gb_idx_softmax_start[0], gb_idx_softmax_end[0])
+
+def softmax_coresram1_data_transfer(events, global_buffers, softmax, cores, gb_idx, core_idx, gb_idx_softmax_start, gb_idx_softmax_end):
+    if (global_buffers[gb_idx].softmax_busy == False) and softmax[0].busy and softmax[0].done:
+        events.activate()
+        events.record(softmax[0], event_trace.SOFTMAX_SRAM1, event_trace.BEGIN, cores[core_idx])
+        (gb_idx_softmax_start[0], gb_idx_softmax_end[0]) = global_buffers[gb_idx].find_softmax_res_target()
+    elif (global_buffers[gb_idx].softmax_busy == True) and softmax[0].busy and softmax[0].done:
+        if global_buffers[gb_idx].count_latency(events, "softmax_latency_counter", cores[core_idx].sram1.latency_count):
+            global_buffers[gb_idx].softmax_busy = False
+            events.record(softmax[0], event_trace.SOFTMAX_SRAM1, event_trace.END, cores[core_idx])
+            cores[core_idx].statistics.count_energy("sram1_write", (gb_idx_softmax_end[0] - gb_idx_softmax_start[0] + 1) * cores[core_idx].calculator_and_array.mac_lane ** 2)
+            global_buffers[gb_idx].statistics.count_transfer("softmax")
+            # softmax[0].busy possibly updates to True
+            softmax[0].update_to_null(gb_idx_softmax_start[0], gb_idx_softmax_end[0])
+            cores[core_idx].sram1.update_to_ready_from_softmax(global_buffers[gb_idx].a_row, gb_idx_softmax_start[0], gb_idx_softmax_end[0])
+            global_buffers[gb_idx].update_to_asoftmax(gb_idx_softmax_start[0], gb_idx_softmax_end[0])
+
+
+def softmax_data_transfer(events, cores, global_buffers, softmax, use_sram, gb_idx_softmax_start, gb_idx_softmax_end):
+    """ Data transfer from GB3 to softmax and transfer back to core4's SRAM1/GB3, 8-core case """
+
+    if global_buffers[3].transfer_to_softmax_complete() == False: 
+        # Executing softmax for A
+        gb_softmax_data_transfer(events, global_buffers, softmax, 3, gb_idx_softmax_start, gb_idx_softmax_end)
+
+    if global_buffers[3].softmax_complete() == False:
+        if use_sram:
+            softmax_coresram1_data_transfer(events, global_buffers, softmax, cores, 3, 4, gb_idx_softmax_start, gb_idx_softmax_end)
+        else:
+            if global_buffers[3].a_row < (cores[4].sram1.height // cores[4].sram1.subsum_cnt_std):
+                # if core SRAM still has vacancy for A', transfer A' data from softmax to core SRAM1
+                softmax_coresram1_data_transfer(events, global_buffers, softmax, cores, 3, 4, gb_idx_softmax_start, gb_idx_softmax_end)
+            else:
+                # if core SRAM is full, transfer the reset of A' data to GB
+                softmax_gb_data_transfer(events, global_buffers, softmax, 3, gb_idx_softmax_start, gb_idx_softmax_end)
+
+def softmax_turn(softmax_owner, head, global_buffer):
+    """ 
+    Whether head can use the softmax unit during this tick, the softmax is shared by all heads in the multi-head mode
+
+    The softmax calculates a row of A at a time, a head holds it from the first transfer of a row until the row of A'
+    is transferred back, i.e. the row of A in its GB3 advances
+    softmax_owner: [head holding the softmax or None, row of A it holds]
+    global_buffer: GB3 of head
+    """
+
+    if softmax_owner[0] == head:
+        if global_buffer.a_row > softmax_owner[1]:
+            softmax_owner[0] = None
+        return True
+
+    return softmax_owner[0] is None
+
+def softmax_acquire(softmax_owner, head, global_buffer):
+    """ Called after the softmax transfers of head, head holds the softmax if it starts transferring a row to it """
+
+    if (softmax_owner[0] is None) and global_buffer.softmax_busy:
+        softmax_owner[0] = head
+        softmax_owner[1] = global_buffer.a_row
+
+def softmax_cal(events, softmax):
+    """ Execution of Softmax """
+
+    if softmax[0].calculation():
+        softmax[0].statistics.util_counter += 1
+        events.follow(softmax[0].statistics, "util_counter")
+        if softmax[0].count_latency(events, "latency_counter", softmax[0].latency_count):
+            softmax[0].update_to_asoftmax()
+            softmax[0].statistics.count_energy("softmax", softmax[0].blocknum_col)
+            events.record(softmax[0], event_trace.SOFTMAX_ROW, event_trace.INSTANT)
+
+
+def layernorm_cal(events, layernorm):
+    """ Execution of Layernorm """
+
+    if layernorm[0].calculation():
+        if layernorm[0].busy == False:
+            events.activate()
+            layernorm[0].busy = True
+        layernorm[0].statistics.util_counter += 1
+        events.follow(layernorm[0].statistics, "util_counter")
+        if layernorm[0].count_latency(events, "latency_counter", layernorm[0].latency_count):
+            layernorm[0].update_to_xlayernorm()
+            layernorm[0].statistics.count_energy("layernorm", layernorm[0].blocknum_col)
+            events.record(layernorm[0], event_trace.LAYERNORM_ROW, event_trace.INSTANT)
+
+# every core is free, see encoder_block()
+ALL_FREE = [True] * 8
+
+def attention_head_step(events, head, h, softmax, softmax_owner, gb5, gb5_array_owner, use_sram, gb_idx_softmax_start, gb_idx_softmax_end, mac_lane):
+    """ 
+    One tick of the replicated head h(AttentionHead) in the multi-head mode, same as head 0 in the 8-core case of simulating()
+
+    softmax_owner: see softmax_turn()
+    gb5: the shared GB5 of LP
+    gb5_array_owner: [head transferring A'*V result through the array channel of GB5 or None]
+
+    A head shares the cores with the heads before it on the same pipeline, it starts when the Q/K/V cores complete
+    head.prev, and the transfers into a core are held until the core completes head.prev, see encoder_block()
+    """
+
+    cores = head.cores
+    global_buffers = head.global_buffers
+
+    free = ALL_FREE
+    if head.prev is not None:
+        free = [core.calculator_and_array.complete for core in head.prev]
+        if all(free):
+            head.prev = None
+        elif (free[0] and free[1] and free[2]) == False:
+            return
+
+    """ Data transfer between GB and core SRAM/Array """
+    if (head.qkv_stage == 0) or (head.qkv_stage == 1):
+        for i in range(3):
+            if free[i] == False:
+                continue
+            if global_buffers[i].sram1_complete2 == False:
+                # Read X data from GB to core sram1 for X * W_Q/W_K/W_V calculation
+                coresram1_gb_data_transfer(events, cores, global_buffers, i, i, head.sram1_idx_gb_start, head.sram1_idx_gb_end)
+            if global_buffers[i].sram2_complete2 == False:
+                # Read W_Q/W_K/W_V data from GB to core sram1 for X * W_Q/W_K/W_V calculation
+                coresram2_gb_data_transfer(events, cores, global_buffers, i, i, head.rownum_sram2_idx_gb_start, head.rownum_sram2_idx_gb_end, head.colnum_sram2_idx_gb_start, head.colnum_sram2_idx_gb_end)
+
+    if (head.a_stage == 0) or (head.a_stage == 1) or (head.a_stage == 2):
+        if global_buffers[3].array_complete2 == False:
+            # Transfer A data to GB/core SRAM
+            corearray_gb_data_transfer(events, cores, global_buffers, 3, 3, head.array_idx_gb, 7, mac_lane, 8, head.a_row_idx, head.a_col_idx, 0)
+
+    if (head.x_stage == 0) or (head.x_stage == 1) or (head.x_stage == 2):
+        if (use_sram == False) and free[4]:
+            if global_buffers[4].sram1_complete2 == False:
+                # Read A' data from GB to core sram1 for A' * V calculation
+                coresram1_gb_data_transfer_a(events, cores, global_buffers, 4, 4, head.sram1_idx_gb_start, head.sram1_idx_gb_end)
+
+    """ Data transfer to the shared softmax and transfer back to GB/core SRAM """
+    if free[4] and softmax_turn(softmax_owner, h, global_buffers[3]):
+        softmax_data_transfer(events, cores, global_buffers, softmax, use_sram, gb_idx_softmax_start, gb_idx_softmax_end)
+        softmax_acquire(softmax_owner, h, global_buffers[3])
+
+    """ Data transfer between previous core's array and next cores SRAM """
+    if (head.qkv_stage == 0) or (head.qkv_stage == 1) or (head.a_stage == 0) or (head.a_stage == 1):
+        if (cores[3].sram1.write_complete == False) and free[3]:
+            # Read Q from core0 to core3 sram1 for Q * K calculation
+            corearray_coresram_data_transfer(events, cores, 0, 3, head.array_idx_gb, mac_lane, 1, "Q")
+        if (cores[3].sram2.write_complete == False) and free[3]:
+            # Read K from core1 to core3 sram2 for Q * K calculation
+            corearray_coresram_data_transfer(events, cores, 1, 3, head.array_idx_gb, mac_lane, 2, "K")
+        if (cores[4].sram2.write_complete == False) and free[4]:
+            # Read V from core1 to core4 sram2 for A' * V calculation
+            corearray_coresram_data_transfer(events, cores, 2, 4, head.array_idx_gb, mac_lane, 2, "V")
+
+    """ A'*V result into GB5 for LP, through the array channel of GB5 shared with the other heads """
+    if global_buffers[5].array_complete2 == False:
+        if global_buffers[5].array_busy or ((gb5.array_busy == False) and (gb5_array_owner[0] is None)):
+            corearray_gb_data_transfer(events, cores, global_buffers, 4, 5, head.array_idx_gb, 7, mac_lane, 8)
+            gb5_array_owner[0] = h if global_buffers[5].array_busy else None
+            if gb5.head_counters[h] != global_buffers[5].blocknum_counter_from_last_core:
+                gb5.update_head_counter(h, global_buffers[5].blocknum_counter_from_last_core)
+
+    """ Q/K/V Calculation """
+    if (head.qkv_stage == 0):
+        read_from_core_sram(events, cores, head.qkv_stage, 0)
+        read_from_core_sram(events, cores, head.qkv_stage, 1)
+        head.qkv_stage = read_from_core_sram(events, cores, head.qkv_stage, 2)
+    elif (head.qkv_stage == 1):
+        dot_production(events, cores, head.qkv_stage, head.count, 0, 8)
+        dot_production(events, cores, head.qkv_stage, head.count, 1, 8)
+        head.qkv_stage = dot_production(events, cores, head.qkv_stage, head.count, 2, 8)
+
+    """ Q * K Calculation """
+    if (head.a_stage == 0):
+        head.a_stage = read_from_core_sram(events, cores, head.a_stage, 3, True)
+    elif (head.a_stage == 1):
+        head.a_stage = dot_production(events, cores, head.a_stage, head.count, 3, 8, head.a_row_idx, head.a_col_idx, 0)
+
+    """ A' * V Calculation """
+    if (head.x_stage == 0):
+        head.x_stage = read_from_core_sram(events, cores, head.x_stage, 4)
+    elif (head.x_stage == 1):
+        head.x_stage = dot_production(events, cores, head.x_stage, head.count, 4, 8)
+
+def ffn_slice_step(events, ffn, free, blocknum_col_fc1, blocknum_row_sram1_fc2, mac_lane):
+    """
+    One tick of the feed-forward slice ffn(FFNSlice), same as FC1 and FC2 of encoder_block()
+
+    free: whether each core of the slice is free, see encoder_block()
+    The layernorm result is broadcast to FC1 of the slice by encoder_block()
+    """
+
+    cores = ffn.cores
+    global_buffers = ffn.global_buffers
+
+    """ Data transfer between GB and core SRAM/Array """
+    if ((ffn.fc1_stage == 0) or (ffn.fc1_stage == 1)) and free[6]:
+        if global_buffers[6].sram2_complete2 == False:
+            # Transfer the slice of the weight matrix from GB to core6 for FC1 calculation
+            coresram2_gb_data_transfer(events, cores, global_buffers, 6, 6, ffn.rownum_sram2_idx_gb_start, ffn.rownum_sram2_idx_gb_end, ffn.colnum_sram2_idx_gb_start, ffn.colnum_sram2_idx_gb_end)
+
+    if ((ffn.fc2_stage == 0) or (ffn.fc2_stage == 1)) and free[7]:
+        if global_buffers[7].sram1_complete2 == False:
+            # Transfer remaining X_FC2 from GB to core7 for FC2 calculation
+            coresram1_gb_data_transfer(events, cores, global_buffers, 7, 7, ffn.sram1_idx_gb_start, ffn.sram1_idx_gb_end, mac_lane, 8)
+        if global_buffers[7].sram2_complete2 == False:
+            # Transfer the slice of the weight matrix for FC2 calculation
+            coresram2_gb_data_transfer(events, cores, global_buffers, 7, 7, ffn.rownum_sram2_idx_gb_start, ffn.rownum_sram2_idx_gb_end, ffn.colnum_sram2_idx_gb_start, ffn.colnum_sram2_idx_gb_end)
+
+    if (ffn.fc2_stage == 0) or (ffn.fc2_stage == 1) or (ffn.fc2_stage == 2):
+        # Transfer the partial FC2 result from core array into GB
+        if global_buffers[8].array_complete2 == False:
+            corearray_gb_data_transfer(events, cores, global_buffers, 7, 8, ffn.array_idx_gb, 7, mac_lane, 8)
+
+    """ Data transfer between FC1's array and FC2's SRAM """
+    if (ffn.fc1_stage == 0) or (ffn.fc1_stage == 1) or (ffn.fc2_stage == 0) or (ffn.fc2_stage == 1):
+        if (cores[7].sram1.write_complete == False) and free[7]:
+            if cores[6].calculator_and_array.block_counter_rm < blocknum_row_sram1_fc2 * blocknum_col_fc1:
+                corearray_coresram_data_transfer(events, cores, 6, 7, ffn.array_idx_gb_copy, mac_lane, 1, "FC1")
+            elif (cores[6].calculator_and_array.block_counter_rm == blocknum_row_sram1_fc2 * blocknum_col_fc1) and (cores[6].calculator_and_array.array_state_matrix[-1] == utils.REMOVING):
+                corearray_coresram_data_transfer(events, cores, 6, 7, ffn.array_idx_gb_copy, mac_lane, 1, "FC1")
+            else:
+                corearray_gb_data_transfer(events, cores, global_buffers, 6, 7, ffn.array_idx_gb, 7, mac_lane, 8)
+
+    """ FC1 calculation """
+    if (ffn.fc1_stage == 0):
+        ffn.fc1_stage = read_from_core_sram(events, cores, ffn.fc1_stage, 6)
+    elif (ffn.fc1_stage == 1):
+        ffn.fc1_stage = dot_production(events, cores, ffn.fc1_stage, ffn.count, 6, 8)
+
+    """ FC2 calculation """
+    if (ffn.fc2_stage == 0):
+        ffn.fc2_stage = read_from_core_sram(events, cores, ffn.fc2_stage, 7)
+    elif (ffn.fc2_stage == 1):
+        ffn.fc2_stage = dot_production(events, cores, ffn.fc2_stage, ffn.count, 7, 8)
+
+def get_block_name(args, b):
+    """ Name of blocks[b] of simulating() in the logs and the event trace """
+
+    (image, block) = divmod(b, args.block_num)
+    if args.image_num == 1:
+        return "block" + str(block)
+    elif args.block_num == 1:
+        return "image" + str(image)
+    else:
+        return "image" + str(image) + ".block" + str(block)
+
+def fc2_global_buffers(block):
+    """ GB8 of the block and of its feed-forward slices """
+
+    return [block.global_buffers[8]] + [ffn.global_buffers[8] for ffn in block.ffns]
+
+def block_complete(block):
+    """ Whether the FC2 result of the block(EncoderBlock) is written """
+
+    return all(fc2_gb.array_complete2 for fc2_gb in fc2_global_buffers(block))
+
+def x_ready(global_buffer, source, blocknum_col_fc2):
+    """
+    Whether FC2 of the source block has written all rows of X that the next GB->SRAM1 transfer of global_buffer reads
+
+    global_buffer: GB0/GB1/GB2 of the block
+    source: the block(EncoderBlock) whose FC2 result is X of this block, None if X is the input of the model
+    """
+
+    if source is None:
+        return True
+    if block_complete(source):
+        return True
+
+    # FC2 produces its result row by row, a row is written when all its blocks land in GB8, the partial results of all
+    # feed-forward slices are needed
+    rows_ready = min((fc2_gb.array_data_counter - (1 if fc2_gb.array_busy else 0)) // blocknum_col_fc2 for fc2_gb in fc2_global_buffers(source))
+    # rows of the band of data starting from the current one, see GlobalBuffer.find_sram_target()
+    row = global_buffer.row[0] + (global_buffer.rownum1 - 1) * global_buffer.sram1_rownum_cnt
+    last_row = row + (global_buffer.col[0] + global_buffer.gb_sram_bandwidth - 1) // global_buffer.sram_subsum_cnt
+
+    return rows_ready > min(last_row, global_buffer.blocknum_row_cnt - 1)
+
+def encoder_block(events, args, block, prev, source, use_sram, time_quantum, blocknum_row, blocknum_col_subx, blocknum_col_fc1, blocknum_col_fc2,
+                  blocknum_row_sram1_lp, blocknum_row_sram1_fc2, folds=None):
+    """ 
+    Simulation of an encoder block in the 8-core case, a generator which simulates a tick every time it's resumed
+
+    block: EncoderBlock of the units of the block
+    prev: the block simulated on the same units before this block, None for the first block
+    source: see x_ready()
+    folds: template cores on the same core as each template core in the order they run, None if no core is folded, see mapper
+
+    A unit only starts to work on this block after it completes its work of prev. A unit only calculates the data
+    transferred into it, so the transfers into a unit are held until the unit is free:
+    core 4 frees the softmax(the last A' is consumed by A'*V) and core 6 frees the layernorm(the last row is consumed by FC1)
+    A folded template core is free when the template cores before it on the same core complete this block and all of
+    them complete prev.
+    """
+
+    cores = block.cores
+    global_buffers = block.global_buffers
+    softmax = block.softmax
+    layernorm = block.layernorm
+    heads = block.heads
+    ffns = block.ffns
+
+    # stall for one cycle between different calculation stages
+    count = [0]
+
+    qkv_stage = 0
+    a_stage = 0
+    x_stage = 0
+    lp_stage = 0
+    fc1_stage = 0
+    fc2_stage = 0
+
+    sram1_idx_gb_start = [0] * 8
+    sram1_idx_gb_end = [0] * 8
+
+    rownum_sram2_idx_gb_start = [0] * 8
+    rownum_sram2_idx_gb_end = [0] * 8
+    colnum_sram2_idx_gb_start = [0] * 8
+    colnum_sram2_idx_gb_end = [0] * 8
+
+    array_idx_gb = [0] * 9
+    # for solving conflict: two function use 6 to index array_idx_gb
+    array_idx_gb_copy = [0] * 7
+    # layernorm
+    gb_idx_layernorm_start = [0]
+    gb_idx_layernorm_end = [0]
+    # softmax
+    gb_idx_softmax_start = [0]
+    gb_idx_softmax_end = [0]
+
+    # for recording which block of a matrix is transferring from array to GB/core SRAM
+    a_row_idx = [0] * 2
+    a_col_idx = [0] * 2
+
+    # head holding the softmax and the row of A it holds
+    softmax_owner = [None, 0]
+    # head transferring A'*V result through the array channel of GB5
+    gb5_array_owner = [None]
+
+    # whether each core and each core of the feed-forward slices completes its computation of the previous block
+    prev_free = ALL_FREE
+    ffn_free = [ALL_FREE] * len(ffns)
+
+    while True:
+        if prev is not None:
+            prev_free = [core.calculator_and_array.complete for core in prev.cores]
+            ffn_free = [[(core is None) or core.calculator_and_array.complete for core in ffn.cores] for ffn in prev.ffns]
+            if all(prev_free) and all(all(cores_free) for cores_free in ffn_free):
+                prev = None
+        # whether each core is free
+        free = prev_free
+        if folds is not None:
+            free = [all(prev_free[j] for j in fold) and all(cores[j].calculator_and_array.complete for j in fold if j < i) for (i, fold) in enumerate(folds)]
+
+        """ 
+        qkv_stage 0/1: Q/K/V calculation
+        a_stage 0/1: Q*K calculation
+        x_stage 0/1: A'*V calculation
+        fc1_stage 0/1: FC1 calculation
+        fc2_stage 0/1: FC2 calculation
+        """
+
+        """ Data transfer between GB and core SRAM/Array """
+        if (qkv_stage == 0) or (qkv_stage == 1):
+            for i in range(3):
+                if free[i] == False:
+                    continue
+                ready = (global_buffers[i].sram1_complete2 == False) and x_ready(global_buffers[i], source, blocknum_col_fc2)
+                if (global_buffers[i].sram1_complete2 == False) and (global_buffers[i].sram1_busy or ready):
+                    # Read X data from GB to core sram1 for X * W_Q/W_K/W_V calculation
+                    coresram1_gb_data_transfer(events, cores, global_buffers, i, i, sram1_idx_gb_start, sram1_idx_gb_end, issue=ready)
+        
+                if global_buffers[i].sram2_complete2 == False:
+                    # Read W_Q/W_K/W_V data from GB to core sram1 for X * W_Q/W_K/W_V calculation
+                    coresram2_gb_data_transfer(events, cores, global_buffers, i, i, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+        
+        if (a_stage == 0) or (a_stage == 1) or (a_stage == 2):
+            if global_buffers[3].array_complete2 == False: 
+                # Transfer A data to GB/core SRAM                                   FIXME fix the stage judgement in this function
+                corearray_gb_data_transfer(events, cores, global_buffers, 3, 3, array_idx_gb, 7, args.MAC_lane, 8, a_row_idx, a_col_idx, 0)
+        
+        if (x_stage == 0) or (x_stage == 1) or (x_stage == 2):
+            if (use_sram == False) and free[4]:
+                # if not all A' data can be stored in core SRAM, we need to update core SRAM data
+                if global_buffers[4].sram1_complete2 == False:
+                    # Read A' data from GB to core sram1 for A' * V calculation
+                    coresram1_gb_data_transfer_a(events, cores, global_buffers, 4, 4, sram1_idx_gb_start, sram1_idx_gb_end)   
+
+        if ((lp_stage == 0) or (lp_stage == 1)) and free[5]:
+            if global_buffers[5].sram1_complete2 == False:
+                # Transfer remaining X from GB to core5 for LP calulation
+                coresram1_gb_data_transfer(events, cores, global_buffers, 5, 5, sram1_idx_gb_start, sram1_idx_gb_end, args.MAC_lane, 8)
+            if global_buffers[5].sram2_complete2 == False:
+                # Transfer Weight matrix for LP calculation
+                coresram2_gb_data_transfer(events, cores, global_buffers, 5, 5, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+
+        if ((fc1_stage == 0) or (fc1_stage == 1)) and free[6]:
+            if global_buffers[6].sram2_complete2 == False:
+                # Transfer Weight Matrix from GB to core6 for FC1 calculation
+                coresram2_gb_data_transfer(events, cores, global_buffers, 6, 6, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+                
+        if ((fc2_stage == 0) or (fc2_stage == 1)) and free[7]:
+            if global_buffers[7].sram1_complete2 == False:
+                # Transfer remaining X_FC2 from GB to core7 for FC2 calculation
+                coresram1_gb_data_transfer(events, cores, global_buffers, 7, 7, sram1_idx_gb_start, sram1_idx_gb_end, args.MAC_lane, 8)
+            if global_buffers[7].sram2_complete2 == False:
+                # Transfer Weight Matrix for FC2 calculation
+                coresram2_gb_data_transfer(events, cores, global_buffers, 7, 7, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+        
+        if (lp_stage == 0) or (lp_stage == 1) or (lp_stage == 2):
+            # Transfer LP's result matrix from core array into GB
+            if global_buffers[6].array_complete2 == False:
+                corearray_gb_data_transfer(events, cores, global_buffers, 5, 6, array_idx_gb, 7, args.MAC_lane, 8, a_row_idx, a_col_idx, 1)
+
+        if (fc2_stage == 0) or (fc2_stage == 1) or (fc2_stage == 2):
+            # Transfer FC2's result matrix from core array into GB
+            if global_buffers[8].array_complete2 == False:
+                corearray_gb_data_transfer(events, cores, global_buffers, 7, 8, array_idx_gb, 7, args.MAC_lane, 8)
+            
+
+        """ Data transfer to softmax and transfer back to GB/core SRAM """
+        if free[4] and softmax_turn(softmax_owner, 0, global_buffers[3]):
+            softmax_data_transfer(events, cores, global_buffers, softmax, use_sram, gb_idx_softmax_start, gb_idx_softmax_end)
+            softmax_acquire(softmax_owner, 0, global_buffers[3])
+
+
+        """ Data transfer from GB to LN and transfer back to core SRAM """
+        if (layernorm[0].row_idx != blocknum_row) and free[6]:
+            # Transfer X(LP result) data in GB to LN
+            gb_layernorm_data_transfer(events, global_buffers, layernorm, 6, gb_idx_layernorm_start, gb_idx_layernorm_end)
+            # only if LN.busy is True will this function be called
+
+        if (cores[6].sram1.write_complete == False) and free[6] and all(cores_free[6] for cores_free in ffn_free): 
+            # Transfer X data for FC1 calculation, the transfer process may be blocked by the FC1 calculation
+            # NOTE: this means when FC1 SRAM is not empty, it won't receive data from LN, therefore there's no need to design a backup GB for FC1 SRAM1
+            layernorm_coresram1_data_transfer(events, cores, layernorm, 6, 5, gb_idx_layernorm_start, gb_idx_layernorm_end, [ffn.cores for ffn in ffns])
+
+
+        """ Data transfer between previous core's array and next cores SRAM """
+        if (qkv_stage == 0) or (qkv_stage == 1) or (a_stage == 0) or (a_stage == 1):
+            if (cores[3].sram1.write_complete == False) and free[3]:
+                # Read Q from core0 to core3 sram1 for Q * K calculation
+                corearray_coresram_data_transfer(events, cores, 0, 3, array_idx_gb, args.MAC_lane, 1, "Q")
+            
+            if (cores[3].sram2.write_complete == False) and free[3]:
+                # Read K from core1 to core3 sram2 for Q * K calculation
+                corearray_coresram_data_transfer(events, cores, 1, 3, array_idx_gb, args.MAC_lane, 2, "K")
+ 
+            if (cores[4].sram2.write_complete == False) and free[4]:
+                # Read V from core1 to core4 sram2 for A' * V calculation
+                corearray_coresram_data_transfer(events, cores, 2, 4, array_idx_gb, args.MAC_lane, 2, "V")
+
+        if (x_stage == 0) or (x_stage == 1) or (lp_stage == 0) or (lp_stage == 1):
+            if (cores[5].sram1.write_complete == False) and free[5]:
+                if cores[4].calculator_and_array.is_next_core_sram_full(blocknum_row_sram1_lp, blocknum_col_subx) == False:
+                    # Read result matrix from core4(A'*V) to core5(LP) for LP calculation
+                    corearray_coresram_data_transfer(events, cores, 4, 5, array_idx_gb, args.MAC_lane, 1, "A'*V")
+                elif (cores[4].calculator_and_array.block_counter_rm == blocknum_row_sram1_lp * blocknum_col_subx) and (cores[4].calculator_and_array.array_state_matrix[-1] == utils.REMOVING): 
+                    corearray_coresram_data_transfer(events, cores, 4, 5, array_idx_gb, args.MAC_lane, 1, "A'*V")
+                elif global_buffers[5].array_busy or (gb5_array_owner[0] is None):
+                    # Read result matrix from core4(A'*V) to core5(LP)'s global buffer, since core5's SRAM is running out of capacity
+                    # in the multi-head mode, wait while another head is using the array channel of GB5
+                    corearray_gb_data_transfer(events, cores, global_buffers, 4, 5, array_idx_gb, 7, args.MAC_lane, 8)
+
+        if (fc1_stage == 0) or (fc1_stage == 1) or (fc2_stage == 0) or (fc2_stage == 1):
+            if (cores[7].sram1.write_complete == False) and free[7]:
+                if cores[6].calculator_and_array.block_counter_rm < blocknum_row_sram1_fc2 * blocknum_col_fc1:
+                    # Read result matrix from core6(FC1) to core7(FC2) for FC2 calculation
+                    corearray_coresram_data_transfer(events, cores, 6, 7, array_idx_gb_copy, args.MAC_lane, 1, "FC1")
+                elif (cores[6].calculator_and_array.block_counter_rm == blocknum_row_sram1_fc2 * blocknum_col_fc1) and (cores[6].calculator_and_array.array_state_matrix[-1] == utils.REMOVING): 
+                    # make sure the last data of last block(that can be written directly into core's SRAM1) is successfully transferred
+                    corearray_coresram_data_transfer(events, cores, 6, 7, array_idx_gb_copy, args.MAC_lane, 1, "FC1")
+                else:
+                    # Read result matrix from core6(FC1) to core7(FC2)'s global buffer, since core6's SRAM is running out of capacity
+                    corearray_gb_data_transfer(events, cores, global_buffers, 6, 7, array_idx_gb, 7, args.MAC_lane, 8)
+                                     
+
+        """ Q/K/V Calculation """
+        if (qkv_stage == 0):
+            """ Reading data from core SRAM """
+            read_from_core_sram(events, cores, qkv_stage, 0)
+            read_from_core_sram(events, cores, qkv_stage, 1)
+            qkv_stage = read_from_core_sram(events, cores, qkv_stage, 2)
+        elif (qkv_stage == 1):
+            """ Dot production """ 
+            dot_production(events, cores, qkv_stage, count, 0, 8)
+            dot_production(events, cores, qkv_stage, count, 1, 8)
+            qkv_stage = dot_production(events, cores, qkv_stage, count, 2, 8)
+
+
+        """ Q * K Calculation """
+        if (a_stage == 0):
+            """ Reading data from core SRAM """
+            a_stage = read_from_core_sram(events, cores, a_stage, 3, True)
+        elif (a_stage == 1):
+            """ Dot production """ 
+            a_stage = dot_production(events, cores, a_stage, count, 3, 8, a_row_idx, a_col_idx, 0)
+
+
+        """ Softmax execution """
+        softmax_cal(events, softmax)
+
+
+        """ A' * V Calculation """
+        if (x_stage == 0):
+            """ Reading data from core SRAM """
+            x_stage = read_from_core_sram(events, cores, x_stage, 4)
+        elif (x_stage == 1):
+            """ Dot production """ 
+            x_stage = dot_production(events, cores, x_stage, count, 4, 8)
+
+
+        """ LayerNorm execution """
+        layernorm_cal(events, layernorm)
+
+
+        """ Linear Projection """
+        if (lp_stage == 0): 
+            """ Read data from core SRAM """
+            lp_stage = read_from_core_sram(events, cores, lp_stage, 5)
+        elif (lp_stage == 1):
+            """ Dot production """
+            lp_stage = dot_production(events, cores, lp_stage, count, 5, 8, a_row_idx, a_col_idx, 1)
+
+
+        """ FC1 calculation """
+        if (fc1_stage == 0):
+            """ Read data from core SRAM """
+            fc1_stage = read_from_core_sram(events, cores, fc1_stage, 6)
+        elif (fc1_stage == 1):
+            """ Dot production """
+            fc1_stage = dot_production(events, cores, fc1_stage, count, 6, 8)
+
+
+        """ FC2 calculation """
+        if (fc2_stage == 0):
+            """ Read data from core SRAM """
+            fc2_stage = read_from_core_sram(events, cores, fc2_stage, 7)
+        elif (fc2_stage == 1):
+            """ Dot production """
+            fc2_stage = dot_production(events, cores, fc2_stage, count, 7, 8)
+
+
+        """ Heads 1..head_num-1 of the multi-head mode """
+        for h in range(1, len(heads) + 1):
+            attention_head_step(events, heads[h - 1], h, softmax, softmax_owner, global_buffers[5], gb5_array_owner, use_sram,
+                                gb_idx_softmax_start, gb_idx_softmax_end, args.MAC_lane)
+            for (ii, core) in enumerate(heads[h - 1].cores):
+                if (heads[h - 1].core_complete_latency[ii] is None) and core.calculator_and_array.complete:
+                    heads[h - 1].core_complete_latency[ii] = utils.metatime_to_ns(events.tick * time_quantum)
+
+        """ Feed-forward slices 1..ffn_split-1 """
+        for (ffn, cores_free) in zip(ffns, ffn_free):
+            ffn_slice_step(events, ffn, cores_free, blocknum_col_fc1, blocknum_row_sram1_fc2, args.MAC_lane)
+            for ii in range(6, 8):
+                if (ffn.core_complete_latency[ii] is None) and ffn.cores[ii].calculator_and_array.complete:
+                    ffn.core_complete_latency[ii] = utils.metatime_to_ns(events.tick * time_quantum)
+
+        yield
+
+def dump_all(cores, global_buffers, softmax, layernorm, stage, latency, core_num):
+    if tracing.enabled(tracing.DEBUG) == False:
+        return
+
+    if core_num == 1:
+        tracing.dump(tracing.DEBUG, "core0", cores[0].dump_state_matrix, "#", "Q*k")
+        tracing.dump(tracing.DEBUG, "core0", cores[0].dump_cal_status, "#")
+        for i in range(5):
+            tracing.dump(tracing.DEBUG, "gb" + str(i), global_buffers[i].dump_rm_status, i)
+        tracing.dump(tracing.DEBUG, "gb3", global_buffers[3].dump_a_state_matrix)
+        tracing.dump(tracing.DEBUG, "softmax", softmax[0].dump_cal_status)
+        # print("stage: " + str(stage))
+        if (stage == 0) or (stage == 1):
+            tracing.log(tracing.DEBUG, "gb0-array complete1: %s", global_buffers[0].array_complete1, unit="gb0")
+            tracing.log(tracing.DEBUG, "gb0-array complete2: %s", global_buffers[0].array_complete2, unit="gb0")
+            tracing.log(tracing.DEBUG, "gb0-sram1 complete1: %s", global_buffers[0].sram1_complete1, unit="gb0")
+            tracing.log(tracing.DEBUG, "gb0-sram1 complete2: %s", global_buffers[0].sram1_complete2, unit="gb0")
+            tracing.log(tracing.DEBUG, "gb0-sram2 complete1: %s", global_buffers[0].sram2_complete1, unit="gb0")
+            tracing.log(tracing.DEBUG, "gb0-sram2 complete2: %s", global_buffers[0].sram2_complete2, unit="gb0")
+            tracing.log(tracing.DEBUG, "gb1-array complete1: %s", global_buffers[1].array_complete1, unit="gb1")
+            tracing.log(tracing.DEBUG, "gb1-array complete2: %s", global_buffers[1].array_complete2, unit="gb1")
+            tracing.log(tracing.DEBUG, "gb1-sram1 complete1: %s", global_buffers[1].sram1_complete1, unit="gb1")
+            tracing.log(tracing.DEBUG, "gb1-sram1 complete2: %s", global_buffers[1].sram1_complete2, unit="gb1")
+            tracing.log(tracing.DEBUG, "gb1-sram2 complete1: %s", global_buffers[1].sram2_complete1, unit="gb1")
+            tracing.log(tracing.DEBUG, "gb1-sram2 complete2: %s", global_buffers[1].sram2_complete2, unit="gb1")
+        elif (stage == 2) or (stage == 3):
+            tracing.log(tracing.DEBUG, "gb1-array complete1: %s", global_buffers[1].array_complete1, unit="gb1")
+            tracing.log(tracing.DEBUG, "gb1-array complete2: %s", global_buffers[1].array_complete2, unit="gb1")
+            tracing.log(tracing.DEBUG, "gb1-sram1 complete1: %s", global_buffers[1].sram1_complete1, unit="gb1")
+            tracing.log(tracing.DEBUG, "gb1-sram1 complete2: %s", global_buffers[1].sram1_complete2, unit="gb1")
+            tracing.log(tracing.DEBUG, "gb1-sram2 complete1: %s", global_buffers[1].sram2_complete1, unit="gb1")
+            tracing.log(tracing.DEBUG, "gb1-sram2 complete2: %s", global_buffers[1].sram2_complete2, unit="gb1")
+            tracing.log(tracing.DEBUG, "gb2-array complete1: %s", global_buffers[2].array_complete1, unit="gb2")
+            tracing.log(tracing.DEBUG, "gb2-array complete2: %s", global_buffers[2].array_complete2, unit="gb2")
+            tracing.log(tracing.DEBUG, "gb2-sram1 complete1: %s", global_buffers[2].sram1_complete1, unit="gb2")
+            tracing.log(tracing.DEBUG, "gb2-sram1 complete2: %s", global_buffers[2].sram1_complete2, unit="gb2")
+            tracing.log(tracing.DEBUG, "gb2-sram2 complete1: %s", global_buffers[2].sram2_complete1, unit="gb2")
+            tracing.log(tracing.DEBUG, "gb2-sram2 complete2: %s", global_buffers[2].sram2_complete2, unit="gb2")
+        elif (stage == 4) or (stage == 5):
+            tracing.log(tracing.DEBUG, "gb2-array complete1: %s", global_buffers[2].array_complete1, unit="gb2")
+            tracing.log(tracing.DEBUG, "gb2-array complete2: %s", global_buffers[2].array_complete2, unit="gb2")
+            tracing.log(tracing.DEBUG, "gb2-sram1 complete1: %s", global_buffers[2].sram1_complete1, unit="gb2")
+            tracing.log(tracing.DEBUG, "gb2-sram1 complete2: %s", global_buffers[2].sram1_complete2, unit="gb2")
+            tracing.log(tracing.DEBUG, "gb2-sram2 complete1: %s", global_buffers[2].sram2_complete1, unit="gb2")
+            tracing.log(tracing.DEBUG, "gb2-sram2 complete2: %s", global_buffers[2].sram2_complete2, unit="gb2")
+            tracing.log(tracing.DEBUG, "gb3-array complete1: %s", global_buffers[3].array_complete1, unit="gb3")
+            tracing.log(tracing.DEBUG, "gb3-array complete2: %s", global_buffers[3].array_complete2, unit="gb3")
+            tracing.log(tracing.DEBUG, "gb3-sram1 complete1: %s", global_buffers[3].sram1_complete1, unit="gb3")
+            tracing.log(tracing.DEBUG, "gb3-sram1 complete2: %s", global_buffers[3].sram1_complete2, unit="gb3")
+            tracing.log(tracing.DEBUG, "gb3-sram2 complete1: %s", global_buffers[3].sram2_complete1, unit="gb3")
+            tracing.log(tracing.DEBUG, "gb3-sram2 complete2: %s", global_buffers[3].sram2_complete2, unit="gb3")
+        tracing.log(tracing.DEBUG, "gb3-array complete1: %s", global_buffers[3].array_complete1, unit="gb3")
+        tracing.log(tracing.DEBUG, "gb3-array complete2: %s", global_buffers[3].array_complete2, unit="gb3")
+        tracing.log(tracing.DEBUG, "gb3-sram1 complete1: %s", global_buffers[3].sram1_complete1, unit="gb3")
+        tracing.log(tracing.DEBUG, "gb3-sram1 complete2: %s", global_buffers[3].sram1_complete2, unit="gb3")
+        tracing.log(tracing.DEBUG, "gb3-sram2 complete1: %s", global_buffers[3].sram2_complete1, unit="gb3")
+        tracing.log(tracing.DEBUG, "gb3-sram2 complete2: %s", global_buffers[3].sram2_complete2, unit="gb3")
+        tracing.log(tracing.DEBUG, "gb4-array complete1: %s", global_buffers[4].array_complete1, unit="gb4")
+        tracing.log(tracing.DEBUG, "gb4-array complete2: %s", global_buffers[4].array_complete2, unit="gb4")
+        tracing.log(tracing.DEBUG, "gb4-sram1 complete1: %s", global_buffers[4].sram1_complete1, unit="gb4")
+        tracing.log(tracing.DEBUG, "gb4-sram1 complete2: %s", global_buffers[4].sram1_complete2, unit="gb4")
+        tracing.log(tracing.DEBUG, "gb4-sram2 complete1: %s", global_buffers[4].sram2_complete1, unit="gb4")
+        tracing.log(tracing.DEBUG, "gb4-sram2 complete2: %s", global_buffers[4].sram2_complete2, unit="gb4")
+        tracing.log(tracing.DEBUG, "core-sram1 complete: %s", cores[0].sram1.cal_complete, unit="core0")
+        tracing.log(tracing.DEBUG, "core-sram2 complete: %s", cores[0].sram2.cal_complete, unit="core0")
+        tracing.log(tracing.DEBUG, "core-calculator complete: %s", cores[0].calculator_and_array.complete, unit="core0")
+    elif core_num == 8:
+        # if global_buffers[0].array_complete2:
+        #     cores[0].dump_state_matrix("FC1")
+        # else:
+        #     cores[0].dump_state_matrix("Q")
+        # if global_buffers[0].sram1_complete1 == False:
+        tracing.dump(tracing.DEBUG, "core0", cores[0].dump_cal_status, "Q")
+        # cores[1].dump_state_matrix("K")
+        tracing.dump(tracing.DEBUG, "core1", cores[1].dump_cal_status, "K")
+        # cores[2].dump_state_matrix("V")
+        tracing.dump(tracing.DEBUG, "core2", cores[2].dump_cal_status, "V")
+        # cores[3].dump_state_matrix("Q*K")
+        # if cores[3].blocknum_cal[1] < 12:
+        tracing.dump(tracing.DEBUG, "core3", cores[3].dump_cal_status, "Q*K")
+        # for i in range(5):
+        #     global_buffers[i].dump_rm_status(i)
+        tracing.log(tracing.DEBUG, "GB3 a state matrix", unit="gb3")
+        tracing.dump(tracing.DEBUG, "gb3", print, global_buffers[3].a_state_matrix)
+        tracing.dump(tracing.DEBUG, "softmax", softmax[0].dump_cal_status)
+        tracing.dump(tracing.DEBUG, "core4", cores[4].dump_state_matrix, "A'*V")
+        tracing.dump(tracing.DEBUG, "core4", cores[4].dump_cal_status, "A'*V")
+        tracing.dump(tracing.DEBUG, "core5", cores[5].dump_state_matrix, "LP")
+        tracing.dump(tracing.DEBUG, "core5", cores[5].dump_cal_status, "LP")
+        tracing.log(tracing.DEBUG, "GB6 x state matrix", unit="gb6")
+        tracing.dump(tracing.DEBUG, "gb6", print, global_buffers[6].a_state_matrix)
+        tracing.dump(tracing.DEBUG, "layernorm", layernorm[0].dump_cal_status)
+        tracing.dump(tracing.DEBUG, "core6", cores[6].dump_state_matrix, "FC1")
+        tracing.dump(tracing.DEBUG, "core6", cores[6].dump_cal_status, "FC1")
+        tracing.dump(tracing.DEBUG, "core7", cores[7].dump_state_matrix, "FC2")
+        tracing.dump(tracing.DEBUG, "core7", cores[7].dump_cal_status, "FC2")
+        # global_buffers[5].dump_rm_status("FC1")
+        # global_buffers[6].dump_rm_status("FC2")
+        # print("cores[0].sram1.cal_complete: " + str(cores[0].sram1.cal_complete))
+        # print("cores[0].sram2.cal_complete: " + str(cores[0].sram2.cal_complete))
+        # print("cores[5].sram1.cal_complete: " + str(cores[5].sram1.cal_complete))
+        # print("cores[6].sram1.cal_complete: " + str(cores[6].sram1.cal_complete))
+        # print("globalbuffer[7].array_complete2: " + str(global_buffers[7].array_complete2))
+        # print("GB3.array_complete2: " + str(global_buffers[3].array_complete2))
+    else:
+        raise NotImplementedError("Core number of " + str(core_num) + " is not supported yet!")
+
+    tracing.log(tracing.DEBUG, str(latency))
+    tracing.log(tracing.DEBUG, "@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@")
+
+def core_units(mapping, blocks, heads):
+    """
+    Units(Core) running on each core of the mapping(see mapper)
+
+    The template cores folded onto a core, the heads of a pipeline and the copies of all blocks run on the same core
+    """
+
+    units = [[] for _ in range(mapping.core_num)]
+    for (i, core) in enumerate(mapping.template_cores):
+        units[core] += [block.cores[i] for block in blocks]
+    for h in range(1, len(heads) + 1):
+        for (ii, core) in enumerate(mapping.pipeline_cores(h % mapping.pipeline_num)):
+            units[core].append(heads[h - 1].cores[ii])
+    for s in range(1, mapping.ffn_split):
+        for (ii, core) in zip(range(6, 8), mapping.slice_cores(s)):
+            units[core] += [block.ffns[s - 1].cores[ii] for block in blocks]
+    return units
+
+def gb_weights(args, plan, units, dram):
+    """ (GB, BYTE it reserves for its weight matrix) of the GBs in units providing a weight matrix, see gb_space """
+
+    weights = []
+    for (global_buffer, gb_plan) in zip(units, plan.global_buffers):
+        if gb_plan.weight and (global_buffer is not None):
+            # only the prefetch buffer of the weight matrix is in GB with DRAM
+            size = args.GB_weight_buffer if dram else gb_plan.mapping["sram_subsum_cnt"] * args.MAC_num * gb_plan.mapping["sram2_colnum_cnt"]
+            weights.append((global_buffer, size))
+    return weights
+
+def weights_fit(weights):
+    """ Whether the GBs of weights(see gb_weights) have the space to reserve them besides what they already hold """
+
+    sizes = {}
+    for (global_buffer, size) in weights:
+        sizes[global_buffer.space] = sizes.get(global_buffer.space, 0) + size
+    return all(space.fits(size) for (space, size) in sizes.items())
+
+def simulating(args):
+    """ 
+    Remaining problems: 
+    2. It is not ready simply for sram1 write data into gb, but gb needs to provides new data for sram1, which is not implemented
+
+    global_buffer.sram1_complete -> global_buffer.sram2_complete -> core.sram.complete -> core.calculator_and_array.complete -> global_buffer.array_complete 
+    """
+    
+    # simulated time, in number of ticks
+    tick = 0
+    # number of metatime a tick lasts
+    time_quantum = get_time_quantum(args)
+    if time_quantum > 1:
+        tracing.log(tracing.INFO, "WARNING: time quantum of %d metatime, every transfer start and stage switch takes a whole tick, "
+                    "so the latency is longer than the exact one of --time-quantum 1", time_quantum)
+    # whether the states are packed into 3 bits
+    packed_state = (args.packed_state != 0)
+    # pJ of every energy event, see energy
+    energy_table = energy.load_table(args.energy_table)
+    stop = False
+
+    """ Mapping """
+    # the operations are mapped onto the cores of the 1-core or 8-core template, see mapper
+    # the hidden dimension of the feed-forward layer is split in units of whole blocks of both FC1 and FC2
+    ffn_blocks = 4 * args.embedding_dim // math.lcm(args.MAC_lane, args.MAC_num)
+    mapping = mapper.map_cores(args.core_num, args.head_num, args.multi_head, args.head_id, ffn_blocks)
+    core_num = mapping.template_core_num
+    tracing.dump(tracing.INFO, None, mapping.dump_mapping, mapper.operation_macs(args.seq_length, args.embedding_dim, args.head_num))
+
+    """ HW initialization """
+
+    plan = Plan(args, core_num, get_sram1_backends(args) if core_num == 8 else None, mapping.ffn_split)
+    # derived values used by the 1-core stages and encoder_block()
+    blocknum_row = plan.blocknum_row
+    blocknum_col_a = plan.blocknum_col_a
+    blocknum_col_subx = plan.blocknum_col_subx
+    blocknum_col_fc1 = plan.blocknum_col_fc1
+    blocknum_col_fc2 = plan.blocknum_col_fc2
+    subsum_cnt_a = plan.subsum_cnt_a
+    subsum_cnt_subx = plan.subsum_cnt_subx
+    blocknum_row_sram1_a = plan.blocknum_row_sram1_a
+    blocknum_row_sram1_subx = plan.blocknum_row_sram1_subx
+    blocknum_row_sram1_lp = plan.blocknum_row_sram1_lp
+    blocknum_row_sram1_fc2 = plan.blocknum_row_sram1_fc2
+    blocknum_col_sram2_a = plan.blocknum_col_sram2_a
+    blocknum_col_sram2_subx = plan.blocknum_col_sram2_subx
+    use_sram = plan.use_sram
+
+    ## cores
+    cores = []
+    for core_plan in plan.cores:
+        cores.append(Core(sram1_num=args.MAC_lane, sram1_height=plan.sram1_height,
+                        sram1_width=args.MAC_num, sram2_height=plan.sram2_height,
+                        sram2_width=args.MAC_num, mac_lane=args.MAC_lane, mac_num=args.MAC_num, block_cnt=blocknum_row * core_plan.blocknum_col,
+                        sram_latency_count=args.SRAM_access_latency, array_and_calculator_latency_count=args.array_access_and_calculation_latency,
+                        time_quantum=time_quantum, packed_state=packed_state, sram1_backend=core_plan.sram1_backend,
+                        sram1_split=args.sram1_split))
+
+    tracing.dump(tracing.INFO, "core0", cores[0].dump_configs, "Q/K/V")
+    if core_num == 8:
+        tracing.dump(tracing.INFO, "core3", cores[3].dump_configs, "Q*K")
+        tracing.dump(tracing.INFO, "core4", cores[4].dump_configs, "A'*V")
+        tracing.dump(tracing.INFO, "core5", cores[5].dump_configs, "FC1")
+        tracing.dump(tracing.INFO, "core6", cores[6].dump_configs, "FC2")
+
+    ## global_buffers
+    global_buffers = []
+    for gb_plan in plan.global_buffers:
+        global_buffers.append(GlobalBuffer(latency_count=args.GB_access_latency, time_quantum=time_quantum, packed_state=packed_state, gb_sram_bandwidth=args.GB_SRAM_bandwidth,
+                                           softmax_bandwidth=gb_plan.softmax_bandwidth, layernorm_bandwidth=gb_plan.layernorm_bandwidth,
+                                           outstanding=args.GB_outstanding, issue_interval=args.GB_issue_interval))
+
+    tracing.dump(tracing.INFO, "gb3", global_buffers[3].dump_configs)
+    if core_num == 8:
+        tracing.dump(tracing.INFO, "gb6", global_buffers[6].dump_configs)
+        tracing.log(tracing.INFO, "If all A can be stored in cores' SRAM: %s", use_sram)
+
+        if use_sram:
+            global_buffers[3].latency_count = args.SRAM_access_latency // time_quantum
+
+    ## softmax
+    softmax = []
+    softmax.append(Softmax(latency_count=args.softmax_cal_latency, blocknum_col=blocknum_row, time_quantum=time_quantum, packed_state=packed_state))
+    tracing.dump(tracing.INFO, "softmax", softmax[0].dump_configs)
+    ## layernorm
+    layernorm = []
+    layernorm.append(LayerNorm(latency_count=args.layernorm_cal_latency, blocknum_col=plan.blocknum_col_lp, to_sram_bandwidth=args.LN_SRAM_bandwidth, time_quantum=time_quantum, packed_state=packed_state))
+    tracing.dump(tracing.INFO, "layernorm", layernorm[0].dump_configs)
+    """ Add Mappings """
+
+    for (core, core_plan) in zip(cores, plan.cores):
+        core.sram1.add_mapping(blocknum_row=blocknum_row, blocknum_col=core_plan.blocknum_col,
+                               subsum_cnt=core_plan.subsum_cnt, blocknum_row_sram=core_plan.blocknum_row_sram1)
+        core.sram2.add_mapping(blocknum_row=blocknum_row, blocknum_col=core_plan.blocknum_col,
+                               block_col=args.MAC_lane, subsum_cnt=core_plan.subsum_cnt, blocknum_col_sram=core_plan.blocknum_col_sram2)
+        core.calculator_and_array.add_mapping(subsum_cnt=core_plan.subsum_cnt)
+    tracing.dump(tracing.INFO, "core0", cores[0].dump_mappings, "Q/K/V")
+    if core_num == 8:
+        tracing.dump(tracing.INFO, "core3", cores[3].dump_mappings, "Q*K")
+        tracing.dump(tracing.INFO, "core4", cores[4].dump_mappings, "A'*V")
+        tracing.dump(tracing.INFO, "core5", cores[5].dump_mappings, "Linear Projection after MH")
+        tracing.dump(tracing.INFO, "core6", cores[6].dump_mappings, "FC1")
+        tracing.dump(tracing.INFO, "core7", cores[7].dump_mappings, "FC2")
+    
+    """ 
+    1 core case:
+    GB0 provides operand matrices for Q calculation and takes Q matrix
+    GB1 provides operand matrices for K calculation and takes K matrix
+    GB2 provides operand matrices for V calculation and takes V matrix
+    GB3 provides operand matrices for Q * K calculation and takes A matrix
+        provides A matrix for Softmax and takes A' matrix
+    GB4 provides operand matrices for A' * V calculation and takes subX matrix
+        asks GB3 for the state matrix of A'
+
+    8 core case:
+    GB0-Q     provides X and W_Q for Q calculation
+    GB1-K     provides X and W_K for K calculation
+    GB2-V     provides X and W_V for K calculation
+    GB3-Q*K   takes A and provides A for Softmax calculation and takes A' from Softmax under some circumstance
+    GB4-A'*V  provides A' for A'*V calculation and 
+    GB5-LP    takes remaining subX provides remaining subX and Weight for LP calculation and 
+    GB6-FC1   takes X from LP and provides X for LN and provides Weight for FC1 calculation
+    GB7-FC2   takes remaining expanded_X and provides remaining expended_X and Weight for FC2 calculation
+    GB8       takes the output matrix of FC2
+    """
+    gb_mapping_names = {0: "Q/K/V", 3: "Q*K", 4: "A'*V", 5: "Linear Projection after MH", 6: "FC1"}
+    for (i, gb_plan) in enumerate(plan.global_buffers):
+        global_buffers[i].add_mapping(**gb_plan.mapping)
+        global_buffers[i].rownum1 = gb_plan.rownum1
+        if i in gb_mapping_names:
+            tracing.dump(tracing.INFO, "gb" + str(i), global_buffers[i].dump_mappings, gb_mapping_names[i])
+
+
+    if args.memory_report:
+        dump_memory(cores, global_buffers, softmax, layernorm)
+
+    """ 
+    NotImplementedError 
+    
+    Configurations which are not supported yet
+    """
+    # Capacity of SRAM2 in the core cannot be exceeded by K/V, they are transferred from the Q/K/V cores directly and never stored in GB,
+    # so they can't be fetched again tile by tile
+    if args.seq_length * (args.embedding_dim // args.head_num) > args.SRAM_capacity:
+        raise NotImplementedError("Q/K/V size CAN'T exceed blue SRAM capacity!")
+
+    # A weight matrix larger than SRAM2 is tiled, SRAM2 holds blocknum_col_sram2 mac_lane columns of it at the same time and GB transfers
+    # the tiles again for every mac_lane row of the result, see SRAM2.cal_advance() and GlobalBuffer.rowcol_advance2()
+    # capacity of SRAM2 cannot be exceeded by a mac_lane column of the weight matrix, eg. 2048 >= 1024*4*16/32 for FC2
+    for core_plan in plan.cores:
+        if (core_plan.operation not in ("Q*K", "A'*V")) and (core_plan.blocknum_col_sram2 == 0):
+            raise NotImplementedError("A mac_lane column of " + core_plan.operation + " weight matrix size CAN'T exceed SRAM capacity!")
+
+    # layernorm-core bandwidth must be even number
+    if (args.LN_SRAM_bandwidth % 2) != 0:
+        raise ValueError("Layernorm to Core bandwidth must be the even times of number of mac_lane*mac_lane BYTE")
+
+    """ Simulating """
+    # stall for one cycle between different calculation stages
+    count = [0]
+    # 1 if last block of A should be written into GB
+    flag = [0] * 2
+    # latency when each core completes its computation
+    complete_latency = [None] * core_num
+
+    # for core_num = 1, the 8-core case is simulated by encoder_block()
+    stage = 0
+
+    sram1_idx_gb_start = [0] * 8
+    sram1_idx_gb_end = [0] * 8
+
+    rownum_sram2_idx_gb_start = [0] * 8
+    rownum_sram2_idx_gb_end = [0] * 8
+    colnum_sram2_idx_gb_start = [0] * 8
+    colnum_sram2_idx_gb_end = [0] * 8
+
+    array_idx_gb = [0] * 9
+    # softmax
+    gb_idx_softmax_start = [0]
+    gb_idx_softmax_end = [0]
+
+    a_row_idx = [0] * 2
+    a_col_idx = [0] * 2
+
+    counter = 0
+    # number of metatime between two debug dumps in the 8-core case
+    if args.seq_length < 100:
+        dump_interval = 100
+    elif args.seq_length == 192:
+        dump_interval = 500
+    elif args.seq_length == 384:
+        dump_interval = 1000
+    else:
+        dump_interval = 3000
+
+    # heads 1..head_num-1 in the multi-head mode, they share the softmax, GB5 and LP with head 0
+    # head h runs on attention pipeline h % pipeline_num after head h - pipeline_num, see mapper
+    heads = []
+    if args.multi_head:
+        if core_num != 8:
+            raise NotImplementedError("Multi-head mode only supports the 8-core case!")
+        if (args.block_num > 1) or (args.image_num > 1):
+            raise NotImplementedError("Multi-head mode doesn't support chaining encoder blocks or images yet!")
+        for h in range(1, args.head_num):
+            (head_cores, head_global_buffers) = copy.deepcopy((cores[0:5], global_buffers[0:6]))
+            prev = None
+            if h >= mapping.pipeline_num:
+                prev = cores[0:5] if h == mapping.pipeline_num else heads[h - mapping.pipeline_num - 1].cores
+            heads.append(AttentionHead(head_cores, head_global_buffers, prev))
+        global_buffers[5].head_counters = [0] * args.head_num
+
+    # feed-forward slices 1..ffn_split-1, they share the layernorm with slice 0, see mapper
+    ffns = []
+    for _ in range(1, mapping.ffn_split):
+        ffns.append(FFNSlice(*copy.deepcopy((cores[6:8], global_buffers[6:9]))))
+
+    # encoder blocks of all images in the 8-core case, blocks[i * block_num + b] is block b of image i
+    # block b+1 takes the FC2 result of block b of the same image as X
+    blocks = []
+    if core_num == 8:
+        blocks.append(EncoderBlock(cores, global_buffers, softmax, layernorm, heads, ffns))
+        for b in range(1, args.image_num * args.block_num):
+            (block_cores, block_global_buffers, block_softmax, block_layernorm, block_ffns) = copy.deepcopy((cores, global_buffers, softmax, layernorm, ffns))
+            blocks.append(EncoderBlock(block_cores, block_global_buffers, block_softmax, block_layernorm, [], block_ffns))
+    elif (args.block_num > 1) or (args.image_num > 1):
+        raise NotImplementedError("Chaining encoder blocks or images only supports the 8-core case!")
+    block_names = [get_block_name(args, b) for b in range(len(blocks))]
+
+    # GBs of the feed-forward slices of all blocks, the rest of them are None
+    ffn_global_buffers = [ffn.global_buffers for block in blocks for ffn in block.ffns]
+
+    # the GBs of all heads, blocks and feed-forward slices are the same hardware, so they share one bus
+    # A is stored in cores' SRAM instead of GB3 when use_sram, the transfers of GB3 don't take the bus then
+    bus = None
+    if args.gb_bus_width > 0:
+        if args.GB_outstanding > 1:
+            raise NotImplementedError("The shared GB bus only supports one outstanding transfer per GB channel!")
+        bus = GBBus(args.gb_bus_width, args.gb_bus_arbitration)
+        for units in [global_buffers] + [head.global_buffers for head in heads] + [block.global_buffers for block in blocks[1:]] + ffn_global_buffers:
+            for (i, global_buffer) in enumerate(units):
+                if (global_buffer is not None) and ((use_sram == False) or (i != 3)):
+                    bus.attach(global_buffer)
+        tracing.dump(tracing.INFO, None, bus.dump_configs)
+
+    # the weight matrices are fetched from DRAM, every head and block has its own weights
+    dram = None
+    if args.DRAM_channels > 0:
+        if core_num != 8:
+            raise NotImplementedError("DRAM only supports the 8-core case!")
+        if args.GB_weight_buffer < args.GB_SRAM_bandwidth * args.MAC_lane * args.MAC_num:
+            raise ValueError("GB weight buffer must hold a transfer into core SRAM2 of " + str(args.GB_SRAM_bandwidth * args.MAC_lane * args.MAC_num) + " BYTE!")
+        dram = DRAM(args.DRAM_channels, args.DRAM_bandwidth, args.DRAM_burst_size, args.DRAM_row_size, args.DRAM_hit_latency,
+                    args.DRAM_miss_latency, args.GB_weight_buffer, time_quantum)
+        # GB5 of a head only collects the A'*V result, see AttentionHead
+        for units in [global_buffers] + [head.global_buffers[0:3] for head in heads] + [block.global_buffers for block in blocks[1:]] + ffn_global_buffers:
+            for (global_buffer, gb_plan) in zip(units, plan.global_buffers):
+                if gb_plan.weight and (global_buffer is not None):
+                    size = gb_plan.mapping["sram_subsum_cnt"] * args.MAC_num * gb_plan.mapping["sram2_colnum_cnt"]
+                    # a tiled matrix is transferred again for every mac_lane row of the result matrix
+                    tiled = gb_plan.mapping["sram2_colnum_cnt"] > gb_plan.mapping["sram2_sram_colnum_cnt"]
+                    dram.attach(global_buffer, size, size * (gb_plan.mapping["blocknum_row_cnt"] if tiled else 1), args.MAC_num)
+        tracing.dump(tracing.INFO, None, dram.dump_configs)
+
+    # every GB has a finite capacity shared by its copies, GB8 only holds the output of the block, which is streamed out
+    spaces = []
+    block_weights = [[] for _ in blocks]
+    if args.GB_capacity > 0:
+        if core_num != 8:
+            raise NotImplementedError("Finite GB capacity only supports the 8-core case!")
+        for i in range(len(global_buffers) - 1):
+            spaces.append(None if (use_sram and (i == 3)) else GBSpace(args.GB_capacity, args.GB_spill_policy, args.MAC_lane, args.MAC_num))
+            for units in [global_buffers] + [head.global_buffers for head in heads] + [block.global_buffers for block in blocks[1:]] + ffn_global_buffers:
+                if (i < len(units)) and (units[i] is not None):
+                    units[i].space = spaces[i]
+        # the heads of the first block have their own Q/K/V weights, the feed-forward slices of every block have their slices of the weights
+        block_weights[0] = gb_weights(args, plan, global_buffers, dram) + [weight for head in heads for weight in gb_weights(args, plan, head.global_buffers[0:3], dram)]
+        for b in range(1, len(blocks)):
+            block_weights[b] = gb_weights(args, plan, blocks[b].global_buffers, dram)
+        for b in range(len(blocks)):
+            block_weights[b] += [weight for ffn in blocks[b].ffns for weight in gb_weights(args, plan, ffn.global_buffers, dram)]
+        for (i, space) in enumerate(spaces):
+            reserved = sum(size for (global_buffer, size) in block_weights[0] if global_buffer.space is space)
+            if (space is not None) and (reserved > args.GB_capacity):
+                raise ValueError("GB" + str(i) + " capacity of " + str(args.GB_capacity) + " BYTE can't hold the weight matrices of " + str(reserved) +
+                                 " BYTE, fetch them from DRAM(--DRAM-channels) with a smaller GB weight buffer!")
+    # tick when each image arrives
+    arrival_ticks = [math.ceil(i * args.image_interval / time_quantum) for i in range(args.image_num)]
+    # number of blocks started and the blocks being simulated
+    started = 0
+    running = []
+    # summed busy time of each core and the tick when the first image completes, where the steady state begins
+    steady_busy_start = None
+    steady_tick_start = None
+
+    trace = None
+    if args.event_trace:
+        trace_units = [(cores[i], "core" + str(i)) for i in range(len(cores))]
+        trace_units += [(global_buffers[i], "gb" + str(i)) for i in range(len(global_buffers))]
+        trace_units += [(softmax[0], "softmax"), (layernorm[0], "layernorm")]
+        for h in range(1, len(heads) + 1):
+            trace_units += [(heads[h - 1].cores[i], "head" + str(h) + ".core" + str(i)) for i in range(5)]
+            trace_units += [(heads[h - 1].global_buffers[i], "head" + str(h) + ".gb" + str(i)) for i in range(6)]
+        for (b, block) in enumerate(blocks):
+            prefix = (block_names[b] + ".") if b > 0 else ""
+            for s in range(1, len(block.ffns) + 1):
+                trace_units += [(block.ffns[s - 1].cores[i], prefix + "ffn" + str(s) + ".core" + str(i)) for i in range(6, 8)]
+                trace_units += [(block.ffns[s - 1].global_buffers[i], prefix + "ffn" + str(s) + ".gb" + str(i)) for i in range(6, 9)]
+        for b in range(1, len(blocks)):
+            trace_units += [(blocks[b].cores[i], block_names[b] + ".core" + str(i)) for i in range(len(cores))]
+            trace_units += [(blocks[b].global_buffers[i], block_names[b] + ".gb" + str(i)) for i in range(len(global_buffers))]
+            trace_units += [(blocks[b].softmax[0], block_names[b] + ".softmax"), (blocks[b].layernorm[0], block_names[b] + ".layernorm")]
+        trace = event_trace.EventTraceWriter(args.event_trace, trace_units, time_quantum)
+    events = EventQueue(trace)
+
+    # a block starts when the Q/K/V cores and the template cores folded with them complete the previous block
+    folds = mapping.folds()
+    start_cores = sorted(set(i for fold in folds[0:3] for i in fold)) if folds else [0, 1, 2]
+    for b in range(len(blocks)):
+        # the first block of an image takes the input of the model
+        source = blocks[b - 1] if (b % args.block_num) != 0 else None
+        blocks[b].steps = encoder_block(events, args, blocks[b], blocks[b - 1] if b > 0 else None, source, use_sram, time_quantum,
+                                        blocknum_row, blocknum_col_subx, blocknum_col_fc1, blocknum_col_fc2, blocknum_row_sram1_lp, blocknum_row_sram1_fc2, folds)
+
+    while stop == False:
+        events.tick = tick
+
+        if core_num == 1:
+            """ 
+            stage 0/1: Q calculation
+            stage 2/3: K calculation
+            stage 4/5: V calculation
+            stage 6: core reconfiguration
+            stage 7/8: Q*K calculation
+            stage 9: core reconfiguration
+            stage 10/11: A'*V calculation 
+            """
+
+            """ Data transfer between GB and core SRAM/Array """
+            if (stage == 0) or (stage == 1):
+                if global_buffers[0].sram1_complete2 == False:
+                    # Read X data from GB to core sram1 for X * W_Q calculation
+                    coresram1_gb_data_transfer(events, cores, global_buffers, 0, 0, sram1_idx_gb_start, sram1_idx_gb_end)
+                else:
+                    # Read X data from GB to core sram1 for X * W_K calculation
+                    coresram1_gb_data_transfer(events, cores, global_buffers, 0, 1, sram1_idx_gb_start, sram1_idx_gb_end)
+
+                if global_buffers[0].sram2_complete2 == False:
+                    # Read W_Q data from GB to core sram1 for X * W_Q calculation
+                    coresram2_gb_data_transfer(events, cores, global_buffers, 0, 0, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+                else:
+                    # Read W_K data from GB to core sram1 for X * W_K calculation
+                    coresram2_gb_data_transfer(events, cores, global_buffers, 0, 1, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+
+                if global_buffers[0].array_complete2 == False:
+                    # Transfer Q data to GB
+                    corearray_gb_data_transfer(events, cores, global_buffers, 0, 0, array_idx_gb, stage, args.MAC_lane, flag, a_row_idx, a_col_idx)
+            elif (stage == 2) or (stage == 3):
+                if global_buffers[1].sram1_complete2 == False:
+                    # Read X data from GB to core sram1 for X * W_K calculation
+                    coresram1_gb_data_transfer(events, cores, global_buffers, 0, 1, sram1_idx_gb_start, sram1_idx_gb_end)
+                else:
+                    # Read X data from GB to core sram1 for X * W_V calculation
+                    coresram1_gb_data_transfer(events, cores, global_buffers, 0, 2, sram1_idx_gb_start, sram1_idx_gb_end)
+
+                if global_buffers[1].sram2_complete2 == False:
+                    # Read W_K data from GB to core sram1 for X * W_K calculation
+                    coresram2_gb_data_transfer(events, cores, global_buffers, 0, 1, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+                else:
+                    # Read W_V data from GB to core sram1 for X * W_V calculation
+                    coresram2_gb_data_transfer(events, cores, global_buffers, 0, 2, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+
+                if global_buffers[0].array_complete2 == False:
+                    # Complete transferring Q data to GB
+                    corearray_gb_data_transfer(events, cores, global_buffers, 0, 0, array_idx_gb, stage, args.MAC_lane, flag, a_row_idx, a_col_idx)
+                if global_buffers[1].array_complete2 == False:
+                    # Transfer K data to GB
+                    corearray_gb_data_transfer(events, cores, global_buffers, 0, 1, array_idx_gb, stage, args.MAC_lane, flag, a_row_idx, a_col_idx)
+            elif (stage == 4) or (stage == 5):
+                if global_buffers[2].sram1_complete2 == False:
+                    # Read X data from GB to core sram1 for X * W_V calculation
+                    coresram1_gb_data_transfer(events, cores, global_buffers, 0, 2, sram1_idx_gb_start, sram1_idx_gb_end)
+                else:
+                    # Read Q data from GB to core sram1 for Q * K calculation
+                    coresram1_gb_data_transfer(events, cores, global_buffers, 0, 3, sram1_idx_gb_start, sram1_idx_gb_end)
+
+                if global_buffers[2].sram2_complete2 == False:
+                    # Read W_V data from GB to core sram1 for X * W_V calculation
+                    coresram2_gb_data_transfer(events, cores, global_buffers, 0, 2, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+                else:
+                    # Read K data from GB to core sram1 for Q * K calculation
+                    coresram2_gb_data_transfer(events, cores, global_buffers, 0, 3, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+
+                if global_buffers[1].array_complete2 == False:
+                    # Complete transferring K data to GB
+                    corearray_gb_data_transfer(events, cores, global_buffers, 0, 1, array_idx_gb, stage, args.MAC_lane, flag, a_row_idx, a_col_idx)
+                if global_buffers[2].array_complete2 == False:
+                    # Transfer V data to GB
+                    corearray_gb_data_transfer(events, cores, global_buffers, 0, 2, array_idx_gb, stage, args.MAC_lane, flag, a_row_idx, a_col_idx)
+            elif (stage == 6) or (stage == 7) or (stage == 8):
+                if global_buffers[3].sram1_complete2 == False:
+                    # Read Q data from GB to core sram1 for Q * K calculation
+                    coresram1_gb_data_transfer(events, cores, global_buffers, 0, 3, sram1_idx_gb_start, sram1_idx_gb_end)
+                else:
+                    # Read A' data from GB to core sram1 for A' * V calculation
+                    coresram1_gb_data_transfer_a(events, cores, global_buffers, 0, 4, sram1_idx_gb_start, sram1_idx_gb_end)
+
+                if global_buffers[3].sram2_complete2 == False:
+                    # Read K data from GB to core sram1 for Q * K calculation
+                    coresram2_gb_data_transfer(events, cores, global_buffers, 0, 3, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+                else: 
+                    # Read V data from GB to core sram1 for A' * V calculation
+                    coresram2_gb_data_transfer(events, cores, global_buffers, 0, 4, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+
+
+                if global_buffers[2].array_complete2 == False:
+                    # Complete transferring V data to GB
+                    corearray_gb_data_transfer(events, cores, global_buffers, 0, 2, array_idx_gb, stage, args.MAC_lane, flag, a_row_idx, a_col_idx)    
+                if global_buffers[3].array_complete2 == False:
+                    # Transfer A data to GB
+                    corearray_gb_data_transfer(events, cores, global_buffers, 0, 3, array_idx_gb, stage, args.MAC_lane, flag, a_row_idx, a_col_idx)
+
+                
+                if global_buffers[3].softmax_complete() == False:
+                    # Executing softmax for A
+                    gb_softmax_data_transfer(events, global_buffers, softmax, 3, gb_idx_softmax_start, gb_idx_softmax_end)
+                    softmax_gb_data_transfer(events, global_buffers, softmax, 3, gb_idx_softmax_start, gb_idx_softmax_end)
+            elif (stage == 9) or (stage == 10) or (stage == 11):
+                if global_buffers[4].sram1_complete2 == False:
+                    # Read A' data from GB to core sram1 for A' * V calculation
+                    coresram1_gb_data_transfer_a(events, cores, global_buffers, 0, 4, sram1_idx_gb_start, sram1_idx_gb_end)
+                
+                if global_buffers[4].sram2_complete2 == False:
+                    # Read V data from GB to core sram1 for A' * V calculation
+                    coresram2_gb_data_transfer(events, cores, global_buffers, 0, 4, rownum_sram2_idx_gb_start, rownum_sram2_idx_gb_end, colnum_sram2_idx_gb_start, colnum_sram2_idx_gb_end)
+
+
+                if global_buffers[3].array_complete2 == False:
+                    # Complete transferring V data to GB
+                    corearray_gb_data_transfer(events, cores, global_buffers, 0, 3, array_idx_gb, stage, args.MAC_lane, flag, a_row_idx, a_col_idx)    
+                if global_buffers[4].array_complete2 == False:
+                    # Transfer A data to GB
+                    corearray_gb_data_transfer(events, cores, global_buffers, 0, 4, array_idx_gb, stage, args.MAC_lane, flag, a_row_idx, a_col_idx)
+
+                if global_buffers[3].softmax_complete() == False:
+                    # Executing softmax for A
+                    gb_softmax_data_transfer(events, global_buffers, softmax, 3, gb_idx_softmax_start, gb_idx_softmax_end)
+                    softmax_gb_data_transfer(events, global_buffers, softmax, 3, gb_idx_softmax_start, gb_idx_softmax_end)
+            elif (stage == 12):
+                if global_buffers[4].array_complete2 == False:
+                    # Transfer A data to GB
+                    corearray_gb_data_transfer(events, cores, global_buffers, 0, 4, array_idx_gb, stage, args.MAC_lane, flag, a_row_idx, a_col_idx)
+
+            """ Calculation """
+            if (stage == 0) or (stage == 2) or (stage == 4) or (stage == 7) or (stage == 10):
+                """ Reading data from core SRAM """
+                stage = read_from_core_sram(events, cores, stage, 0)
+            elif (stage == 1) or (stage == 3) or (stage == 5) or (stage == 8) or (stage == 11):
+                """ Dot production """ 
+                stage = dot_production(events, cores, stage, count, 0)
+            elif stage == 6:
+                """ Q * K Reconfiguration """
+                # print()
+                # Here core should be reconfigured
+                cores[0].reconfigure(block_cnt=blocknum_row * blocknum_col_a)
+                tracing.dump(tracing.INFO, "core0", cores[0].dump_configs, "Q*K")
+                # Here we assume sram1/2 can hold all Q/K
+                cores[0].sram1.add_mapping(blocknum_row=blocknum_row, blocknum_col=blocknum_col_a, 
+                                            subsum_cnt=subsum_cnt_a, blocknum_row_sram=blocknum_row_sram1_a)
+                cores[0].sram2.add_mapping(blocknum_row=blocknum_row, blocknum_col=blocknum_col_a,
+                                            block_col=args.MAC_lane, subsum_cnt=subsum_cnt_a, blocknum_col_sram=blocknum_col_sram2_a)
+                cores[0].calculator_and_array.add_mapping(subsum_cnt=subsum_cnt_a) 
+                tracing.dump(tracing.INFO, "core0", cores[0].dump_mappings, "Q*K")
+                stage = 7     
+                events.activate()
+            elif stage == 9:
+                """ A' * V Reconfiguration """
+                cores[0].reconfigure(block_cnt=blocknum_row * blocknum_col_subx)
+                tracing.dump(tracing.INFO, "core0", cores[0].dump_configs, "A'*V")
+                cores[0].sram1.add_mapping(blocknum_row=blocknum_row, blocknum_col=blocknum_col_subx,
+                                            subsum_cnt=subsum_cnt_subx, blocknum_row_sram=blocknum_row_sram1_subx)
+                cores[0].sram2.add_mapping(blocknum_row=blocknum_row, blocknum_col=blocknum_col_subx,
+                                            block_col=args.MAC_lane, subsum_cnt=subsum_cnt_subx, blocknum_col_sram=blocknum_col_sram2_subx)
+                cores[0].calculator_and_array.add_mapping(subsum_cnt=subsum_cnt_subx)
+                tracing.dump(tracing.INFO, "core0", cores[0].dump_mappings, "A'*V")
+                stage = 10  
+                events.activate()
+
+            if stage > 6:
+                """ Softmax execution """
+                softmax_cal(events, softmax)
+
+            """ For debug """
+            # if stage > 10:
+            #     dump_all(cores, global_buffers, softmax, layernorm, stage, utils.metatime_to_ns(tick * time_quantum), core_num)
+
+            if global_buffers[4].array_complete2:
+                stop = True
+                dump_all(cores, global_buffers, softmax, layernorm, stage, utils.metatime_to_ns(tick * time_quantum), core_num)
+        
+        elif core_num == 8:
+            """ Blocks are simulated in order, so a block sees what the blocks before it do during this tick """
+            # a block starts when its Q/K/V cores are free(see start_cores), and the first block of an image when the image arrives
+            while started < len(blocks):
+                if (started > 0) and (all(blocks[started - 1].cores[i].calculator_and_array.complete for i in start_cores) == False):
+                    break
+                if ((started % args.block_num) == 0) and (tick < arrival_ticks[started // args.block_num]):
+                    # nothing needs to happen until the image arrives
+                    events.wake(arrival_ticks[started // args.block_num] - tick)
+                    break
+                if weights_fit(block_weights[started]) == False:
+                    # the weights of the running blocks fill GB, a block completing frees them
+                    break
+                blocks[started].start_latency = utils.metatime_to_ns(tick * time_quantum)
+                for (global_buffer, size) in block_weights[started]:
+                    global_buffer.space.reserve(size)
+                running.append(started)
+                started += 1
+            for b in running:
+                next(blocks[b].steps)
+
+
+            """ For debug """
+            if counter == dump_interval:
+                for b in running:
+                    if len(blocks) > 1:
+                        tracing.log(tracing.DEBUG, block_names[b])
+                    dump_all(blocks[b].cores, blocks[b].global_buffers, blocks[b].softmax, blocks[b].layernorm, stage, utils.metatime_to_ns(tick * time_quantum), core_num)
+                counter = 0
+            # print("in end of while: a_row_idx[a_idx_idx], a_col_idx[a_idx_idx]: [" + str(a_row_idx[1]) + ", " + str(a_col_idx[1]) + "]")
+            # if latency > 28149:
+            # if counter == 500:
+            # if (cores[5].blocknum_cal[0] >= 2) and (cores[5].blocknum_cal[0] <= 4): 
+                # dump_all(cores, global_buffers, softmax, layernorm, stage, utils.metatime_to_ns(tick * time_quantum), core_num)
+                # counter = 0
+
+            for b in list(running):
+                block = blocks[b]
+                if block_complete(block):
+                # if cores[5].blocknum_cal[1] == 4:
+                # if latency > 5255:
+                    block.complete_latency = utils.metatime_to_ns(tick * time_quantum)
+                    if len(blocks) > 1:
+                        tracing.log(tracing.INFO, "%s completes, latency: %s", block_names[b], block.complete_latency)
+                    dump_all(block.cores, block.global_buffers, block.softmax, block.layernorm, stage, utils.metatime_to_ns(tick * time_quantum), core_num)
+                    running.remove(b)
+                    for (global_buffer, size) in block_weights[b]:
+                        global_buffer.space.release(size)
+                    if (b == args.block_num - 1) and (args.image_num > 1):
+                        # the first image completes, the pipeline is filled
+                        steady_tick_start = tick + 1
+                        steady_busy_start = [sum(unit.statistics.util_counter for unit in on_core) for on_core in core_units(mapping, blocks, heads)]
+
+                prefix = (block_names[b] + " ") if len(blocks) > 1 else ""
+                for (ii, core) in enumerate(block.cores):
+                    if (block.core_complete_latency[ii] is None) and core.calculator_and_array.complete:
+                        tracing.log(tracing.INFO, "", unit="core" + str(ii))
+                        tracing.log(tracing.INFO, "###################### %score%d computation completes! #################", prefix, ii, unit="core" + str(ii))
+                        tracing.log(tracing.INFO, "latency: %s", utils.metatime_to_ns(tick * time_quantum), unit="core" + str(ii))
+                        tracing.log(tracing.INFO, "", unit="core" + str(ii))
+                        events.record(core, event_trace.CORE_COMPLETE, event_trace.INSTANT)
+                        block.core_complete_latency[ii] = utils.metatime_to_ns(tick * time_quantum)
+
+            stop = (started == len(blocks)) and (len(running) == 0)
+
+        else:
+            raise NotImplementedError("Core number of " + str(core_num) + " is not supported yet!")
+
+        if dram is not None:
+            dram.step(events)
+        if bus is not None:
+            bus.arbitrate(events)
+        
+        tick += 1
+        counter += 1
+
+        """ Skip the idle ticks before the next completion event """
+        if stop == False:
+            if events.is_deadlock():
+                if trace is not None:
+                    trace.close()
+                raise RuntimeError("Simulation deadlocks at " + str(utils.metatime_to_ns(tick * time_quantum)) + "ns, no unit can make progress!")
+            if args.fast_forward == 0:
+                skip_limit = 0
+            # debug dumps of the 8-core case can't be skipped
+            elif (core_num == 8) and tracing.enabled(tracing.DEBUG):
+                skip_limit = dump_interval - counter
+            else:
+                skip_limit = sys.maxsize
+            skip = events.fast_forward(skip_limit)
+            tick += skip
+            counter += skip
+
+    if trace is not None:
+        trace.close()
+
+    cycles = tick * time_quantum
+
+    # the units of all blocks are the same hardware, so the statistics are summed up
+    if blocks:
+        template_complete_latency = blocks[-1].core_complete_latency
+    else:
+        blocks = [EncoderBlock(cores, global_buffers, softmax, layernorm, heads, [])]
+        template_complete_latency = complete_latency
+    units = core_units(mapping, blocks, heads)
+    core_busy = [sum(unit.statistics.util_counter for unit in on_core) for on_core in units]
+    core_sram_wait = [sum(unit.statistics.sram_wait_counter for unit in on_core) for on_core in units]
+    core_energy = [sum(energy.core_energy(energy_table, unit.statistics, args.MAC_num) for unit in on_core) for on_core in units]
+    head_complete_ns = ([template_complete_latency[4]] + [head.core_complete_latency[4] for head in heads]) if heads else []
+    # the template cores folded onto a core and the heads of a pipeline complete in the order they run
+    complete_latency = [None] * mapping.core_num
+    for (i, core) in enumerate(mapping.template_cores):
+        complete_latency[core] = template_complete_latency[i]
+    for h in range(1, len(heads) + 1):
+        for (ii, core) in enumerate(mapping.pipeline_cores(h % mapping.pipeline_num)):
+            complete_latency[core] = heads[h - 1].core_complete_latency[ii]
+    for s in range(1, mapping.ffn_split):
+        for (ii, core) in zip(range(6, 8), mapping.slice_cores(s)):
+            complete_latency[core] = blocks[-1].ffns[s - 1].core_complete_latency[ii]
+    # every core leaks during the whole simulation
+    core_energy = [dynamic + energy_table["core_leakage"] * cycles for dynamic in core_energy]
+    images = [blocks[i * args.block_num:(i + 1) * args.block_num] for i in range(args.image_num)] if args.image_num > 1 else []
+    # GB i of every block and its feed-forward slices
+    block_gbs = [[block.global_buffers[i] for block in blocks] + [ffn.global_buffers[i] for block in blocks for ffn in block.ffns if ffn.global_buffers[i] is not None]
+                 for i in range(len(global_buffers))]
+    gb_transfer_cnt = []
+    for i in range(len(global_buffers)):
+        transfer_cnt = {}
+        for global_buffer in block_gbs[i]:
+            for (channel, cnt) in global_buffer.statistics.transfer_cnt.items():
+                transfer_cnt[channel] = transfer_cnt.get(channel, 0) + cnt
+        gb_transfer_cnt.append(transfer_cnt)
+    gb_bus_wait = []
+    if bus is not None:
+        for i in range(len(global_buffers)):
+            units = block_gbs[i] + [head.global_buffers[i] for head in heads if i < len(head.global_buffers)]
+            wait = {}
+            for global_buffer in units:
+                for (channel, bus_channel) in (global_buffer.bus_channels or {}).items():
+                    wait[channel] = wait.get(channel, 0) + bus_channel.wait_counter * time_quantum
+            gb_bus_wait.append(wait)
+    dram_traffic = []
+    dram_stall = []
+    if dram is not None:
+        for i in range(len(global_buffers)):
+            streams = [gb.dram_stream for gb in block_gbs[i] + [head.global_buffers[i] for head in heads if i < len(head.global_buffers)]
+                       if gb.dram_stream is not None]
+            dram_traffic.append(sum(stream.fetched for stream in streams))
+            dram_stall.append(sum(stream.stall_counter for stream in streams) * time_quantum)
+    gb_energy = []
+    for i in range(len(global_buffers)):
+        units = block_gbs[i] + [head.global_buffers[i] for head in heads if i < len(head.global_buffers)]
+        gb_energy.append(sum(energy.gb_energy(energy_table, gb.statistics, args.MAC_lane, args.MAC_num) for gb in units) + energy_table["gb_leakage"] * cycles)
+    softmax_energy = sum(energy.unit_energy(energy_table, block.softmax[0].statistics, "softmax", args.MAC_lane) for block in blocks) + energy_table["softmax_leakage"] * cycles
+    layernorm_energy = sum(energy.unit_energy(energy_table, block.layernorm[0].statistics, "layernorm", args.MAC_lane) for block in blocks) + energy_table["layernorm_leakage"] * cycles
+    gb_peak = [space.peak if space else 0 for space in spaces]
+    gb_spill = [space.spill_bytes if space else 0 for space in spaces]
+    gb_capacity_stall = [(space.stall_counter * time_quantum) if space else 0 for space in spaces]
+    gb_weight_refetch = []
+    for (i, global_buffer) in enumerate(global_buffers):
+        data = sum(gb.statistics.transfer_data.get("sram2", 0) for gb in block_gbs[i])
+        operand = global_buffer.sram_subsum_cnt * global_buffer.sram2_colnum_cnt * len(block_gbs[i])
+        # a tiled matrix is transferred whole in every pass
+        gb_weight_refetch.append(data // operand if operand else 0)
+
+    return SimulationResult(cycles=cycles, latency_ns=utils.metatime_to_ns(cycles),
+                            core_busy_cycles=[busy * time_quantum for busy in core_busy],
+                            core_complete_ns=complete_latency,
+                            gb_transfer_cnt=gb_transfer_cnt,
+                            softmax_busy_cycles=sum(block.softmax[0].statistics.util_counter for block in blocks) * time_quantum,
+                            layernorm_busy_cycles=sum(block.layernorm[0].statistics.util_counter for block in blocks) * time_quantum,
+                            head_complete_ns=head_complete_ns,
+                            block_start_ns=[block.start_latency for block in blocks] if args.block_num > 1 else [],
+                            block_complete_ns=[block.complete_latency for block in blocks] if args.block_num > 1 else [],
+                            image_start_ns=[image[0].start_latency for image in images],
+                            image_complete_ns=[image[-1].complete_latency for image in images],
+                            steady_cycles=((tick - steady_tick_start) * time_quantum) if images else 0,
+                            steady_core_busy_cycles=[(busy - start) * time_quantum for (busy, start) in zip(core_busy, steady_busy_start)] if images else [],
+                            gb_weight_refetch=gb_weight_refetch,
+                            core_sram_wait_cycles=[wait * time_quantum for wait in core_sram_wait],
+                            gb_bus_wait_cycles=gb_bus_wait,
+                            dram_traffic_bytes=dram_traffic,
+                            dram_stall_cycles=dram_stall,
+                            dram_row_hits=sum(channel.hit_cnt for channel in dram.channels) if dram else 0,
+                            dram_row_misses=sum(channel.miss_cnt for channel in dram.channels) if dram else 0,
+                            gb_peak_bytes=gb_peak,
+                            gb_spill_bytes=gb_spill,
+                            gb_capacity_stall_cycles=gb_capacity_stall,
+                            core_energy_pj=core_energy,
+                            gb_energy_pj=gb_energy,
+                            softmax_energy_pj=softmax_energy,
+                            layernorm_energy_pj=layernorm_energy)
+
+def simulate(config):
+    """
+    Simulate config(SimulationConfig), return a SimulationResult
+
+    Nothing is printed unless config enables tracing or the memory report.
+    The result is memoized by the result cache, a cached result can't reproduce the dumps and the event trace,
+    so the runs that produce them always simulate, their results are still stored
+    """
+
+    tracing.configure(config.trace_level, config.trace_units)
+    if config.no_cache:
+        return simulating(config)
+
+    cache = result_cache.ResultCache(config.cache_dir, config.cache_size * 1024 * 1024)
+    # the result depends on the content of the energy table rather than its path
+    key = result_cache.config_key(dict(dataclasses.asdict(config), energy_table=energy.load_table(config.energy_table)))
+    side_outputs = tracing.enabled(tracing.INFO) or config.event_trace or config.memory_report
+    if not side_outputs:
+        result = cache.get(key)
+        if result is not None:
+            return SimulationResult(**result)
+
+    result = simulating(config)
+    cache.put(key, dataclasses.asdict(result))
+
+    return result
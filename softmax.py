@@ -1,8 +1,8 @@
 from base_unit import BaseUnit
+from state_matrix import new_state_matrix, count_states, set_states
+from statistics import Statistics
 import utils
 
-import numpy as np
-
 class Softmax(BaseUnit):
     """ 
     Softmax Unit
@@ -11,25 +11,35 @@ class Softmax(BaseUnit):
     busy: if buffer is full of data for calculation/calculating/hasn't remove all result data to GB, busy is True,
           meaning that the data transfer from GB to Softmax is forbidden
     done: indicates whether this row of data finishes softmax calculation
+    state_cnt: number of data in every state of state_matrix, indexed by state
+    packed_state: whether the states are packed into STATE_BITS bits
     """
 
-    def __init__(self, latency_count, blocknum_col):
-        super(Softmax, self).__init__(latency_count)
+    __slots__ = ("state_matrix", "state_cnt", "blocknum_col", "busy", "done", "statistics")
+
+    def __init__(self, latency_count, blocknum_col, time_quantum=1, packed_state=False):
+        super(Softmax, self).__init__(latency_count, time_quantum)
 
-        self.state_matrix = np.zeros(blocknum_col, dtype=int)
+        self.state_matrix = new_state_matrix(blocknum_col, utils.NULL, packed_state)
+        self.state_cnt = count_states(self.state_matrix)
 
         self.blocknum_col = blocknum_col
 
         self.busy = False
         self.done = False
 
+        self.statistics = Statistics()
+
     def dump_configs(self):
         print("----------------------------------------------")
         print("| Softmax Configuration")
-        print("| + access latency: " + str(self.latency_count * utils.METATIME) + "ns")
+        print("| + access latency: " + str(self.latency_ns()) + "ns")
         print("| + buffer size: " + str(self.blocknum_col))
         print("----------------------------------------------")
 
+    def state_bytes(self):
+        return self.state_matrix.nbytes
+
     def dump_cal_status(self):
         print("---------------------------")
         print(" Softmax calculation status: ")
@@ -40,30 +50,22 @@ class Softmax(BaseUnit):
         print("---------------------------")
 
     def update_to_a(self, start, end):
-        for i in range(start, end + 1):
-            self.state_matrix[i] = utils.A
+        set_states(self.state_matrix, self.state_cnt, start, end + 1, utils.A)
         if (end + 1) == self.blocknum_col:
             self.busy = True
 
     def update_to_null(self, start, end):
-        for i in range(start, end + 1):
-            self.state_matrix[i] = utils.NULL
+        set_states(self.state_matrix, self.state_cnt, start, end + 1, utils.NULL)
         if (end + 1) == self.blocknum_col:
             self.busy = False
             self.done = False
 
     def update_to_asoftmax(self):
-        for i in range(self.blocknum_col):
-            self.state_matrix[i] = utils.A_SOFTMAX
+        set_states(self.state_matrix, self.state_cnt, 0, self.blocknum_col, utils.A_SOFTMAX)
         self.done = True
     
     def calculation(self):
         """ Return whether the whole row of data is ready for calculation """
 
-        res = True
-        for i in range(self.blocknum_col):
-            if (self.state_matrix[i] != utils.A):
-                res = False
-                break
-        return res
+        return (self.state_cnt[utils.A] == self.blocknum_col)
     
\ No newline at end of file
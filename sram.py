@@ -1,6 +1,8 @@
 import numpy as np
 
 from base_unit import BaseUnit
+from state_matrix import new_state_matrix
+import tracing
 import utils
 
 """
@@ -23,9 +25,13 @@ class SRAM(BaseUnit):
                          this variable helps to update sram_state_matrix
     sram_state_matrix: record states of data in the SRAM
                         three states: READY/REMOVE/REMOVING
+    packed_state: whether the states are packed into STATE_BITS bits
     """
-    def __init__(self, latency_count, num, height, width):
-        super(SRAM, self).__init__(latency_count)
+
+    __slots__ = ("num", "height", "width", "cal_complete", "write_complete", "array_block_counter", "packed_state",
+                 "sram_state_matrix")
+    def __init__(self, latency_count, num, height, width, time_quantum=1, packed_state=False):
+        super(SRAM, self).__init__(latency_count, time_quantum)
 
         self.num = num
         self.height = height
@@ -36,15 +42,19 @@ class SRAM(BaseUnit):
 
         self.array_block_counter = 0
 
-        self.sram_state_matrix = np.ones(self.height, dtype=int)
-        print("SRAM2 state matrix size: " + str(self.height))
+        self.packed_state = packed_state
+        self.sram_state_matrix = new_state_matrix(self.height, utils.REMOVE, packed_state)
+        tracing.log(tracing.INFO, "SRAM2 state matrix size: %d", self.height)
 
     def dump_configs(self):
         print("| + sub-SRAM number: " + str(self.num))
         print("| + sub-SRAM height: " + str(self.height))
         print("| + sub-SRAM width: " + str(self.width))
-        print("| + access latency: " + str(self.latency_count * utils.METATIME) + "ns")
+        print("| + access latency: " + str(self.latency_ns()) + "ns")
     
+    def state_bytes(self):
+        return self.sram_state_matrix.nbytes
+
     def dump_state_matrix(self, sram, mode):
         print(str(sram) + ":")
         if sram == "SRAM1":
@@ -132,7 +142,7 @@ class SRAM(BaseUnit):
         self.cal_complete = False
         self.write_complete = False
         self.array_block_counter = 0
-        self.sram_state_matrix = np.ones(self.height, dtype=int)
+        self.sram_state_matrix = new_state_matrix(self.height, utils.REMOVE, self.packed_state)
         super().reset()
 
 class SRAM1(SRAM):
@@ -147,8 +157,11 @@ class SRAM1(SRAM):
 
     """
 
-    def __init__(self, latency_count, num, height, width):
-        super(SRAM1, self).__init__(latency_count, num, height, width)
+    __slots__ = ("blocknum_row_sram_idx_cal", "subsum_cnt_idx_cal", "blocknum_row_std", "blocknum_col_std", "subsum_cnt_std",
+                 "blocknum_row_sram_std")
+
+    def __init__(self, latency_count, num, height, width, time_quantum=1, packed_state=False):
+        super(SRAM1, self).__init__(latency_count, num, height, width, time_quantum, packed_state)
     
         self.blocknum_row_sram_idx_cal = 0
         self.subsum_cnt_idx_cal = 0
@@ -189,17 +202,23 @@ class SRAM1(SRAM):
     def ready(self):
         return (self.sram_state_matrix[self.blocknum_row_sram_idx_cal * self.subsum_cnt_std + self.subsum_cnt_idx_cal] == utils.READY)
 
+    def removable_cnt(self, start, cnt):
+        """ Number of consecutive REMOVE data from flattened idx start, at most cnt """
+
+        end = min(start + cnt, self.sram_state_matrix.shape[0])
+        for i in range(start, end):
+            if self.sram_state_matrix[i] != utils.REMOVE:
+                return i - start
+        return max(end - start, 0)
+
     def update_to_removing(self, start, end):
-        for i in range(start, end + 1):
-            self.sram_state_matrix[i] = utils.REMOVING
+        self.sram_state_matrix[start:end + 1] = utils.REMOVING
 
     def update_to_ready(self, start, end):
-        for i in range(start, end + 1):
-            self.sram_state_matrix[i] = utils.READY
+        self.sram_state_matrix[start:end + 1] = utils.READY
 
     def update_to_remove(self, blocknum_row_sram_idx_cal):
-        for i in range(self.subsum_cnt_std):
-            self.sram_state_matrix[blocknum_row_sram_idx_cal * self.subsum_cnt_std + i] = utils.REMOVE
+        self.sram_state_matrix[blocknum_row_sram_idx_cal * self.subsum_cnt_std:(blocknum_row_sram_idx_cal + 1) * self.subsum_cnt_std] = utils.REMOVE
     
     def update_to_ready_from_array(self, idx):
         """ In case of data transfer between last core's array to this core's SRAM """
@@ -219,8 +238,7 @@ class SRAM1(SRAM):
             self.sram_state_matrix[i] = utils.READY
 
     def update_to_ready_from_softmax(self, a_row, block_idx_start, block_idx_end):
-        for i in range(block_idx_start // 2, (block_idx_end + 1) // 2):
-            self.sram_state_matrix[a_row * self.subsum_cnt_std + i] = utils.READY
+        self.sram_state_matrix[a_row * self.subsum_cnt_std + block_idx_start // 2:a_row * self.subsum_cnt_std + (block_idx_end + 1) // 2] = utils.READY
 
     def update_to_ready_from_ln(self, row_idx, sram_row_std, start, end):
         """
@@ -231,8 +249,7 @@ class SRAM1(SRAM):
         row_num = self.height // self.subsum_cnt_std
         idx = row_idx % row_num
 
-        for i in range(start // 2, (end + 1) // 2):
-            self.sram_state_matrix[idx * self.subsum_cnt_std + i] = utils.READY
+        self.sram_state_matrix[idx * self.subsum_cnt_std + start // 2:idx * self.subsum_cnt_std + (end + 1) // 2] = utils.READY
 
         if (row_idx == (sram_row_std - 1)) and (end == (self.subsum_cnt_std * 2 - 1)):
             self.write_complete = True
@@ -294,6 +311,210 @@ class SRAM1(SRAM):
         self.subsum_cnt_idx_cal = 0
         super().reset()
 
+class RingSRAM1(SRAM1):
+    """
+    Core SRAM1 whose occupancy is modeled by ring pointers instead of a state matrix
+
+    Only for the cores whose SRAM1 is fed by GB and consumed row by row(Q/K/V),
+    GB fills the logic state matrix in flattened order and wraps around at its end, the core frees it row by row in the same order,
+    so the state of every data is decided by 3 pointers, counting the data from the beginning of the calculation
+
+    ring_size: number of data in the logic state matrix, blocknum_row_sram_std * subsum_cnt_std
+    removing_head: number of data GB starts to transfer
+    ready_head: number of data GB finishes transferring
+    free_tail: number of data the core finishes calculating and frees
+               free_tail <= ready_head <= removing_head <= free_tail + ring_size
+    """
+
+    __slots__ = ("ring_size", "removing_head", "ready_head", "free_tail")
+
+    def __init__(self, latency_count, num, height, width, time_quantum=1, packed_state=False):
+        self.ring_size = height
+        super(RingSRAM1, self).__init__(latency_count, num, height, width, time_quantum, packed_state)
+
+    @property
+    def sram_state_matrix(self):
+        """ Unpacked copy of the state matrix the pointers represent, for dumps and checks """
+
+        res = np.full(self.height, utils.REMOVE, dtype=np.uint8)
+        for i in range(self.ring_size):
+            res[i] = self.state(i)
+        return res
+
+    @sram_state_matrix.setter
+    def sram_state_matrix(self, sram_state_matrix):
+        """ A state matrix is only set when SRAM is initialized or reset, where all data is REMOVE """
+
+        self.removing_head = 0
+        self.ready_head = 0
+        self.free_tail = 0
+
+    def state_bytes(self):
+        return 0
+
+    def add_mapping(self, blocknum_row, blocknum_col, subsum_cnt, blocknum_row_sram):
+        super(RingSRAM1, self).add_mapping(blocknum_row, blocknum_col, subsum_cnt, blocknum_row_sram)
+        self.ring_size = subsum_cnt * blocknum_row_sram
+
+    def state(self, idx):
+        """ State of the data of flattened idx """
+
+        # the data is out of the ring or has never been transferred
+        if (idx >= self.ring_size) or (idx >= self.removing_head):
+            return utils.REMOVE
+
+        # the last time the data is transferred
+        last = idx + (self.removing_head - 1 - idx) // self.ring_size * self.ring_size
+
+        if last >= self.ready_head:
+            return utils.REMOVING
+        elif last >= self.free_tail:
+            return utils.READY
+        else:
+            return utils.REMOVE
+
+    def removable_cnt(self, start, cnt):
+        if start != (self.removing_head % self.ring_size):
+            return super(RingSRAM1, self).removable_cnt(start, cnt)
+        return max(min(cnt, self.free_tail + self.ring_size - self.removing_head, self.ring_size - start), 0)
+
+    def ready(self):
+        return (self.state(self.blocknum_row_sram_idx_cal * self.subsum_cnt_std + self.subsum_cnt_idx_cal) == utils.READY)
+
+    def update_to_removing(self, start, end):
+        if start != (self.removing_head % self.ring_size):
+            raise RuntimeError("SRAM1 ring: GB transfers data " + str(start) + ", but the ring expects " + str(self.removing_head % self.ring_size))
+        self.removing_head += end - start + 1
+
+    def update_to_ready(self, start, end):
+        if start != (self.ready_head % self.ring_size):
+            raise RuntimeError("SRAM1 ring: GB completes data " + str(start) + ", but the ring expects " + str(self.ready_head % self.ring_size))
+        self.ready_head += end - start + 1
+
+    def update_to_remove(self, blocknum_row_sram_idx_cal):
+        start = blocknum_row_sram_idx_cal * self.subsum_cnt_std
+        if (start == (self.free_tail % self.ring_size)) and ((self.free_tail + self.subsum_cnt_std) <= self.ready_head):
+            self.free_tail += self.subsum_cnt_std
+        elif (self.free_tail >= self.subsum_cnt_std) and (start == ((self.free_tail - self.subsum_cnt_std) % self.ring_size)) and \
+                (self.state(start) == utils.REMOVE):
+            # the row is already freed, eg. the last row is flushed again when SRAM2 completes
+            pass
+        else:
+            raise RuntimeError("SRAM1 ring: the core frees row " + str(blocknum_row_sram_idx_cal) + " out of order")
+
+    def update_to_ready_from_array(self, idx):
+        raise NotImplementedError("SRAM1 ring only supports the data from GB!")
+
+    def update_to_ready_from_array_av(self, prev_core_blocknum_col_std):
+        raise NotImplementedError("SRAM1 ring only supports the data from GB!")
+
+    def update_to_ready_from_array_abrupt(self, prev_core_blocknum_col_std):
+        raise NotImplementedError("SRAM1 ring only supports the data from GB!")
+
+    def update_to_ready_from_softmax(self, a_row, block_idx_start, block_idx_end):
+        raise NotImplementedError("SRAM1 ring only supports the data from GB!")
+
+    def update_to_ready_from_ln(self, row_idx, sram_row_std, start, end):
+        raise NotImplementedError("SRAM1 ring only supports the data from GB!")
+
+class PingPongSRAM1(SRAM1):
+    """
+    Core SRAM1 split into 2 banks(ping-pong), only for the cores whose SRAM1 is fed by GB and consumed row by row(Q/K/V)
+
+    GB only starts to fill a bank when the core has freed all rows of it, so GB fills one bank while the core calculates
+    with the other one. The core calculates with a row as soon as it's filled, so the latency only differs from the
+    matrix backend when a refill waits for the rest of its bank to be freed
+
+    split_ratio: fraction of the rows of the sub-SRAM that belong to bank 0, the rest belong to bank 1
+    split: number of mac_lane rows in bank 0
+    """
+
+    __slots__ = ("split_ratio", "split")
+
+    def __init__(self, latency_count, num, height, width, time_quantum=1, packed_state=False, split_ratio=0.5):
+        super(PingPongSRAM1, self).__init__(latency_count, num, height, width, time_quantum, packed_state)
+
+        if not (0 < split_ratio < 1):
+            raise ValueError("Split ratio of ping-pong SRAM1 must be in (0, 1), got " + str(split_ratio))
+        self.split_ratio = split_ratio
+        self.split = 0
+
+    def dump_mappings(self):
+        super(PingPongSRAM1, self).dump_mappings()
+        print("| + ping-pong banks: " + str(self.split) + " + " + str(self.blocknum_row_sram_std - self.split) + " rows")
+
+    def add_mapping(self, blocknum_row, blocknum_col, subsum_cnt, blocknum_row_sram):
+        super(PingPongSRAM1, self).add_mapping(blocknum_row, blocknum_col, subsum_cnt, blocknum_row_sram)
+        if blocknum_row_sram < 2:
+            raise ValueError("Ping-pong SRAM1 needs at least 2 mac_lane rows in a sub-SRAM, got " + str(blocknum_row_sram))
+        self.split = min(max(int(round(blocknum_row_sram * self.split_ratio)), 1), blocknum_row_sram - 1)
+
+    def bank(self, row):
+        """ [first row, last row + 1) of the bank of row """
+        return (0, self.split) if row < self.split else (self.split, self.blocknum_row_sram_std)
+
+    def removable_cnt(self, start, cnt):
+        cnt = super(PingPongSRAM1, self).removable_cnt(start, cnt)
+        # a band can only reach into a bank that the core has freed entirely
+        for bank_start in (0, self.split):
+            bank_start *= self.subsum_cnt_std
+            if start <= bank_start < start + cnt:
+                (_, bank_end) = self.bank(bank_start // self.subsum_cnt_std)
+                states = np.asarray(self.sram_state_matrix[bank_start:bank_end * self.subsum_cnt_std])
+                if np.any(states != utils.REMOVE):
+                    return bank_start - start
+        return cnt
+
+class CheckedSRAM1(RingSRAM1):
+    """
+    Core SRAM1 that runs the ring pointers together with the state matrix, and cross-checks them after every state transition
+
+    matrix: the state matrix-backed SRAM1 that runs side by side
+    """
+
+    __slots__ = ("matrix",)
+
+    def __init__(self, latency_count, num, height, width, time_quantum=1, packed_state=False):
+        super(CheckedSRAM1, self).__init__(latency_count, num, height, width, time_quantum, packed_state)
+
+    @RingSRAM1.sram_state_matrix.setter
+    def sram_state_matrix(self, sram_state_matrix):
+        RingSRAM1.sram_state_matrix.fset(self, sram_state_matrix)
+        self.matrix = np.full(self.height, utils.REMOVE, dtype=np.uint8)
+
+    def check(self, op):
+        if not np.array_equal(self.sram_state_matrix, self.matrix):
+            raise RuntimeError("SRAM1 ring differs from the state matrix after " + op + "\n" + 
+                                "ring:   " + str(self.sram_state_matrix[:self.ring_size]) + "\n" + "matrix: " + str(self.matrix[:self.ring_size]))
+
+    def removable_cnt(self, start, cnt):
+        res = super(CheckedSRAM1, self).removable_cnt(start, cnt)
+        not_remove = np.flatnonzero(self.matrix[start:start + cnt] != utils.REMOVE)
+        if res != (not_remove[0] if len(not_remove) else len(self.matrix[start:start + cnt])):
+            raise RuntimeError("SRAM1 ring differs from the state matrix in the removable data from " + str(start))
+        return res
+
+    def ready(self):
+        res = super(CheckedSRAM1, self).ready()
+        if res != (self.matrix[self.blocknum_row_sram_idx_cal * self.subsum_cnt_std + self.subsum_cnt_idx_cal] == utils.READY):
+            raise RuntimeError("SRAM1 ring differs from the state matrix in the ready status")
+        return res
+
+    def update_to_removing(self, start, end):
+        super(CheckedSRAM1, self).update_to_removing(start, end)
+        self.matrix[start:end + 1] = utils.REMOVING
+        self.check("update_to_removing")
+
+    def update_to_ready(self, start, end):
+        super(CheckedSRAM1, self).update_to_ready(start, end)
+        self.matrix[start:end + 1] = utils.READY
+        self.check("update_to_ready")
+
+    def update_to_remove(self, blocknum_row_sram_idx_cal):
+        super(CheckedSRAM1, self).update_to_remove(blocknum_row_sram_idx_cal)
+        self.matrix[blocknum_row_sram_idx_cal * self.subsum_cnt_std:(blocknum_row_sram_idx_cal + 1) * self.subsum_cnt_std] = utils.REMOVE
+        self.check("update_to_remove")
+
 class SRAM2(SRAM):
     """ 
     Core SRAM2
@@ -304,8 +525,11 @@ class SRAM2(SRAM):
     blocknum_col_sram_idx_cal: record which mac_lane column in the SRAM is now calculating, < self.blocknum_col_sram_std
     """
 
-    def __init__(self, latency_count, num, height, width):
-        super(SRAM2, self).__init__(latency_count, num, height, width)
+    __slots__ = ("block_col_idx_cal", "subsum_cnt_idx_cal", "blocknum_col_sram_idx_cal", "block_col_std", "blocknum_col_std",
+                 "blocknum_row_std", "subsum_cnt_std", "logic_sram_col_cnt_std", "blocknum_col_sram_std")
+
+    def __init__(self, latency_count, num, height, width, time_quantum=1, packed_state=False):
+        super(SRAM2, self).__init__(latency_count, num, height, width, time_quantum, packed_state)
     
         self.block_col_idx_cal = 0
         self.subsum_cnt_idx_cal = 0
@@ -363,68 +587,43 @@ class SRAM2(SRAM):
             # not all matrix data can be stored in SRAM at the same time
             return (self.sram_state_matrix[self.subsum_cnt_idx_cal * self.blocknum_col_sram_std * self.block_col_std + (blocknum_col_cal % self.blocknum_col_sram_std) * self.block_col_std + self.block_col_idx_cal] == utils.READY)
     
-    def update_to_removing(self, row_idx_start, row_idx_end, col_idx_start, col_idx_end):
-        for i in range(col_idx_start, col_idx_end + 1):
-            if col_idx_start == col_idx_end:
-                j_start = row_idx_start
-                j_end = row_idx_end + 1
-            elif (col_idx_end - col_idx_start) == 1:
-                if i == col_idx_start:
-                    j_start = row_idx_start
-                    j_end = self.subsum_cnt_std
-                else:
-                    j_start = 0
-                    j_end = row_idx_end + 1
-            else:
-                if i == col_idx_start:
-                    j_start = row_idx_start
-                    j_end = self.subsum_cnt_std
-                elif i == col_idx_end:
-                    j_start = 0
-                    j_end = row_idx_end + 1
-                else:
-                    j_start = 0
-                    j_end = self.subsum_cnt_std
+    def col_state_matrix(self):
+        """ 2-D view of the state matrix, a row for a subsum and a column for a column of data in the SRAM """
+
+        if self.blocknum_col_std <= self.blocknum_col_sram_std:
+            col_cnt = self.logic_sram_col_cnt_std
+        else:
+            col_cnt = self.blocknum_col_sram_std * self.block_col_std
+        row_cnt = self.sram_state_matrix.shape[0] // col_cnt
+
+        return self.sram_state_matrix[:row_cnt * col_cnt].reshape(row_cnt, col_cnt)
 
-            for j in range(j_start, j_end):
-                if self.blocknum_col_std <= self.blocknum_col_sram_std:
-                    for k in range(self.block_col_std):
-                        self.sram_state_matrix[j * self.logic_sram_col_cnt_std + (i - 1) * self.block_col_std + k] = utils.REMOVING
-                else: 
-                    for k in range(self.block_col_std):
-                        self.sram_state_matrix[j * self.blocknum_col_sram_std * self.block_col_std + (i - 1) * self.block_col_std + k] = utils.REMOVING
+    def update_cols(self, row_idx_start, row_idx_end, col_idx_start, col_idx_end, state):
+        """ 
+        Update the band of data transferred from GB, mac_lane columns starting from 1, return the number of data in the band
+
+        The band starts from subsum row_idx_start of column col_idx_start and ends at subsum row_idx_end of column col_idx_end,
+        the columns in between are updated entirely
+        """
+
+        if col_idx_end < col_idx_start:
+            return 0
+
+        state_matrix = self.col_state_matrix()
+        if col_idx_start == col_idx_end:
+            state_matrix[row_idx_start:row_idx_end + 1, (col_idx_start - 1) * self.block_col_std:col_idx_start * self.block_col_std] = state
+            return (row_idx_end - row_idx_start + 1) * self.block_col_std
+        else:
+            state_matrix[row_idx_start:self.subsum_cnt_std, (col_idx_start - 1) * self.block_col_std:col_idx_start * self.block_col_std] = state
+            state_matrix[:self.subsum_cnt_std, col_idx_start * self.block_col_std:(col_idx_end - 1) * self.block_col_std] = state
+            state_matrix[:row_idx_end + 1, (col_idx_end - 1) * self.block_col_std:col_idx_end * self.block_col_std] = state
+            return (self.subsum_cnt_std - row_idx_start + (col_idx_end - col_idx_start - 1) * self.subsum_cnt_std + row_idx_end + 1) * self.block_col_std
+
+    def update_to_removing(self, row_idx_start, row_idx_end, col_idx_start, col_idx_end):
+        return self.update_cols(row_idx_start, row_idx_end, col_idx_start, col_idx_end, utils.REMOVING)
 
     def update_to_ready(self, row_idx_start, row_idx_end, col_idx_start, col_idx_end):
-        for i in range(col_idx_start, col_idx_end + 1):
-            if col_idx_start == col_idx_end:
-                j_start = row_idx_start
-                j_end = row_idx_end + 1
-            elif (col_idx_end - col_idx_start) == 1:
-                if i == col_idx_start:
-                    j_start = row_idx_start
-                    j_end = self.subsum_cnt_std
-                else:
-                    j_start = 0
-                    j_end = row_idx_end + 1
-            else:
-                if i == col_idx_start:
-                    j_start = row_idx_start
-                    j_end = self.subsum_cnt_std
-                elif i == col_idx_end:
-                    j_start = 0
-                    j_end = row_idx_end + 1
-                else:
-                    j_start = 0
-                    j_end = self.subsum_cnt_std
-
-            for j in range(j_start, j_end):
-                if self.blocknum_col_std <= self.blocknum_col_sram_std:
-                    for k in range(self.block_col_std):
-                        self.sram_state_matrix[j * self.logic_sram_col_cnt_std + (i - 1) * self.block_col_std + k] = utils.READY
-                else: 
-                    for k in range(self.block_col_std):
-                        self.sram_state_matrix[j * self.blocknum_col_sram_std * self.block_col_std + (i - 1) * self.block_col_std + k] = utils.READY
-        
+        return self.update_cols(row_idx_start, row_idx_end, col_idx_start, col_idx_end, utils.READY)
 
     def update_to_remove(self, blocknum_col, block_col_idx_cal):
         if self.blocknum_col_std <= self.blocknum_col_sram_std:
@@ -443,10 +642,10 @@ class SRAM2(SRAM):
         """
 
         if matrix == "K":
-            # row idx (starts from 0) of sram state matrix 
-            row = int((self.array_block_counter // 2 + 1) % 2)
+            # row idx (starts from 0) of sram state matrix, 2 blocks of K fill a row of K^T
+            row = ((self.array_block_counter - 1) % blocknum_col) // 2
             # col has mac_lane sub-cols
-            col = (self.array_block_counter + 2) // blocknum_col - 1
+            col = (self.array_block_counter - 1) // blocknum_col
             for i in range(self.block_col_std):
                 self.sram_state_matrix[row * self.logic_sram_col_cnt_std + col * self.block_col_std + i] = utils.READY
         elif matrix == "V":                        # FIXME 2 = mac_num//mac_lane * blocknum_col
@@ -0,0 +1,222 @@
+import numpy as np
+
+import math
+
+"""
+Storage of the state matrices of all units
+
+States are 0-4(see utils), a state matrix is stored as a numpy array of STATE_DTYPE by default,
+or packed into STATE_BITS bits per state to simulate large configs with less memory
+"""
+STATE_DTYPE = np.uint8
+STATE_BITS = 3
+STATE_NUM = 1 << STATE_BITS
+
+
+def new_state_matrix(shape, state, packed=False):
+    """
+    Create a state matrix with all data in the given state
+
+    shape: int or (row, col)
+    packed: whether the states are packed into STATE_BITS bits
+    """
+
+    if packed:
+        return PackedStateMatrix(shape, state)
+    return np.full(shape, state, dtype=STATE_DTYPE)
+
+
+def count_states(states):
+    """ Number of data in every state, indexed by state """
+    return np.bincount(np.asarray(states).ravel(), minlength=STATE_NUM).tolist()
+
+
+def set_states(state_matrix, state_cnt, start, end, state):
+    """
+    Set the data of [start, end) in a 1-D state matrix to state, keeping state_cnt(from count_states) up to date
+
+    end: None for the end of the state matrix
+    """
+
+    old_cnt = count_states(state_matrix[start:end])
+    state_matrix[start:end] = state
+    new_cnt = count_states(state_matrix[start:end])
+    for i in range(STATE_NUM):
+        state_cnt[i] += new_cnt[i] - old_cnt[i]
+
+
+class PackedStateMatrix:
+    """
+    State matrix packing every state into STATE_BITS bits
+
+    The states are stored in STATE_BITS bit planes, bit b of the state of data i is bit i of planes[b].
+A single state is read and written bit by bit, a slice is unpacked/filled with whole-byte NumPy bit operations.
+    Only the part of numpy indexing used by the units is supported:
+    ints and contiguous slices, and (row, col) pairs of them for 2-D matrices, the value to set must be a single state.
+    A row or a slice is a view sharing the planes like numpy, use np.asarray() to get an unpacked copy.
+
+    planes: STATE_BITS bytearrays, shared by the views
+    offset: flattened idx of the first data of this view in the planes
+    shape: (size,) or (row, col)
+    """
+
+    __slots__ = ("shape", "size", "offset", "planes")
+
+    def __init__(self, shape, state=0, planes=None, offset=0):
+        self.shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        self.size = math.prod(self.shape)
+        self.offset = offset
+
+        if planes is None:
+            self.planes = [bytearray((self.size + 7) // 8) for _ in range(STATE_BITS)]
+            self.fill(state)
+        else:
+            self.planes = planes
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def nbytes(self):
+        """ Bytes of the planes, views share the planes of the matrix they come from """
+        return sum(len(plane) for plane in self.planes)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def view(self, offset, shape):
+        return PackedStateMatrix(shape, planes=self.planes, offset=self.offset + offset)
+
+    def row_size(self):
+        """ Number of data in an entry of the first dimension """
+        return self.shape[1] if self.ndim == 2 else 1
+
+    def get(self, idx):
+        """ State of the data of flattened idx in the planes """
+
+        byte = idx >> 3
+        bit = idx & 7
+        # STATE_BITS planes
+        (plane0, plane1, plane2) = self.planes
+        return ((plane0[byte] >> bit) & 1) | (((plane1[byte] >> bit) & 1) << 1) | (((plane2[byte] >> bit) & 1) << 2)
+
+    def set(self, idx, state):
+        byte = idx >> 3
+        mask = 1 << (idx & 7)
+        for plane in self.planes:
+            if state & 1:
+                plane[byte] |= mask
+            else:
+                plane[byte] &= ~mask & 0xFF
+            state >>= 1
+
+    def unpack(self):
+        """ Unpacked copy of this view """
+
+        start = self.offset
+        end = self.offset + self.size
+        # the bytes holding the view in all planes, unpacked at once
+        planes = np.stack([np.frombuffer(plane, dtype=np.uint8)[start >> 3:(end + 7) >> 3] for plane in self.planes])
+        bits = np.unpackbits(planes, axis=1, bitorder='little')[:, start & 7:(start & 7) + self.size]
+        res = bits[0] | (bits[1] << 1) | (bits[2] << 2)
+        return res.reshape(self.shape)
+
+    def fill(self, state):
+        """ Set all data of this view to state """
+
+        start = self.offset
+        end = self.offset + self.size
+        if end <= start:
+            return
+        first = start >> 3
+        last = (end - 1) >> 3
+        # bits of the view in the first and the last byte
+        first_mask = (0xFF << (start & 7)) & 0xFF
+        last_mask = 0xFF >> (7 - ((end - 1) & 7))
+        if first == last:
+            (first_mask, last_mask) = (first_mask & last_mask, 0)
+        for plane in self.planes:
+            plane = np.frombuffer(plane, dtype=np.uint8)
+            if state & 1:
+                plane[first] |= first_mask
+                plane[last] |= last_mask
+                plane[first + 1:last] = 0xFF
+            else:
+                plane[first] &= ~first_mask & 0xFF
+                plane[last] &= ~last_mask & 0xFF
+                plane[first + 1:last] = 0
+            state >>= 1
+
+    def reshape(self, *shape):
+        if (len(shape) == 1) and isinstance(shape[0], tuple):
+            shape = shape[0]
+        if -1 in shape:
+            known = math.prod([i for i in shape if i != -1])
+            shape = tuple((self.size // known) if i == -1 else i for i in shape)
+        if math.prod(shape) != self.size:
+            raise ValueError("cannot reshape state matrix of size " + str(self.size) + " into shape " + str(shape))
+        return self.view(0, shape)
+
+    def __getitem__(self, key):
+        if (type(key) is int) and (0 <= key < self.shape[0]) and (len(self.shape) == 1):
+            # a single state, the most frequent access
+            return self.get(self.offset + key)
+
+        if isinstance(key, tuple):
+            (row, col) = key
+            if (type(row) is int) and (type(col) is int) and (0 <= row < self.shape[0]) and (0 <= col < self.shape[1]):
+                # a single state, without the view of the row
+                return self.get(self.offset + row * self.shape[1] + col)
+            if isinstance(row, slice):
+                return np.asarray(self[row])[:, col]
+            return self[row][col]
+
+        if isinstance(key, slice):
+            (start, stop, step) = key.indices(self.shape[0])
+            if step != 1:
+                raise IndexError("only contiguous slices of a state matrix are supported")
+            return self.view(start * self.row_size(), (max(stop - start, 0),) + self.shape[1:])
+
+        key = int(key)
+        if key < 0:
+            key += self.shape[0]
+        if (key < 0) or (key >= self.shape[0]):
+            raise IndexError("index " + str(key) + " is out of bounds for state matrix of size " + str(self.shape[0]))
+        if len(self.shape) == 2:
+            return self.view(key * self.shape[1], (self.shape[1],))
+        return self.get(self.offset + key)
+
+    def __setitem__(self, key, state):
+        if isinstance(key, tuple):
+            (row, col) = key
+            if isinstance(row, slice):
+                rows = self[row]
+                for i in range(rows.shape[0]):
+                    rows[i][col] = state
+            else:
+                self[row][col] = state
+            return
+
+        target = self[key]
+        if isinstance(target, PackedStateMatrix):
+            target.fill(state)
+        else:
+            key = int(key)
+            self.set(self.offset + (key + self.shape[0] if key < 0 else key), state)
+
+    def __array__(self, dtype=None, copy=None):
+        res = self.unpack()
+        return res if dtype is None else res.astype(dtype)
+
+    def __eq__(self, other):
+        return self.unpack() == other
+
+    def __ne__(self, other):
+        return self.unpack() != other
+
+    def __str__(self):
+        return str(self.unpack())
+
+    def __repr__(self):
+        return repr(self.unpack())
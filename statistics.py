@@ -5,7 +5,27 @@ class Statistics:
     util_counter: calculate core's utilization during whole template's calculation
                   we assume that only reading data from core SRAM to calculator and doing calculation means that a core is utilized, data transferred from other storage into the core 
                   and data removement from core's array to other storage do not count as utilized
+                  for softmax/layernorm, the time doing calculation
+    sram_wait_counter: time a core's calculator is free but its SRAM operands aren't ready, i.e. the core waits for the refill of its SRAMs
+    transfer_cnt: number of completed transfers of every channel of a global buffer, e.g. "sram1", "array"
+    transfer_data: number of data transferred by every channel, a data of "sram1" is mac_lane*mac_num BYTE, "sram2" MAC_num BYTE,
+                   "array" mac_lane BYTE, "softmax"/"layernorm" a mac_lane*mac_lane block, see energy
+    energy_cnt: count of every energy event of the unit, see energy
     """
 
+    __slots__ = ("util_counter", "sram_wait_counter", "transfer_cnt", "transfer_data", "energy_cnt")
+
     def __init__(self):
-        self.util_counter = 0
\ No newline at end of file
+        self.util_counter = 0
+        self.sram_wait_counter = 0
+        self.transfer_cnt = {}
+        self.transfer_data = {}
+        self.energy_cnt = {}
+
+    def count_transfer(self, channel, data=0):
+        self.transfer_cnt[channel] = self.transfer_cnt.get(channel, 0) + 1
+        if data:
+            self.transfer_data[channel] = self.transfer_data.get(channel, 0) + data
+
+    def count_energy(self, event, cnt=1):
+        self.energy_cnt[event] = self.energy_cnt.get(event, 0) + cnt
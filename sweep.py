@@ -0,0 +1,206 @@
+from simulator import SimulationConfig, simulate
+import main
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import shlex
+import sys
+import time
+import traceback
+
+"""
+Design space sweep
+
+Run the simulation of many configurations in parallel, every configuration is a list of main.py arguments.
+Every job runs in its own process, so a job that exceeds the timeout can be killed, and the result of every job is
+written into the CSV as soon as it finishes.
+
+e.g.
+python sweep.py --base "--core-num 8 --embedding-dim 256 --head-num 4" --grid MAC-lane=8,16 --grid seq-length=64,128 -o sweep.csv
+python sweep.py --list configs.txt -j 8 --timeout 3600 -o sweep.csv
+python sweep.py --base "--hardware hw.json --workload bert_base.json" --grid GB-access-latency=20,50 -o sweep.csv
+"""
+
+""" Status of a job """
+OK = "ok"
+# the configuration hits a capacity check or isn't supported, e.g. NotImplementedError
+UNSUPPORTED = "unsupported"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+RESULT_FIELDS = ["job", "status", "cycles", "latency_ns", "utilization", "complete_ns", "softmax_busy_cycles", "layernorm_busy_cycles",
+                 "gb_transfer_cnt", "block_complete_ns", "block_interval_ns", "image_interval_ns", "steady_utilization", "gb_weight_refetch", "sram_wait_cycles", "gb_bus_wait_cycles", "dram_traffic_bytes",
+                 "dram_stall_cycles", "dram_row_hits", "dram_row_misses", "gb_peak_bytes", "gb_spill_bytes", "gb_capacity_stall_cycles", "energy_pj", "power_mw", "edp", "seconds", "message"]
+
+
+def argparser():
+    """ Argument parser. """
+
+    ap = argparse.ArgumentParser()
+
+    ap.add_argument('--base', type = str, default = '', \
+                    help = 'main.py arguments shared by all jobs')
+    ap.add_argument('--grid', type = str, action = 'append', default = [], \
+                    help = 'knob=value1,value2,... e.g. MAC-lane=8,16, every combination of the grids is a job')
+    ap.add_argument('--list', type = str, default = '', \
+                    help = 'file with main.py arguments of a job in every line, combined with the grids')
+    ap.add_argument('-j', '--jobs', type = int, default = os.cpu_count(), \
+                    help = 'number of jobs running in parallel')
+    ap.add_argument('--timeout', type = float, default = 0, \
+                    help = 'seconds a job can run before it is killed, 0 for no timeout')
+    ap.add_argument('-o', '--output', type = str, default = 'sweep.csv', \
+                    help = 'CSV file of the results, a .parquet file is converted from the CSV when all jobs finish(needs pandas)')
+    return ap
+
+
+def get_grid(grids):
+    """ Arguments of every combination of the grids """
+
+    knobs = []
+    for grid in grids:
+        (knob, _, values) = grid.partition("=")
+        if (knob == "") or (values == ""):
+            raise ValueError("Grid must be knob=value1,value2,..., got " + grid)
+        knobs.append([["--" + knob.lstrip("-"), value] for value in values.split(",")])
+
+    return [sum(combination, []) for combination in itertools.product(*knobs)]
+
+
+def get_jobs(args):
+    """ main.py arguments of every job """
+
+    base = shlex.split(args.base)
+    configs = [[]]
+    if args.list:
+        with open(args.list) as f:
+            configs = [shlex.split(line) for line in f if line.strip() and (line.lstrip()[0] != "#")]
+
+    return [base + config + grid for config in configs for grid in get_grid(args.grid)]
+
+
+def run_job(args, conn):
+    """ Simulate one job in a worker process, send (status, result, message) back """
+
+    sys.stdout = open(os.devnull, "w")
+    try:
+        conn.send((OK, simulate(SimulationConfig.from_args(args)), ""))
+    except NotImplementedError as e:
+        conn.send((UNSUPPORTED, None, str(e)))
+    except Exception as e:
+        conn.send((ERROR, None, traceback.format_exception_only(type(e), e)[-1].strip()))
+    finally:
+        conn.close()
+
+
+def sweep(jobs, output, workers, timeout=0):
+    """
+    Run all jobs, return the number of jobs of every status
+
+    jobs: main.py arguments of every job
+    """
+
+    # all knobs of main.py, so every row records the full configuration
+    knobs = list(vars(main.argparser().parse_args([])))
+    # parsed once here with the description files, the workers take the parsed arguments
+    configs = [main.parse_args(argv) for argv in jobs]
+    status_cnt = {OK: 0, UNSUPPORTED: 0, ERROR: 0, TIMEOUT: 0}
+
+    f = open(output, "w", newline="")
+    writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS + knobs)
+    writer.writeheader()
+
+    def finish(idx, status, result, start, message):
+        row = {"job": idx, "status": status, "seconds": round(time.time() - start, 2), "message": message}
+        if result is not None:
+            row.update({"cycles": result.cycles, "latency_ns": result.latency_ns,
+                        "utilization": ";".join(str(util) for util in result.utilization),
+                        "complete_ns": ";".join(str(latency) for latency in result.core_complete_ns),
+                        "softmax_busy_cycles": result.softmax_busy_cycles, "layernorm_busy_cycles": result.layernorm_busy_cycles,
+                        "gb_transfer_cnt": json.dumps(result.gb_transfer_cnt),
+                        "block_complete_ns": ";".join(str(latency) for latency in result.block_complete_ns),
+                        "block_interval_ns": result.block_interval_ns,
+                        "image_interval_ns": result.image_interval_ns,
+                        "steady_utilization": ";".join(str(util) for util in result.steady_utilization),
+                        "gb_weight_refetch": ";".join(str(times) for times in result.gb_weight_refetch),
+                        "sram_wait_cycles": ";".join(str(cycles) for cycles in result.core_sram_wait_cycles),
+                        "gb_bus_wait_cycles": json.dumps(result.gb_bus_wait_cycles),
+                        "dram_traffic_bytes": ";".join(str(traffic) for traffic in result.dram_traffic_bytes),
+                        "dram_stall_cycles": ";".join(str(stall) for stall in result.dram_stall_cycles),
+                        "dram_row_hits": result.dram_row_hits, "dram_row_misses": result.dram_row_misses,
+                        "gb_peak_bytes": ";".join(str(peak) for peak in result.gb_peak_bytes),
+                        "gb_spill_bytes": ";".join(str(spill) for spill in result.gb_spill_bytes),
+                        "gb_capacity_stall_cycles": ";".join(str(stall) for stall in result.gb_capacity_stall_cycles),
+                        "energy_pj": result.energy_pj, "power_mw": result.power_mw, "edp": result.edp})
+        row.update(vars(configs[idx]))
+        writer.writerow(row)
+        f.flush()
+        status_cnt[status] += 1
+        print("[" + str(sum(status_cnt.values())) + "/" + str(len(jobs)) + "] job " + str(idx) + " " + status
+              + ((": " + str(row["latency_ns"]) + "ns") if status == OK else ((": " + message) if message else "")))
+
+    pending = list(range(len(jobs)))
+    pending.reverse()
+    # conn -> (job idx, process, start time)
+    running = {}
+    while pending or running:
+        while pending and (len(running) < workers):
+            idx = pending.pop()
+            (recv_conn, send_conn) = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=run_job, args=(configs[idx], send_conn), daemon=True)
+            process.start()
+            send_conn.close()
+            running[recv_conn] = (idx, process, time.time())
+
+        wait = None
+        if timeout > 0:
+            wait = max(min(start + timeout for (_, _, start) in running.values()) - time.time(), 0)
+        for conn in multiprocessing.connection.wait(list(running), wait):
+            (idx, process, start) = running.pop(conn)
+            try:
+                (status, result, message) = conn.recv()
+            except EOFError:
+                # the worker dies without a result, e.g. killed by the OOM killer
+                (status, result, message) = (ERROR, None, "worker exits with code " + str(process.exitcode))
+            conn.close()
+            process.join()
+            finish(idx, status, result, start, message)
+
+        if timeout > 0:
+            for (conn, (idx, process, start)) in list(running.items()):
+                if time.time() - start >= timeout:
+                    process.kill()
+                    process.join()
+                    conn.close()
+                    del running[conn]
+                    finish(idx, TIMEOUT, None, start, "killed after " + str(timeout) + "s")
+
+    f.close()
+
+    return status_cnt
+
+
+def to_parquet(csv_path, parquet_path):
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("pandas(with pyarrow or fastparquet) is needed to write " + parquet_path + ", results are in " + csv_path) from None
+    pd.read_csv(csv_path).to_parquet(parquet_path)
+
+
+if __name__ == "__main__":
+    args = argparser().parse_args()
+    jobs = get_jobs(args)
+
+    output = args.output
+    if output.endswith(".parquet"):
+        output = output[:-len(".parquet")] + ".csv"
+    status_cnt = sweep(jobs, output, max(args.jobs, 1), args.timeout)
+    if args.output != output:
+        to_parquet(output, args.output)
+
+    print("Sweep of " + str(len(jobs)) + " jobs completes: " + ", ".join(status + " " + str(cnt) for (status, cnt) in status_cnt.items()))
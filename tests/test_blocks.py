@@ -0,0 +1,19 @@
+from simulator import SimulationConfig, simulate
+import utils
+
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2, no_cache=True)
+
+
+def test_block_chaining():
+    single = simulate(SimulationConfig(**TINY))
+    result = simulate(SimulationConfig(**dict(TINY, block_num=2)))
+    assert len(result.block_start_ns) == len(result.block_complete_ns) == 2
+    assert result.block_start_ns == sorted(result.block_start_ns)
+    assert result.block_complete_ns == sorted(result.block_complete_ns)
+    # the last block completes during the last tick
+    assert round((result.latency_ns - result.block_complete_ns[-1]) / utils.METATIME) == 1
+    # the first block runs like a single one, the second starts once the Q/K/V cores are free
+    assert result.block_complete_ns[0] <= single.latency_ns
+    assert result.block_start_ns[1] < result.block_complete_ns[0]
+    assert result.block_interval_ns == result.block_complete_ns[1] - result.block_complete_ns[0]
+    assert single.block_complete_ns == []
@@ -0,0 +1,46 @@
+from main import parse_args
+from plan import Plan
+import description
+import mapper
+
+import json
+import os
+
+import pytest
+
+DESCRIPTIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "descriptions")
+
+
+def write(tmp_path, obj):
+    path = str(tmp_path / "description.json")
+    with open(path, "w") as f:
+        json.dump(obj, f)
+    return path
+
+
+def test_load_descriptions():
+    args = parse_args(["--hardware", os.path.join(DESCRIPTIONS, "hw_8core.json"),
+                       "--workload", os.path.join(DESCRIPTIONS, "seq128_emb512.json")])
+    assert (args.core_num, args.MAC_lane, args.GB_access_latency) == (8, 16, 50)
+    assert (args.seq_length, args.embedding_dim, args.head_num) == (128, 512, 8)
+    # the command line overrides the description
+    args = parse_args(["--workload", os.path.join(DESCRIPTIONS, "seq128_emb512.json"), "--seq-length", "64"])
+    assert (args.seq_length, args.embedding_dim) == (64, 512)
+
+
+def test_feeds():
+    args = parse_args(["--core-num", "8"])
+    mapping = mapper.map_cores(args.core_num, args.head_num)
+    with open(os.path.join(DESCRIPTIONS, "hw_8core.json")) as f:
+        assert Plan(args, mapping.template_core_num).feeds() == json.load(f)["feeds"]
+
+
+def test_bad_descriptions(tmp_path):
+    with pytest.raises(ValueError):
+        description.load_description(write(tmp_path, {"hardware": {"core_count": 8}}))
+    with pytest.raises(ValueError):
+        description.load_description(write(tmp_path, {"workload": {"seq_length": True}}))
+    with pytest.raises(ValueError):
+        description.load_description(write(tmp_path, {"software": {}}))
+    with pytest.raises(NotImplementedError):
+        description.load_description(write(tmp_path, {"hardware": {"core_num": 8}, "feeds": {"gb0": "core1"}}))
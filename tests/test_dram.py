@@ -0,0 +1,26 @@
+from simulator import SimulationConfig, simulate
+
+import pytest
+
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2, no_cache=True)
+
+
+def weight_bytes(embedding_dim, head_num):
+    """ BYTE of the weight matrix each GB provides: Q/K/V, A, A', LP, FC1, FC2 and the output """
+    head_weight = embedding_dim * (embedding_dim // head_num)
+    return [head_weight] * 3 + [0, 0, embedding_dim * embedding_dim, embedding_dim * 4 * embedding_dim, 4 * embedding_dim * embedding_dim, 0]
+
+
+@pytest.mark.parametrize("sram_capacity", [65536, 16384])
+def test_dram_traffic(sram_capacity):
+    result = simulate(SimulationConfig(**dict(TINY, DRAM_channels=2, SRAM_capacity=sram_capacity)))
+    # every tile of the weights is fetched again
+    assert result.dram_traffic_bytes == [size * times for (size, times) in zip(weight_bytes(128, 2), result.gb_weight_refetch)]
+    assert result.dram_row_hits + result.dram_row_misses == sum(result.dram_traffic_bytes) // 64
+    assert all((stall > 0) == (size > 0) for (stall, size) in zip(result.dram_stall_cycles, weight_bytes(128, 2)))
+    assert result.cycles > simulate(SimulationConfig(**dict(TINY, SRAM_capacity=sram_capacity))).cycles
+
+
+def test_no_dram():
+    result = simulate(SimulationConfig(**TINY))
+    assert (result.dram_traffic_bytes, result.dram_row_hits, result.dram_row_misses) == ([], 0, 0)
@@ -0,0 +1,52 @@
+from simulator import SimulationConfig, simulate
+import energy
+import mapper
+
+import json
+import os
+
+import pytest
+
+DESCRIPTIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "descriptions")
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2, no_cache=True)
+
+
+def table(tmp_path, energies):
+    """ Energy table of energies and nothing else """
+    path = str(tmp_path / "energy.json")
+    with open(path, "w") as f:
+        json.dump(dict({event: 0.0 for event in energy.ENERGY_TABLE}, **energies), f)
+    return path
+
+
+def test_default_energy():
+    result = simulate(SimulationConfig(**TINY))
+    assert result.energy_pj == pytest.approx(2833130.6)
+    assert result.power_mw == pytest.approx(result.energy_pj / result.latency_ns)
+    assert result.edp == pytest.approx(result.energy_pj * result.latency_ns)
+    assert result.energy_pj == simulate(SimulationConfig(**dict(TINY, energy_table=os.path.join(DESCRIPTIONS, "energy_default.json")))).energy_pj
+
+
+@pytest.mark.parametrize("core_num", [8, 5, 10])
+def test_mac_energy(tmp_path, core_num):
+    # every MAC of every operation is counted once, however the operations are mapped
+    result = simulate(SimulationConfig(**dict(TINY, core_num=core_num, energy_table=table(tmp_path, {"mac": 1.0}))))
+    macs = mapper.operation_macs(32, 128, 2)
+    assert result.energy_pj == sum(macs.values())
+    if core_num == 8:
+        assert result.core_energy_pj == list(map(float, macs.values()))
+
+
+def test_leakage(tmp_path):
+    # every core and GB leaks until the end, including the idle ones
+    result = simulate(SimulationConfig(**dict(TINY, energy_table=table(tmp_path, {"core_leakage": 1.0, "gb_leakage": 2.0}))))
+    assert result.core_energy_pj == [float(result.cycles)] * 8
+    assert result.gb_energy_pj == [2.0 * result.cycles] * len(result.gb_energy_pj)
+    assert result.softmax_energy_pj == result.layernorm_energy_pj == 0
+
+
+def test_bad_table(tmp_path):
+    with pytest.raises(ValueError):
+        simulate(SimulationConfig(**dict(TINY, energy_table=table(tmp_path, {"mac": -1.0}))))
+    with pytest.raises(ValueError):
+        simulate(SimulationConfig(**dict(TINY, energy_table=table(tmp_path, {"dram": 1.0}))))
@@ -0,0 +1,29 @@
+from simulator import SimulationConfig, simulate
+import event_trace
+
+import json
+
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2, no_cache=True)
+
+
+def test_chrome_trace(tmp_path):
+    trace = str(tmp_path / "trace.bin")
+    result = simulate(SimulationConfig(**dict(TINY, event_trace=trace)))
+    out = str(tmp_path / "trace.json")
+    count = event_trace.to_chrome(trace, out)
+    with open(out) as f:
+        chrome = json.load(f)
+
+    events = [event for event in chrome["traceEvents"] if event["ph"] != "M"]
+    assert len(events) == count > 0
+    assert {event["ph"] for event in events} <= {"B", "E", "I"}
+    # every transfer begins and ends on its track, within the simulated time
+    for track in {(event["pid"], event["tid"]) for event in events}:
+        phases = [event["ph"] for event in events if (event["pid"], event["tid"]) == track]
+        assert phases.count("B") == phases.count("E")
+    assert max(event["ts"] for event in events) <= result.latency_ns / 1000
+    # every core completes once
+    completes = [event for event in events if event["name"] == event_trace.KINDS[event_trace.CORE_COMPLETE]]
+    assert len(completes) == 8
+    names = {event["args"]["name"] for event in chrome["traceEvents"] if event["name"] == "process_name"}
+    assert {"core0", "gb0", "softmax", "layernorm"} <= names
@@ -0,0 +1,15 @@
+from simulator import SimulationConfig, simulate
+
+import pytest
+
+""" Skipping the ticks where all units only count latency gives the result of polling every tick """
+
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2, no_cache=True)
+
+
+@pytest.mark.parametrize("config", [TINY, dict(TINY, DRAM_channels=2), dict(TINY, gb_bus_width=1)])
+def test_fast_forward(config):
+    result = simulate(SimulationConfig(**config))
+    polled = simulate(SimulationConfig(**dict(config, fast_forward=0)))
+    assert (result.cycles, result.core_busy_cycles, result.gb_transfer_cnt) == (polled.cycles, polled.core_busy_cycles, polled.gb_transfer_cnt)
+    assert result.core_sram_wait_cycles == polled.core_sram_wait_cycles
@@ -0,0 +1,25 @@
+from simulator import SimulationConfig, simulate
+import gb_bus
+
+import pytest
+
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2, no_cache=True)
+
+
+def test_wide_bus():
+    # every channel of the 9 GBs can carry a transfer at the same time
+    base = simulate(SimulationConfig(**TINY))
+    result = simulate(SimulationConfig(**dict(TINY, gb_bus_width=64)))
+    assert (result.cycles, result.core_busy_cycles) == (base.cycles, base.core_busy_cycles)
+    assert not any(any(wait.values()) for wait in result.gb_bus_wait_cycles)
+    assert base.gb_bus_wait_cycles == []
+
+
+@pytest.mark.parametrize("arbitration", gb_bus.ARBITRATIONS)
+def test_narrow_bus(arbitration):
+    base = simulate(SimulationConfig(**TINY))
+    result = simulate(SimulationConfig(**dict(TINY, gb_bus_width=1, gb_bus_arbitration=arbitration)))
+    assert sum(sum(wait.values()) for wait in result.gb_bus_wait_cycles) > 0
+    assert result.cycles > base.cycles
+    # the same transfers, only later
+    assert result.gb_transfer_cnt == base.gb_transfer_cnt
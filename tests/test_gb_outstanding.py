@@ -0,0 +1,36 @@
+from simulator import SimulationConfig, simulate
+
+import pytest
+
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2, no_cache=True)
+# a GB transfer carries a single data, so the Q/K/V cores wait for GB
+NARROW = dict(TINY, GB_SRAM_bandwidth=1)
+
+
+@pytest.mark.parametrize("config", [TINY, NARROW])
+def test_one_outstanding(config):
+    # the default timing, a channel is blocked until its transfer completes
+    base = simulate(SimulationConfig(**config))
+    result = simulate(SimulationConfig(**dict(config, GB_outstanding=1)))
+    assert (result.cycles, result.core_sram_wait_cycles, result.gb_transfer_cnt) == (base.cycles, base.core_sram_wait_cycles, base.gb_transfer_cnt)
+
+
+@pytest.mark.parametrize("config", [TINY, NARROW, dict(NARROW, GB_issue_interval=10)])
+def test_outstanding(config):
+    base = simulate(SimulationConfig(**config))
+    result = simulate(SimulationConfig(**dict(config, GB_outstanding=4)))
+    assert result.cycles <= base.cycles
+    assert sum(result.core_sram_wait_cycles) <= sum(base.core_sram_wait_cycles)
+    assert result.gb_transfer_cnt == base.gb_transfer_cnt
+
+
+def test_pipelined_narrow():
+    # the transfers of a channel overlap instead of waiting for each other
+    base = simulate(SimulationConfig(**NARROW))
+    result = simulate(SimulationConfig(**dict(NARROW, GB_outstanding=4)))
+    assert result.cycles < base.cycles
+
+
+def test_outstanding_bus():
+    with pytest.raises(NotImplementedError):
+        simulate(SimulationConfig(**dict(TINY, GB_outstanding=4, gb_bus_width=1)))
@@ -0,0 +1,42 @@
+from simulator import SimulationConfig, simulate
+import gb_space
+
+import pytest
+
+# weights prefetched from DRAM into a 16 KB buffer, GB6 needs 1 KB more for the FC1 results
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2, no_cache=True, DRAM_channels=2, GB_weight_buffer=16384)
+
+
+@pytest.mark.parametrize("policy", gb_space.SPILL_POLICIES)
+def test_capacity(policy):
+    base = simulate(SimulationConfig(**TINY))
+    result = simulate(SimulationConfig(**dict(TINY, GB_capacity=17408, GB_spill_policy=policy)))
+    assert max(result.gb_peak_bytes) <= 17408
+    assert result.gb_spill_bytes == [0] * 8
+    assert result.cycles == base.cycles
+    assert base.gb_peak_bytes == []
+
+
+def test_spill():
+    result = simulate(SimulationConfig(**dict(TINY, GB_capacity=16896, GB_spill_policy="spill")))
+    assert max(result.gb_peak_bytes) <= 16896
+    assert sum(result.gb_spill_bytes) > 0
+
+
+def test_stall_deadlock():
+    # the FC2 core waits for FC1 results that can't fit besides the weights
+    with pytest.raises(RuntimeError):
+        simulate(SimulationConfig(**dict(TINY, GB_capacity=16896, GB_spill_policy="stall")))
+
+
+@pytest.mark.parametrize("policy", gb_space.SPILL_POLICIES)
+def test_block_weights(policy):
+    # the weights of only one block fit, the second block starts when the first completes
+    result = simulate(SimulationConfig(**dict(TINY, block_num=2, GB_capacity=17408, GB_spill_policy=policy)))
+    assert max(result.gb_peak_bytes) <= 17408
+    assert result.block_start_ns[1] >= result.block_complete_ns[0]
+
+
+def test_too_small():
+    with pytest.raises(ValueError):
+        simulate(SimulationConfig(**dict(TINY, GB_capacity=8192)))
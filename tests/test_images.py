@@ -0,0 +1,25 @@
+from simulator import SimulationConfig, simulate
+import utils
+
+import pytest
+
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2, no_cache=True)
+
+
+def test_throughput():
+    single = simulate(SimulationConfig(**TINY))
+    result = simulate(SimulationConfig(**dict(TINY, image_num=2)))
+    assert len(result.image_start_ns) == len(result.image_complete_ns) == 2
+    assert result.image_complete_ns == sorted(result.image_complete_ns)
+    # the second image overlaps the first in the pipeline
+    assert result.image_interval_ns < single.latency_ns
+    assert result.image_interval_ns == result.image_complete_ns[1] - result.image_complete_ns[0]
+    assert 0 < result.steady_cycles < result.cycles
+    assert all(0 <= util <= 1 for util in result.steady_utilization)
+
+
+def test_image_interval():
+    # an image arriving after the previous one completes runs like the first one
+    result = simulate(SimulationConfig(**dict(TINY, image_num=2, image_interval=50000)))
+    assert result.image_start_ns[1] == utils.metatime_to_ns(50000)
+    assert result.image_latency_ns[1] == pytest.approx(result.image_latency_ns[0])
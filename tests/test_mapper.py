@@ -0,0 +1,41 @@
+from simulator import SimulationConfig, simulate
+import mapper
+
+import pytest
+
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2, no_cache=True)
+
+
+@pytest.mark.parametrize("core_num", [5, 6, 7])
+def test_fold(core_num):
+    # LP, FC1 and FC2 run on the attention cores after them, the pipeline latency stays the same
+    result = simulate(SimulationConfig(**dict(TINY, core_num=core_num)))
+    base = simulate(SimulationConfig(**TINY))
+    assert result.cycles == base.cycles
+    assert sum(result.core_busy_cycles) == sum(base.core_busy_cycles)
+
+
+def test_ffn_split():
+    # 2 spare cores split FC1 and FC2 in halves
+    result = simulate(SimulationConfig(**dict(TINY, core_num=10)))
+    base = simulate(SimulationConfig(**TINY))
+    assert result.cycles < base.cycles
+    assert result.core_busy_cycles[:6] == base.core_busy_cycles[:6]
+    assert result.core_busy_cycles[6:] == [busy // 2 for busy in base.core_busy_cycles[6:8]] * 2
+
+
+def test_default_core_num():
+    assert SimulationConfig().core_num == 8
+
+
+@pytest.mark.parametrize("core_num", [1, 2, 4])
+def test_unsupported_core_num(core_num):
+    with pytest.raises(NotImplementedError):
+        mapper.map_cores(core_num, 2)
+    with pytest.raises(NotImplementedError):
+        simulate(SimulationConfig(**dict(TINY, core_num=core_num)))
+
+
+def test_unsupported_multi_head():
+    with pytest.raises(NotImplementedError):
+        mapper.map_cores(5, 2, multi_head=1)
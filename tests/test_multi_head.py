@@ -0,0 +1,20 @@
+from simulator import SimulationConfig, simulate
+
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=4, no_cache=True)
+
+
+def test_head_complete():
+    result = simulate(SimulationConfig(**dict(TINY, multi_head=1)))
+    assert len(result.head_complete_ns) == 4
+    assert all((latency is not None) and (0 < latency <= result.latency_ns) for latency in result.head_complete_ns)
+    # with one attention pipeline, the heads run one after another
+    assert result.head_complete_ns == sorted(result.head_complete_ns)
+    assert simulate(SimulationConfig(**TINY)).head_complete_ns == []
+
+
+def test_pipelines():
+    # a second attention pipeline on 13 cores runs half of the heads in parallel
+    serial = simulate(SimulationConfig(**dict(TINY, multi_head=1)))
+    parallel = simulate(SimulationConfig(**dict(TINY, multi_head=1, core_num=13)))
+    assert len(parallel.head_complete_ns) == 4
+    assert max(parallel.head_complete_ns) < max(serial.head_complete_ns)
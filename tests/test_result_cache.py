@@ -0,0 +1,41 @@
+from result_cache import ResultCache, config_key
+from simulator import SimulationConfig, simulate
+import simulator
+
+import dataclasses
+import os
+
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2)
+
+
+def test_cache_hit(tmp_path, monkeypatch):
+    config = SimulationConfig(**TINY, cache_dir=str(tmp_path))
+    result = simulate(config)
+    assert len(os.listdir(tmp_path)) == 1
+
+    # a hit never simulates
+    def simulating(args):
+        raise AssertionError("simulated a cached configuration")
+    monkeypatch.setattr(simulator, "simulating", simulating)
+    assert simulate(config) == result
+    # the args that only change the output share the result
+    assert simulate(dataclasses.replace(config, cache_size=1, trace_units="core0")) == result
+
+
+def test_config_key():
+    config = dataclasses.asdict(SimulationConfig(**TINY))
+    assert config_key(config) == config_key(dict(config, no_cache=True, cache_dir="elsewhere"))
+    assert config_key(config) != config_key(dict(config, seq_length=64))
+
+
+def test_evict(tmp_path):
+    cache = ResultCache(str(tmp_path), 0)
+    for key in ["a", "b", "c"]:
+        cache.put(key, {"cycles": 1})
+    os.utime(cache.path("a"), (0, 0))
+    # the least recently used result is removed first
+    cache.max_bytes = os.path.getsize(cache.path("b")) * 2
+    cache.evict()
+    assert cache.get("a") is None
+    assert cache.get("b") == {"cycles": 1}
+    assert cache.get("c") == {"cycles": 1}
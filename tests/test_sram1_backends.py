@@ -0,0 +1,40 @@
+from main import parse_args
+from simulator import SimulationConfig, simulate
+
+import pytest
+
+""" The SRAM1 backends only change how the occupancy is tracked, so all of them give the latency of the matrix backend """
+
+# a tiny 8-core config, simulated in well under a second
+TINY = ["--core-num", "8", "--seq-length", "32", "--embedding-dim", "128", "--head-num", "2", "--no-cache"]
+
+
+def run(*argv):
+    return simulate(SimulationConfig.from_args(parse_args(TINY + list(argv))))
+
+
+def test_checked_backend():
+    # every state transition of the ring pointers is cross-checked against the state matrix
+    result = run("--sram1-backend", "checked")
+    assert result.cycles == run().cycles
+
+
+@pytest.mark.parametrize("backend", ["ring", "pingpong", "matrix,ring,pingpong"])
+def test_backend_latency(backend):
+    matrix = run()
+    result = run("--sram1-backend", backend)
+    assert (result.cycles, result.latency_ns) == (matrix.cycles, matrix.latency_ns)
+    assert result.core_busy_cycles == matrix.core_busy_cycles
+
+
+@pytest.mark.parametrize("argv", [["--SRAM-capacity", "16384", "--GB-SRAM-bandwidth", "4"], ["--block-num", "2"]])
+def test_backend_latency_refill(argv):
+    # tiled weight matrices with narrow transfers, and a second block refilling the Q/K/V SRAM1s
+    matrix = run(*argv)
+    for backend in ["ring", "checked", "pingpong"]:
+        assert run("--sram1-backend", backend, *argv).cycles == matrix.cycles
+
+
+def test_pingpong_split():
+    with pytest.raises(ValueError):
+        run("--sram1-backend", "pingpong", "--sram1-split", "1")
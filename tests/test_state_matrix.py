@@ -0,0 +1,54 @@
+from state_matrix import PackedStateMatrix, count_states, new_state_matrix, set_states
+import utils
+
+import numpy as np
+
+""" A packed state matrix behaves like the uint8 one for the indexing the units use """
+
+
+def test_packed_1d():
+    rng = np.random.default_rng(0)
+    packed = new_state_matrix(101, utils.REMOVE, packed=True)
+    plain = new_state_matrix(101, utils.REMOVE)
+    for _ in range(500):
+        (start, end) = sorted(rng.integers(0, 102, 2).tolist())
+        state = int(rng.integers(0, 5))
+        if rng.random() < 0.5:
+            packed[start:end] = state
+            plain[start:end] = state
+        elif start < 101:
+            packed[start] = state
+            plain[start] = state
+        assert np.array_equal(np.asarray(packed), plain)
+        assert np.array_equal(np.asarray(packed[start:end]), plain[start:end])
+    assert [packed[i] for i in range(101)] == plain.tolist()
+
+
+def test_packed_2d():
+    rng = np.random.default_rng(1)
+    packed = new_state_matrix((7, 13), utils.READY, packed=True)
+    plain = new_state_matrix((7, 13), utils.READY)
+    for _ in range(200):
+        (row, col) = (int(rng.integers(0, 7)), int(rng.integers(0, 13)))
+        state = int(rng.integers(0, 5))
+        if rng.random() < 0.3:
+            packed[row] = state
+            plain[row] = state
+        elif rng.random() < 0.5:
+            packed[row:, col] = state
+            plain[row:, col] = state
+        else:
+            packed[row][col] = state
+            plain[row][col] = state
+        assert np.array_equal(np.asarray(packed), plain)
+        assert packed[row, col] == plain[row, col]
+    assert np.array_equal(np.asarray(packed.reshape(-1)[20:50]), plain.reshape(-1)[20:50])
+
+
+def test_set_states():
+    packed = new_state_matrix(40, utils.REMOVE, packed=True)
+    state_cnt = count_states(packed)
+    set_states(packed, state_cnt, 3, 29, utils.READY)
+    assert state_cnt == count_states(packed)
+    assert state_cnt[utils.READY] == 26
+    assert isinstance(packed[3:29], PackedStateMatrix)
@@ -0,0 +1,26 @@
+import sweep
+
+import csv
+
+TINY = ["--core-num", "8", "--seq-length", "32", "--embedding-dim", "128", "--head-num", "2", "--no-cache"]
+
+
+def test_sweep(tmp_path):
+    jobs = [TINY,
+            # no attention pipeline fits on 4 cores
+            TINY + ["--core-num", "4"],
+            TINY + ["--sram1-backend", "bad"],
+            # far longer than the timeout
+            TINY + ["--seq-length", "384", "--embedding-dim", "1024", "--head-num", "16"]]
+    output = str(tmp_path / "sweep.csv")
+    status_cnt = sweep.sweep(jobs, output, 4, timeout=5)
+    assert status_cnt == {sweep.OK: 1, sweep.UNSUPPORTED: 1, sweep.ERROR: 1, sweep.TIMEOUT: 1}
+
+    with open(output, newline="") as f:
+        # in the order the jobs finish
+        rows = {int(row["job"]): row for row in csv.DictReader(f)}
+    rows = [rows[idx] for idx in range(len(jobs))]
+    assert [row["status"] for row in rows] == [sweep.OK, sweep.UNSUPPORTED, sweep.ERROR, sweep.TIMEOUT]
+    assert (rows[0]["cycles"], rows[0]["core_num"], rows[0]["seq_length"]) == ("32342", "8", "32")
+    assert all(row["cycles"] == "" for row in rows[1:])
+    assert "SRAM1 backend" in rows[2]["message"]
@@ -0,0 +1,16 @@
+from simulator import SimulationConfig, simulate
+
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2, no_cache=True)
+
+
+def test_weight_tiling():
+    # the FC1 and FC2 weights don't fit in SRAM2 of 16 KB, they're transferred in 2 tiles
+    result = simulate(SimulationConfig(**dict(TINY, SRAM_capacity=16384)))
+    assert result.gb_weight_refetch == [1, 1, 1, 0, 0, 1, 2, 2, 0]
+    assert all(isinstance(times, int) for times in result.gb_weight_refetch)
+    assert result.cycles > simulate(SimulationConfig(**TINY)).cycles
+
+
+def test_no_tiling():
+    # the GBs without a weight matrix report 0
+    assert simulate(SimulationConfig(**TINY)).gb_weight_refetch == [1, 1, 1, 0, 0, 1, 1, 1, 0]
@@ -0,0 +1,45 @@
+from simulator import SimulationConfig, get_time_quantum, simulate
+import utils
+
+import pytest
+
+""" Simulated time is kept in integer ticks of the time quantum, converted to ns only when reporting """
+
+TINY = dict(core_num=8, seq_length=32, embedding_dim=128, head_num=2, no_cache=True)
+# every latency is a multiple of 10 metatime
+COARSE = dict(TINY, SRAM_access_latency=10, GB_access_latency=40, array_access_and_calculation_latency=10,
+              softmax_cal_latency=60, layernorm_cal_latency=10)
+
+
+def test_tiny_latency():
+    result = simulate(SimulationConfig(**TINY))
+    assert (result.cycles, result.latency_ns) == (32342, 3234.2)
+    assert all(isinstance(busy, int) for busy in result.core_busy_cycles)
+
+
+@pytest.mark.parametrize("config", [TINY, COARSE])
+def test_gcd_quantum(config):
+    # time_quantum = 0 uses the GCD of the latencies
+    gcd = simulate(SimulationConfig(**dict(config, time_quantum=0)))
+    quantum = get_time_quantum(SimulationConfig(**dict(config, time_quantum=0)))
+    explicit = simulate(SimulationConfig(**dict(config, time_quantum=quantum)))
+    assert (gcd.cycles, gcd.latency_ns) == (explicit.cycles, explicit.latency_ns)
+    assert gcd.cycles % quantum == 0
+    assert gcd.latency_ns == utils.metatime_to_ns(gcd.cycles)
+
+
+def test_coarse_quantum(capsys):
+    assert get_time_quantum(SimulationConfig(**dict(COARSE, time_quantum=0))) == 10
+    # a coarser time quantum only makes the one-tick handovers longer, by 2.3% on this config
+    exact = simulate(SimulationConfig(**dict(COARSE, time_quantum=1)))
+    coarse = simulate(SimulationConfig(**dict(COARSE, time_quantum=10, trace_level="info")))
+    assert (exact.cycles, coarse.cycles) == (141981, 145230)
+    assert exact.cycles <= coarse.cycles <= exact.cycles * 1.03
+    assert "WARNING: time quantum of 10 metatime" in capsys.readouterr().out
+    simulate(SimulationConfig(**dict(TINY, trace_level="info")))
+    assert "WARNING" not in capsys.readouterr().out
+
+
+def test_bad_quantum():
+    with pytest.raises(ValueError):
+        get_time_quantum(SimulationConfig(**dict(COARSE, time_quantum=3)))
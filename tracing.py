@@ -0,0 +1,52 @@
+"""
+Tracing of the simulator
+
+Every message has a level and optionally the unit it is about, e.g. "core0", "gb3", "softmax", "layernorm".
+A message is only formatted and written when its level is enabled and its unit passes the filter,
+so disabled dumps cost nothing but a function call
+
+SILENT: nothing but the simulation result
+INFO: configurations, mappings and the completion of every core
+DEBUG: periodic dumps of the states of all units
+"""
+SILENT = 0
+INFO = 1
+DEBUG = 2
+
+LEVELS = {"silent": SILENT, "info": INFO, "debug": DEBUG}
+
+# enabled level
+level = SILENT
+# names of the units to trace, None for all units
+units = None
+
+
+def configure(trace_level, trace_units=None):
+    """
+    trace_level: name in LEVELS or a level
+    trace_units: names of the units separated by comma, None or "" for all units
+    """
+
+    global level, units
+
+    level = LEVELS[trace_level] if isinstance(trace_level, str) else trace_level
+    units = set(trace_units.split(",")) if trace_units else None
+
+
+def enabled(msg_level, unit=None):
+    """ Whether a message of msg_level about unit(None for the whole simulator) will be written """
+    return (msg_level <= level) and ((unit is None) or (units is None) or (unit in units))
+
+
+def log(msg_level, msg, *args, unit=None):
+    """ Write msg, which is formatted with args by % only when enabled """
+
+    if enabled(msg_level, unit):
+        print((msg % args) if args else msg)
+
+
+def dump(msg_level, unit, func, *args):
+    """ Call a dump function, e.g. cores[0].dump_cal_status, only when enabled """
+
+    if enabled(msg_level, unit):
+        func(*args)
@@ -50,3 +50,13 @@ A = 1  # X
 # REMOVING = 2
 A_CAL = 3   # X_CAL
 A_SOFTMAX = 4   #X_LAYERNORM
+
+
+def metatime_to_ns(metatime):
+    """ 
+    Convert a number of metatime into nanoseconds
+
+    The simulator counts time in integer ticks, METATIME is only applied when reporting,
+    the result is rounded so that the same number of metatime is always reported as the same value
+    """
+    return round(metatime * METATIME, 6)